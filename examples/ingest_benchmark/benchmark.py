@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import time
+
+from commlib.serializer import JSONSerializer, get_json_backend
+from goalee.entity import Entity
+from goalee.ingest import JSON_BACKEND
+
+"""_summary_
+Compares the throughput of the message paths of an Entity, without a broker:
+
+- stdlib: payload decoded with the stdlib json module, then Entity.update_state()
+- commlib: payload decoded by the commlib JSON serializer, then Entity.update_state()
+  (the default subscriber path)
+- fast ingest: raw payload passed to Entity.ingest(), decoded with the fastest JSON
+  library installed (orjson, ujson, or stdlib json), keeping the declared attributes only
+
+Usage:
+    python benchmark.py --messages 100000 --keys 50 --attrs 5
+"""
+
+
+def make_payload(n_keys: int, seq: int) -> bytes:
+    msg = {f'field_{i}': seq + i * 0.5 for i in range(n_keys)}
+    msg['pose'] = {'position': {'x': seq * 0.1, 'y': seq * 0.2, 'z': 0.0}}
+    return json.dumps(msg).encode()
+
+
+def make_entity(n_attrs: int, fast_ingest: bool) -> Entity:
+    return Entity(name='bench', etype='sensor', topic='bench.topic',
+                  attributes=[f'field_{i}' for i in range(n_attrs)] + ['pose'],
+                  fast_ingest=fast_ingest)
+
+
+def run(name: str, on_payload, payloads) -> float:
+    t0 = time.perf_counter()
+    for payload in payloads:
+        on_payload(payload)
+    elapsed = time.perf_counter() - t0
+    rate = len(payloads) / elapsed
+    print(f'{name:<14} {rate:>12,.0f} msg/s  {elapsed / len(payloads) * 1e6:8.2f} us/msg')
+    return rate
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Entity message ingest benchmark')
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--keys', type=int, default=50, help='Fields per message')
+    parser.add_argument('--attrs', type=int, default=5, help='Declared entity attributes')
+    args = parser.parse_args()
+
+    # Distinct payloads, so that every message changes the entity state
+    payloads = [make_payload(args.keys, i) for i in range(1000)]
+    payloads = (payloads * (args.messages // len(payloads) + 1))[:args.messages]
+    print(f'{args.messages} messages, {args.keys} fields, {args.attrs} declared attributes')
+    print(f'JSON backends: commlib={get_json_backend()}, goalee={JSON_BACKEND}\n')
+
+    entity = make_entity(args.attrs, False)
+    stdlib = run('stdlib', lambda p: entity.update_state(json.loads(p)), payloads)
+    entity = make_entity(args.attrs, False)
+    commlib = run('commlib', lambda p: entity.update_state(JSONSerializer.deserialize(p)),
+                  payloads)
+    entity = make_entity(args.attrs, True)
+    fast = run('fast ingest', entity.ingest, payloads)
+
+    print(f'\nfast ingest vs stdlib:  {fast / stdlib:.2f}x')
+    print(f'fast ingest vs commlib: {fast / commlib:.2f}x')
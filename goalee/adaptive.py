@@ -0,0 +1,93 @@
+from typing import Any, Iterable, List, Optional, Tuple
+
+from goalee.timers import Deadline
+
+
+class AdaptiveTickRate:
+    """
+    Adapts the tick period of a goal to the activity of its entities.
+
+    - The base rate follows the fastest observed message rate of the watched
+      entities, multiplied by `rate_factor`.
+    - While the inputs of the goal are unchanged since the previous tick, the
+      period grows by `backoff` on every tick. Inputs are the attributes the
+      goal depends on (see `Goal.dependencies`), or any attribute of the
+      watched entities. Messages repeating the same values do not count.
+    - When a max_duration or for_duration deadline is closer than the period,
+      the period shrinks so that the goal is evaluated right at the deadline.
+
+    The resulting rate is always kept within [min_hz, max_hz].
+    """
+
+    def __init__(self,
+                 min_hz: float = 1.0,
+                 max_hz: float = 100.0,
+                 backoff: float = 2.0,
+                 rate_factor: float = 2.0):
+        if min_hz <= 0 or max_hz < min_hz:
+            raise ValueError('Adaptive tick rate requires 0 < min_hz <= max_hz')
+        self.min_hz = min_hz
+        self.max_hz = max_hz
+        self.backoff = backoff
+        self.rate_factor = rate_factor
+        self._period: float = 1.0 / max_hz
+        self._last_changes: int = -1
+
+    @property
+    def current_rate(self) -> float:
+        return 1.0 / self._period
+
+    def reset(self):
+        self._period = 1.0 / self.max_hz
+        self._last_changes = -1
+
+    @staticmethod
+    def count_changes(dependencies: Iterable[Tuple[Any, Optional[Iterable[str]]]]) -> int:
+        """
+        Returns the number of value changes of the given (entity, attributes)
+        dependencies, all attributes of the entity if attributes is None.
+        """
+        changes = 0
+        for entity, attrs in dependencies:
+            if attrs is None:
+                changes += entity.version
+            else:
+                # Dotted paths change with their top-level attribute, unless they
+                # are attributes themselves, e.g. extracted by a schema
+                keys = (entity.attr_key(attr) for attr in attrs)
+                changes += sum(entity.attr_version(key) for key in keys
+                               if key in entity.attributes_buff)
+        return changes
+
+    def next_period(self, dependencies: List[Tuple[Any, Optional[Iterable[str]]]],
+                    deadlines: List[Optional[Deadline]]) -> float:
+        """
+        Returns the period until the next tick.
+
+        Args:
+            dependencies: (entity, attributes) pairs the goal reads, attributes
+                None for any attribute of the entity.
+            deadlines: Deadlines of the goal.
+        """
+        min_period = 1.0 / self.max_hz
+        max_period = 1.0 / self.min_hz
+        changes = self.count_changes(dependencies)
+        if changes == self._last_changes:
+            period = self._period * self.backoff
+        else:
+            max_rate = max((e.msg_rate for e, _ in dependencies), default=0.0)
+            period = 1.0 / (max_rate * self.rate_factor) if max_rate > 0 else self._period
+        self._last_changes = changes
+        period = min(max(period, min_period), max_period)
+        for deadline in deadlines:
+            if deadline is not None and not (deadline.cancelled or deadline.fired):
+                period = min(period, max(deadline.remaining(), min_period))
+        self._period = period
+        return period
+
+    def serialize(self):
+        return {
+            'min_hz': self.min_hz,
+            'max_hz': self.max_hz,
+            'current_rate': self.current_rate,
+        }
@@ -9,10 +9,15 @@ from commlib.node import Node
 
 from goalee.entity import Entity
 from goalee.goal import Goal, GoalState
+from goalee.schema import get_path
 from goalee.types import Point
 from goalee.logging import default_logger as logger
 
 
+# Attributes holding the position of an entity, nested or extracted by a schema
+POSITION_ATTRS = ('position', 'position.x', 'position.y')
+
+
 class AreaGoalTag(IntEnum):
     ENTER = 0
     EXIT =  1
@@ -45,12 +50,15 @@ class RectangleAreaGoal(Goal):
         self._length_x = length_x
         self._length_y = length_y
         self._tag = tag
-        self._last_states = [entity.attributes.copy() for entity in self._entities]
+        self._last_states = [self.view(entity) for entity in self._entities]
 
     @property
     def tag(self):
         return self._tag
 
+    def infer_dependencies(self):
+        return {e.name: POSITION_ATTRS for e in self.watched_entities}
+
     def on_enter(self):
         self.log_debug(
             f'Starting RectangleAreaGoal <{self._name}> with params:\n'
@@ -63,39 +71,38 @@ class RectangleAreaGoal(Goal):
 
     def check_area(self):
         for _last_state in self._last_states:
-            if _last_state.get('position', None) is None:
+            x = _last_state.get_attr('position.x')
+            y = _last_state.get_attr('position.y')
+            if x is None or y is None:
                 continue
-            pos = _last_state['position']
-            if pos['x'] == None or pos['y'] == None:
-                continue
-            x_axis = (pos['x'] < (self._bottom_left_edge.x + self._length_x)
-                    and pos['x'] > self._bottom_left_edge.x)
-            y_axis = (pos['y'] < (self._bottom_left_edge.y + self._length_y)
-                    and pos['y'] > self._bottom_left_edge.y)
+            x_axis = (x < (self._bottom_left_edge.x + self._length_x)
+                    and x > self._bottom_left_edge.x)
+            y_axis = (y < (self._bottom_left_edge.y + self._length_y)
+                    and y > self._bottom_left_edge.y)
             reached = x_axis and y_axis
             if reached and self.tag == AreaGoalTag.ENTER:
                 if self._for_duration is not None and self._for_duration > 0:
-                    if self._ts_hold is None or self._ts_hold < 0:
-                        self._ts_hold = self.get_current_ts()
+                    if not self.holding:
+                        self.start_hold()
                         self.log_info(f'Entering FOR_TIME phase: {self._for_duration} seconds')
-                    elif self.get_current_ts() - self._ts_hold > self._for_duration:
+                    elif self.hold_expired:
                         self.log_info(f'Closing FOR_TIME phase: {self._for_duration} seconds')
                         self.set_state(GoalState.COMPLETED)
                 else:
                     self.set_state(GoalState.COMPLETED)
             elif reached and self.tag == AreaGoalTag.AVOID:
                 if self._for_duration is not None and self._for_duration > 0:
-                    if self._ts_hold is None or self._ts_hold < 0:
-                        self._ts_hold = self.get_current_ts()
-                    elif self.get_current_ts() - self._ts_hold > self._for_duration:
+                    if not self.holding:
+                        self.start_hold()
+                    elif self.hold_expired:
                         self.set_state(GoalState.FAILED)
                 else:
                     self.set_state(GoalState.FAILED)
             else:
-                self._ts_hold = -1.0
+                self.cancel_hold()
 
     def tick(self):
-        self._last_states = [entity.attributes.copy() for entity in self._entities]
+        self._last_states = [self.view(entity) for entity in self._entities]
         self.check_area()
 
 
@@ -122,12 +129,15 @@ class CircularAreaGoal(Goal):
         self._center = center
         self._radius = radius
         self._tag = tag
-        self._last_states = [entity.attributes.copy() for entity in self._entities]
+        self._last_states = [self.view(entity) for entity in self._entities]
 
     @property
     def tag(self):
         return self._tag
 
+    def infer_dependencies(self):
+        return {e.name: POSITION_ATTRS for e in self.watched_entities}
+
     def on_enter(self):
         self.log_debug(
             f'Starting CircularAreaGoal <{self._name}> with params:\n'
@@ -139,41 +149,40 @@ class CircularAreaGoal(Goal):
 
     def check_area(self):
         for _last_state in self._last_states:
-            if _last_state.get('position', None) is None:
+            x = _last_state.get_attr('position.x')
+            y = _last_state.get_attr('position.y')
+            if x is None or y is None:
                 continue
-            pos = _last_state['position']
-            if pos['x'] == None or pos['y'] == None:
-                continue
-            dist = self._calc_distance(pos)
+            dist = self._calc_distance(x, y)
             reached = dist <= self._radius
             if reached and self.tag == AreaGoalTag.ENTER:
                 if self._for_duration is not None and self._for_duration > 0:
-                    if self._ts_hold is None or self._ts_hold < 0:
-                        self._ts_hold = self.get_current_ts()
-                    elif self.get_current_ts() - self._ts_hold > self._for_duration:
+                    if not self.holding:
+                        self.start_hold()
+                    elif self.hold_expired:
                         self.set_state(GoalState.COMPLETED)
                 else:
                     self.set_state(GoalState.COMPLETED)
             elif reached and self.tag == AreaGoalTag.AVOID:
                 if self._for_duration is not None and self._for_duration > 0:
-                    if self._ts_hold is None or self._ts_hold < 0:
-                        self._ts_hold = self.get_current_ts()
-                    elif self.get_current_ts() - self._ts_hold > self._for_duration:
+                    if not self.holding:
+                        self.start_hold()
+                    elif self.hold_expired:
                         self.set_state(GoalState.FAILED)
                 else:
                     self.set_state(GoalState.FAILED)
             else:
-                self._ts_hold = -1.0
+                self.cancel_hold()
 
-    def _calc_distance(self, pos):
+    def _calc_distance(self, x, y):
         d = math.sqrt(
-            (pos['x'] - self._center.x)**2 + \
-            (pos['y'] - self._center.y)**2
+            (x - self._center.x)**2 + \
+            (y - self._center.y)**2
         )
         return d
 
     def tick(self):
-        self._last_states = [entity.attributes.copy() for entity in self._entities]
+        self._last_states = [self.view(entity) for entity in self._entities]
         self.check_area()
 
 
@@ -214,16 +223,23 @@ class MovingAreaGoal(Goal):
                          tick_freq=int(1.0 / tick_interval))
         self._radius = radius
         self._tag = tag
-        self._last_states = [entity.state for entity in self._entities]
+        self._last_states = [self.view(entity).state for entity in self._entities]
 
     @property
     def motion_entity(self):
         return self._mentity
 
+    @property
+    def watched_entities(self) -> list:
+        return [self._mentity] + self._entities
+
     @property
     def tag(self):
         return self._tag
 
+    def infer_dependencies(self):
+        return {e.name: POSITION_ATTRS for e in self.watched_entities}
+
     def on_enter(self):
         self.log_debug("Starting CircularAreaGoal <{}> with params:\n"
                     "-> Motion Entity: {}\n"
@@ -238,7 +254,12 @@ class MovingAreaGoal(Goal):
                     ))
 
     def check_area(self):
-        if self._mentity.state in (None, {}):
+        mstate = self.view(self._mentity).state
+        if mstate in (None, {}):
+            return
+        # Position of the motion entity, read once per evaluation
+        center = (get_path(mstate, 'position.x'), get_path(mstate, 'position.y'))
+        if None in center:
             return
         for _last_state in self._last_states:
             if _last_state in (None, {}):
@@ -250,34 +271,34 @@ class MovingAreaGoal(Goal):
             if pos['x'] == None or pos['y'] == None:
                 self.log_warning(f'Entity {_last_state}.position has no "x" or "y" attribute')
                 continue
-            dist = self._calc_distance(pos)
+            dist = self._calc_distance(pos, center)
             reached = dist <= self._radius
             if reached and self.tag == AreaGoalTag.ENTER:
                 if self._for_duration is not None and self._for_duration > 0:
-                    if self._ts_hold is None or self._ts_hold < 0:
-                        self._ts_hold = self.get_current_ts()
-                    elif self.get_current_ts() - self._ts_hold > self._for_duration:
+                    if not self.holding:
+                        self.start_hold()
+                    elif self.hold_expired:
                         self.set_state(GoalState.COMPLETED)
                 else:
                     self.set_state(GoalState.COMPLETED)
             elif not reached and self.tag == AreaGoalTag.AVOID:
                 if self._for_duration is not None and self._for_duration > 0:
-                    if self._ts_hold is None or self._ts_hold < 0:
-                        self._ts_hold = self.get_current_ts()
-                    elif self.get_current_ts() - self._ts_hold > self._for_duration:
+                    if not self.holding:
+                        self.start_hold()
+                    elif self.hold_expired:
                         self.set_state(GoalState.FAILED)
                 else:
                     self.set_state(GoalState.FAILED)
             else:
-                self._ts_hold = -1.0
+                self.cancel_hold()
 
-    def _calc_distance(self, pos):
+    def _calc_distance(self, pos, center):
         d = math.sqrt(
-            (pos['x'] - self._mentity.state["position"]["x"])**2 + \
-            (pos['y'] - self._mentity.state["position"]["y"])**2
+            (pos['x'] - center[0])**2 + \
+            (pos['y'] - center[1])**2
         )
         return d
 
     def tick(self):
-        self._last_states = [entity.state for entity in self._entities]
+        self._last_states = [self.view(entity).state for entity in self._entities]
         self.check_area()
@@ -0,0 +1,208 @@
+"""
+Batch runner for many independent scenarios.
+
+Scenarios are built by factories and executed across a pool of worker
+processes. Each factory is either a picklable callable returning a Scenario, or
+a string of the form "package.module:function" or "path/to/file.py:function".
+When the function name is omitted, `create_scenario` is used.
+
+Command line usage:
+
+    python -m goalee.batch checks.robot_a:create_scenario checks/robot_b.py -w 8
+"""
+import argparse
+import asyncio
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from goalee.connections import enable_shared_nodes, get_node_pool
+from goalee.logging import default_logger as logger
+
+DEFAULT_FACTORY_NAME = 'create_scenario'
+
+ScenarioFactory = Union[str, Callable[[], Any]]
+
+
+@dataclass
+class ScenarioResult:
+    factory: str
+    name: Optional[str] = None
+    score: Optional[float] = None
+    goals: List[Tuple[str, str]] = field(default_factory=list)
+    anti_goals: List[Tuple[str, str]] = field(default_factory=list)
+    fatal_goals: List[Tuple[str, str]] = field(default_factory=list)
+    wall_time: float = 0.0
+    worker_pid: int = -1
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def load_factory(spec: ScenarioFactory) -> Callable[[], Any]:
+    """
+    Resolves a scenario factory specification to a callable.
+    """
+    if callable(spec):
+        return spec
+    module_ref, _, func_name = spec.partition(':')
+    func_name = func_name or DEFAULT_FACTORY_NAME
+    if module_ref.endswith('.py'):
+        mod_name = os.path.splitext(os.path.basename(module_ref))[0]
+        mod_spec = importlib.util.spec_from_file_location(mod_name, module_ref)
+        if mod_spec is None:
+            raise ValueError(f'Cannot load scenario module from <{module_ref}>')
+        module = importlib.util.module_from_spec(mod_spec)
+        mod_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_ref)
+    factory = getattr(module, func_name, None)
+    if not callable(factory):
+        raise ValueError(f'Scenario factory <{func_name}> not found in <{module_ref}>')
+    return factory
+
+
+def _factory_name(spec: ScenarioFactory) -> str:
+    if isinstance(spec, str):
+        return spec
+    return f'{spec.__module__}:{getattr(spec, "__qualname__", repr(spec))}'
+
+
+def _init_worker():
+    # Broker connections of scenarios are kept open and reused for the
+    # lifetime of the worker process.
+    enable_shared_nodes(True)
+    get_node_pool().set_keep_idle(True)
+
+
+def run_scenario(spec: ScenarioFactory, mode: str = 'concurrent') -> ScenarioResult:
+    """
+    Builds a scenario from its factory, executes it and collects its results.
+    Errors are reported in the result instead of being raised.
+    """
+    result = ScenarioResult(factory=_factory_name(spec), worker_pid=os.getpid())
+    ts_start = time.perf_counter()
+    scenario = None
+    try:
+        scenario = load_factory(spec)()
+        result.name = scenario.name
+        if mode == 'seq':
+            scenario.run_seq()
+        elif mode == 'async':
+            asyncio.run(scenario.run_async())
+        else:
+            scenario.run_concurrent()
+        result.score = scenario.calc_score()
+        result.goals = [(g.name, g.state.name) for g in scenario.goals]
+        result.anti_goals = [(g.name, g.state.name) for g in scenario.anti_goals]
+        result.fatal_goals = [(g.name, g.state.name) for g in scenario.fatal_goals]
+    except Exception as e:
+        result.error = f'{e.__class__.__name__}: {e}'
+    finally:
+        # Release the subscriptions of the scenario on the shared nodes of the worker
+        if scenario is not None:
+            try:
+                scenario.close()
+            except Exception as e:
+                logger.error(f'Error closing scenario <{result.name}>: {e}')
+    result.wall_time = time.perf_counter() - ts_start
+    return result
+
+
+class BatchRunner:
+    """
+    Runs independent scenarios across a pool of worker processes.
+
+    Args:
+        factories: Scenario factories (callables or "module:function" strings).
+        workers: Number of worker processes. Defaults to the number of CPUs.
+        mode: Execution mode of each scenario: "concurrent", "seq" or "async".
+        on_result: Optional callback called in the parent process for each result,
+            in completion order.
+    """
+
+    def __init__(self,
+                 factories: List[ScenarioFactory],
+                 workers: Optional[int] = None,
+                 mode: str = 'concurrent',
+                 on_result: Optional[Callable[[ScenarioResult], None]] = None):
+        if mode not in ('concurrent', 'seq', 'async'):
+            raise ValueError(f'Invalid execution mode <{mode}>')
+        self._factories = list(factories)
+        self._workers = workers or os.cpu_count() or 1
+        self._mode = mode
+        self._on_result = on_result
+
+    def run(self) -> List[ScenarioResult]:
+        """
+        Runs all scenarios and returns their results, in the order of the factories.
+        """
+        results: List[Optional[ScenarioResult]] = [None] * len(self._factories)
+        with ProcessPoolExecutor(max_workers=self._workers,
+                                 initializer=_init_worker) as executor:
+            futures = {
+                executor.submit(run_scenario, spec, self._mode): idx
+                for idx, spec in enumerate(self._factories)
+            }
+            for f in as_completed(futures):
+                idx = futures[f]
+                try:
+                    result = f.result()
+                except Exception as e:
+                    # Worker crashed or the factory could not be pickled
+                    result = ScenarioResult(factory=_factory_name(self._factories[idx]),
+                                            error=f'{e.__class__.__name__}: {e}')
+                results[idx] = result
+                if self._on_result is not None:
+                    self._on_result(result)
+        return results
+
+
+def summarize(results: List[ScenarioResult]) -> Dict[str, Any]:
+    return {
+        'scenarios': len(results),
+        'errors': sum(1 for r in results if not r.ok),
+        'total_score': sum(r.score for r in results if r.score is not None),
+        'total_wall_time': sum(r.wall_time for r in results),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='goalee-batch',
+        description='Run many goalee scenarios across a pool of worker processes.')
+    parser.add_argument('factories', nargs='+',
+                        help='Scenario factories: "module:function" or "file.py:function"')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('-m', '--mode', default='concurrent',
+                        choices=('concurrent', 'seq', 'async'),
+                        help='Execution mode of each scenario')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    def _report(r: ScenarioResult):
+        status = f'score={r.score:.2f}' if r.ok else f'ERROR {r.error}'
+        logger.info(f'[BatchRunner] {r.factory} ({r.name}): {status} [{r.wall_time:.2f}s]')
+
+    results = BatchRunner(args.factories, args.workers, args.mode, _report).run()
+    summary = summarize(results)
+    logger.info(f'[BatchRunner] Summary: {summary}')
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': summary, 'results': [asdict(r) for r in results]},
+                      f, indent=2)
+    return 0 if summary['errors'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
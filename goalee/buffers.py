@@ -0,0 +1,238 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterator, List, Optional, Tuple
+
+from goalee.rolling import RollingStats
+
+BUFFER_BACKENDS = ('deque', 'array')
+
+# Evicted entries kept at the head of a TimeWindow before compacting its lists
+_COMPACT_MIN = 64
+
+
+class RingBuffer:
+    """
+    Fixed-capacity ring buffer of numeric values and their timestamps, stored in
+    `array('d')`.
+
+    Every value is written twice, at its position and at the same position
+    shifted by the capacity. The last n values are therefore always contiguous
+    in memory, so `view` returns them in chronological order as a memoryview
+    without copying, and appending is O(1).
+
+    Views are live: they reflect later appends, so they should be used right
+    away (e.g. within a single condition evaluation) and not kept.
+
+    Args:
+        maxlen: Capacity of the buffer.
+    """
+
+    __slots__ = ('maxlen', '_data', '_ts', '_zeros', '_data_view', '_ts_view', '_head', '_len')
+
+    def __init__(self, maxlen: int):
+        if maxlen <= 0:
+            raise ValueError('RingBuffer capacity must be positive')
+        self.maxlen = maxlen
+        self._data = array('d', bytes(16 * maxlen))
+        self._ts = array('d', bytes(16 * maxlen))
+        self._zeros = array('d', bytes(8 * maxlen))
+        self._data_view = memoryview(self._data)
+        self._ts_view = memoryview(self._ts)
+        self._head = 0
+        self._len = 0
+
+    def append(self, value: float, ts: float = 0.0) -> None:
+        value = float(value)
+        head = self._head
+        self._data[head] = value
+        self._data[head + self.maxlen] = value
+        self._ts[head] = ts
+        self._ts[head + self.maxlen] = ts
+        self._head = head + 1 if head + 1 < self.maxlen else 0
+        if self._len < self.maxlen:
+            self._len += 1
+
+    def clear(self) -> None:
+        self._head = 0
+        self._len = 0
+
+    @property
+    def full(self) -> bool:
+        return self._len == self.maxlen
+
+    def _window(self, store: memoryview, n: Optional[int]) -> memoryview:
+        if n is None or n > self._len:
+            n = self._len
+        elif n < 0:
+            n = 0
+        end = self._head + self.maxlen
+        return store[end - n:end]
+
+    def view(self, n: Optional[int] = None) -> memoryview:
+        """Returns the last n values (all by default), oldest first, without copying."""
+        return self._window(self._data_view, n)
+
+    def timestamps(self, n: Optional[int] = None) -> memoryview:
+        """Returns the timestamps of the last n values, oldest first, without copying."""
+        return self._window(self._ts_view, n)
+
+    def zeros(self, n: int) -> memoryview:
+        """Returns n zeros, without allocating."""
+        return memoryview(self._zeros)[:min(n, self.maxlen)]
+
+    def last(self) -> float:
+        if self._len == 0:
+            raise IndexError('RingBuffer is empty')
+        return self._data[self._head + self.maxlen - 1]
+
+    def as_numpy(self, n: Optional[int] = None):
+        """Returns the last n values as a NumPy array sharing the buffer memory."""
+        import numpy as np
+        return np.frombuffer(self.view(n), dtype=np.float64)
+
+    def tolist(self, n: Optional[int] = None) -> List[float]:
+        return self.view(n).tolist()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.view())
+
+    def __repr__(self) -> str:
+        return f'RingBuffer(maxlen={self.maxlen}, values={self.tolist()})'
+
+
+class TimeWindow:
+    """
+    Values of an attribute received in the last `window` seconds, and at most
+    the last maxlen of them if maxlen is given, with their timestamps.
+
+    Entries are evicted as they age out of the window, on append and on
+    `evict`, so memory follows the actual rate of the stream. Timestamps are
+    kept sorted, so queries by time are binary searches. Evicted entries are
+    skipped by an offset and compacted in amortized O(1).
+
+    Running aggregates over the window are kept in `stats` while the values
+    are numeric (None otherwise), see `goalee.rolling.RollingStats`.
+
+    Args:
+        window: Length of the window in seconds.
+        maxlen: Maximum number of values in the window. None for no limit.
+    """
+
+    def __init__(self, window: float, maxlen: Optional[int] = None):
+        if window <= 0:
+            raise ValueError('TimeWindow length must be positive')
+        if maxlen is not None and maxlen <= 0:
+            raise ValueError('TimeWindow capacity must be positive')
+        self.window = window
+        self.maxlen = maxlen
+        self.stats: Optional[RollingStats] = RollingStats()
+        self._lock = threading.Lock()
+        self._values: List[Any] = []
+        self._ts: List[float] = []
+        # Index of the oldest entry in the window
+        self._start = 0
+
+    def append(self, value: Any, ts: float) -> None:
+        with self._lock:
+            self._values.append(value)
+            self._ts.append(ts)
+            if self.stats is not None:
+                try:
+                    self.stats.append(value)
+                except (TypeError, ValueError):
+                    # Non-numeric attribute, no aggregates
+                    self.stats = None
+            if self.maxlen is not None and len(self._ts) - self._start > self.maxlen:
+                self._drop(len(self._ts) - self.maxlen)
+            self._evict(ts)
+
+    def evict(self, now: float) -> None:
+        """Drops the values older than now - window."""
+        with self._lock:
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        ts = self._ts
+        cutoff = now - self.window
+        if self._start < len(ts) and ts[self._start] < cutoff:
+            self._drop(bisect_left(ts, cutoff, self._start))
+
+    def _drop(self, end: int) -> None:
+        # Evicts the entries before index end
+        if self.stats is not None:
+            for _ in range(end - self._start):
+                self.stats.popleft()
+        self._start = end
+        if end >= _COMPACT_MIN and 2 * end >= len(self._ts):
+            del self._values[:end]
+            del self._ts[:end]
+            self._start = 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._ts.clear()
+            self._start = 0
+            self.stats = RollingStats()
+
+    def _since(self, seconds: Optional[float], n: Optional[int], now: Optional[float]) -> int:
+        # Index of the first entry among the last n received in the last seconds
+        start = self._start
+        if seconds is not None and start < len(self._ts):
+            now = self._ts[-1] if now is None else now
+            start = bisect_left(self._ts, now - seconds, start)
+        if n is not None:
+            start = max(start, len(self._ts) - max(n, 0))
+        return start
+
+    def values(self, seconds: Optional[float] = None, n: Optional[int] = None,
+               now: Optional[float] = None) -> List[Any]:
+        """
+        Returns the values of the window, oldest first: those received in the
+        last seconds before now (the timestamp of the last value by default)
+        and, given n, only the last n of them.
+        """
+        with self._lock:
+            return self._values[self._since(seconds, n, now):]
+
+    def timestamps(self, seconds: Optional[float] = None, n: Optional[int] = None,
+                   now: Optional[float] = None) -> List[float]:
+        """Returns the timestamps of the values returned by `values`."""
+        with self._lock:
+            return self._ts[self._since(seconds, n, now):]
+
+    def range(self, t_start: float, t_end: float) -> Tuple[List[float], List[Any]]:
+        """Returns the timestamps and values of the entries with t_start <= ts <= t_end."""
+        with self._lock:
+            lo = bisect_left(self._ts, t_start, self._start)
+            hi = bisect_right(self._ts, t_end, lo)
+            return self._ts[lo:hi], self._values[lo:hi]
+
+    def last(self) -> Any:
+        if self._start >= len(self._ts):
+            raise IndexError('TimeWindow is empty')
+        return self._values[-1]
+
+    @property
+    def duration(self) -> float:
+        """Time between the oldest and the newest value in the window."""
+        with self._lock:
+            if self._start >= len(self._ts):
+                return 0.0
+            return self._ts[-1] - self._ts[self._start]
+
+    def tolist(self) -> List[Any]:
+        return self.values()
+
+    def __len__(self) -> int:
+        return len(self._ts) - self._start
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.values())
+
+    def __repr__(self) -> str:
+        return f'TimeWindow(window={self.window}, maxlen={self.maxlen}, values={self.values()})'
@@ -0,0 +1,424 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from goalee.logging import default_logger as logger
+from goalee.timers import Deadline, get_deadline_scheduler
+
+
+class Clock:
+    """
+    Source of time used by goals, scenarios and schedulers, and of the timed
+    waits they perform.
+
+    Events waited on with `wait` or `wait_async` must be set with `notify`, so
+    that the waiters are woken up, and so that clocks which do not follow the
+    wall clock know when a waiter runs again.
+    """
+
+    # True if the clock follows the wall clock
+    realtime = True
+
+    def time(self) -> float:
+        """Current time, in seconds since the epoch."""
+        raise NotImplementedError()
+
+    def monotonic(self) -> float:
+        """Monotonic time in seconds, used to measure intervals."""
+        raise NotImplementedError()
+
+    def sleep(self, seconds: float) -> None:
+        raise NotImplementedError()
+
+    async def sleep_async(self, seconds: float) -> None:
+        raise NotImplementedError()
+
+    def wait(self, event: threading.Event, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until event is notified or timeout seconds have passed.
+
+        Returns:
+            bool: True if the event is set.
+        """
+        raise NotImplementedError()
+
+    async def wait_async(self, event: threading.Event,
+                         timeout: Optional[float] = None) -> bool:
+        """Coroutine counterpart of `wait`."""
+        raise NotImplementedError()
+
+    def notify(self, event: threading.Event) -> None:
+        """Sets an event and wakes the threads and coroutines waiting on it."""
+        raise NotImplementedError()
+
+    def call_later(self, delay: float, callback: Callable) -> Deadline:
+        """Schedules callback to be called after delay seconds."""
+        raise NotImplementedError()
+
+    # Goals run by threads and coroutines which the clock may need to wait for
+    # before moving time forward. Only meaningful for clocks which are not realtime.
+
+    def owner(self) -> Any:
+        """Identifies the calling thread, or the calling task inside an event loop."""
+        return None
+
+    def idle(self, owner: Any = None) -> None:
+        """Signals that owner (the caller by default) stopped running goals."""
+        pass
+
+    def handover(self, owner: Any) -> None:
+        """Marks owner as running, then the caller as idle, e.g. when a child goal
+        exits and wakes up its parent."""
+        pass
+
+    def begin_spawn(self) -> None:
+        """Announces a goal which is about to be started by another thread or task."""
+        pass
+
+    def end_spawn(self, adopt: bool = True) -> None:
+        """
+        Called when an announced goal starts running (adopt=True), in the calling
+        thread or task, or when it will not run at all (adopt=False).
+        """
+        pass
+
+
+def _current_owner() -> Any:
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return task if task is not None else threading.get_ident()
+
+
+class _ThreadWakeup:
+    __slots__ = ('owner', '_event')
+
+    def __init__(self, owner: Any):
+        self.owner = owner
+        self._event = threading.Event()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def set(self):
+        self._event.set()
+
+    def wait(self):
+        self._event.wait()
+
+
+class _AsyncWakeup:
+    """Wakes a coroutine waiting on a clock, from any thread."""
+
+    __slots__ = ('owner', '_loop', '_future', '_set')
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future,
+                 owner: Any = None):
+        self.owner = owner
+        self._loop = loop
+        self._future = future
+        self._set = False
+
+    def is_set(self) -> bool:
+        return self._set
+
+    def set(self):
+        self._set = True
+        try:
+            self._loop.call_soon_threadsafe(self._resume)
+        except RuntimeError:
+            # Event loop already closed
+            pass
+
+    def _resume(self):
+        if not self._future.done():
+            self._future.set_result(None)
+
+
+class SystemClock(Clock):
+    """Clock following the wall clock. Deadlines run on the shared deadline scheduler."""
+
+    realtime = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._async_waiters: Dict[int, list] = {}
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    async def sleep_async(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+    def wait(self, event: threading.Event, timeout: Optional[float] = None) -> bool:
+        return event.wait(timeout)
+
+    async def wait_async(self, event: threading.Event,
+                         timeout: Optional[float] = None) -> bool:
+        loop = asyncio.get_running_loop()
+        wakeup = _AsyncWakeup(loop, loop.create_future())
+        with self._lock:
+            if event.is_set():
+                return True
+            self._async_waiters.setdefault(id(event), []).append(wakeup)
+        try:
+            await asyncio.wait_for(wakeup._future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                waiters = self._async_waiters.get(id(event), [])
+                if wakeup in waiters:
+                    waiters.remove(wakeup)
+                    if len(waiters) == 0:
+                        self._async_waiters.pop(id(event), None)
+        return event.is_set()
+
+    def notify(self, event: threading.Event) -> None:
+        with self._lock:
+            event.set()
+            waiters = self._async_waiters.pop(id(event), ())
+        for wakeup in waiters:
+            wakeup.set()
+
+    def call_later(self, delay: float, callback: Callable) -> Deadline:
+        return get_deadline_scheduler().call_later(delay, callback)
+
+
+class VirtualClock(Clock):
+    """
+    Clock whose time only moves when it is advanced, e.g. on the timestamps of
+    recorded or simulated messages.
+
+    Advancing the clock fires every pending deadline and sleep in time order.
+    After each one, the clock waits until every thread or task it woke up (and
+    every parent goal woken by an exiting child) waits on the clock again, or
+    is idle, before moving on. A run therefore takes as long as its evaluations
+    take, not as long as the recorded time span, and its verdicts are the same
+    as in real time.
+
+    Args:
+        start: Initial time, in seconds.
+        settle_timeout: Maximum real time, in seconds, to wait for woken goals to
+            wait on the clock again, or None to wait as long as they run. Once
+            exceeded, advancing the clock raises a TimeoutError, e.g. when a goal
+            waits without the clock (time.sleep, Event.wait, ...).
+
+    Usage:
+        clock = VirtualClock()
+        set_clock(clock)
+        # ... start the scenario in a thread, then feed it:
+        clock.replay([(0.1, entity, {'range': 3}), (4.5, entity, {'range': 12})])
+    """
+
+    realtime = False
+
+    def __init__(self, start: float = 0.0, settle_timeout: Optional[float] = None):
+        self._now = start
+        self._settle_timeout = settle_timeout
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        # Threads and tasks woken by the clock which have not waited on it again
+        self._active = set()
+        # Goals announced by begin_spawn() which have not started yet
+        self._n_spawning = 0
+        self._waiters: Dict[int, list] = {}
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def call_later(self, delay: float, callback: Callable) -> Deadline:
+        with self._cond:
+            deadline = Deadline(self._now + max(delay, 0.0), callback, self)
+            heapq.heappush(self._heap, (deadline.when, next(self._counter), deadline))
+        return deadline
+
+    def _cancel(self, deadline: Deadline):
+        with self._cond:
+            if not deadline.fired:
+                deadline.cancelled = True
+
+    def sleep(self, seconds: float) -> None:
+        self.wait(threading.Event(), seconds)
+
+    async def sleep_async(self, seconds: float) -> None:
+        await self.wait_async(threading.Event(), seconds)
+
+    def wait(self, event: threading.Event, timeout: Optional[float] = None) -> bool:
+        wakeup = _ThreadWakeup(_current_owner())
+        waiting, handle = self._add_waiter(event, wakeup, timeout)
+        if not waiting:
+            return True
+        wakeup.wait()
+        if handle is not None:
+            handle.cancel()
+        return event.is_set()
+
+    async def wait_async(self, event: threading.Event,
+                         timeout: Optional[float] = None) -> bool:
+        loop = asyncio.get_running_loop()
+        wakeup = _AsyncWakeup(loop, loop.create_future(), _current_owner())
+        waiting, handle = self._add_waiter(event, wakeup, timeout)
+        if not waiting:
+            return True
+        try:
+            await wakeup._future
+        finally:
+            if handle is not None:
+                handle.cancel()
+            self._remove_waiter(event, wakeup)
+        return event.is_set()
+
+    def _add_waiter(self, event, wakeup, timeout) -> Tuple[bool, Optional[Deadline]]:
+        with self._cond:
+            if event.is_set():
+                return False, None
+            self._waiters.setdefault(id(event), []).append(wakeup)
+            # The waiter no longer runs
+            self._deactivate(wakeup.owner)
+        if timeout is None:
+            return True, None
+        return True, self.call_later(timeout, lambda: self._wake_waiter(event, wakeup))
+
+    def _remove_waiter(self, event, wakeup):
+        with self._cond:
+            waiters = self._waiters.get(id(event), [])
+            if wakeup in waiters:
+                waiters.remove(wakeup)
+                if len(waiters) == 0:
+                    self._waiters.pop(id(event), None)
+
+    def notify(self, event: threading.Event) -> None:
+        with self._cond:
+            event.set()
+            for wakeup in self._waiters.pop(id(event), []):
+                if not wakeup.is_set():
+                    self._active.add(wakeup.owner)
+                    wakeup.set()
+
+    def _wake_waiter(self, event: threading.Event, wakeup):
+        self._remove_waiter(event, wakeup)
+        with self._cond:
+            if not wakeup.is_set():
+                self._active.add(wakeup.owner)
+                wakeup.set()
+
+    def owner(self) -> Any:
+        return _current_owner()
+
+    def idle(self, owner: Any = None) -> None:
+        with self._cond:
+            self._deactivate(_current_owner() if owner is None else owner)
+
+    def handover(self, owner: Any) -> None:
+        with self._cond:
+            if owner is not None:
+                self._active.add(owner)
+            self._deactivate(_current_owner())
+
+    def begin_spawn(self) -> None:
+        with self._cond:
+            self._n_spawning += 1
+
+    def end_spawn(self, adopt: bool = True) -> None:
+        with self._cond:
+            if adopt:
+                self._active.add(_current_owner())
+            self._n_spawning = max(self._n_spawning - 1, 0)
+            self._cond.notify_all()
+
+    def _deactivate(self, owner: Any):
+        if owner in self._active:
+            self._active.discard(owner)
+            self._cond.notify_all()
+
+    def _settled(self) -> bool:
+        return len(self._active) == 0 and self._n_spawning == 0
+
+    def settle(self) -> None:
+        """
+        Waits until all woken goals wait on the clock again, or are idle.
+
+        Raises:
+            TimeoutError: If they have not after settle_timeout seconds. Time
+                cannot move on while they run, so the clock is left unsettled.
+        """
+        with self._cond:
+            if not self._cond.wait_for(self._settled, timeout=self._settle_timeout):
+                raise TimeoutError(
+                    f'VirtualClock: {len(self._active)} woken goals and {self._n_spawning} '
+                    f'starting goals did not wait on the clock again within '
+                    f'{self._settle_timeout} seconds at t={self._now:.3f}, '
+                    f'do they wait without the clock?')
+
+    def advance_to(self, ts: float) -> None:
+        """
+        Moves the clock forward to ts, firing due deadlines and sleeps in time order.
+        """
+        while True:
+            with self._cond:
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                if len(self._heap) == 0 or self._heap[0][0] > ts:
+                    self._now = max(self._now, ts)
+                    return
+                deadline = heapq.heappop(self._heap)[2]
+                deadline.fired = True
+                self._now = max(self._now, deadline.when)
+            try:
+                deadline.callback()
+            except Exception as e:
+                logger.error(f'[VirtualClock] Error in deadline callback: {e}')
+            self.settle()
+
+    def advance(self, seconds: float) -> None:
+        self.advance_to(self._now + seconds)
+
+    def inject(self, entity, state: Dict[str, Any], ts: Optional[float] = None) -> None:
+        """
+        Delivers a message to an entity at time ts (defaults to the current time),
+        after advancing the clock to it.
+        """
+        if ts is not None:
+            self.advance_to(ts)
+        entity.update_state(state)
+        self.settle()
+
+    def replay(self, messages: Iterable[Tuple[float, Any, Dict[str, Any]]],
+               until: Optional[float] = None) -> None:
+        """
+        Injects (ts, entity, state) messages in order, then optionally advances
+        the clock to until.
+        """
+        for ts, entity, state in messages:
+            self.inject(entity, state, ts)
+        if until is not None:
+            self.advance_to(until)
+
+
+_clock: Clock = SystemClock()
+
+
+def get_clock() -> Clock:
+    """Returns the clock used by goals, scenarios and schedulers."""
+    return _clock
+
+
+def set_clock(clock: Clock) -> None:
+    """Sets the process-wide clock. Must be called before scenarios and goals are created."""
+    global _clock
+    _clock = clock
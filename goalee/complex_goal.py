@@ -1,11 +1,13 @@
 from typing import Any, Optional, Callable
 from enum import IntEnum
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from concurrent.futures._base import TimeoutError
-import time
+import asyncio
+import functools
 import uuid
 
 from commlib.node import Node
+from goalee.clock import get_clock
+from goalee.executor import GoalBatch, get_goal_executor
 from goalee.goal import Goal, GoalState
 from goalee.logging import default_logger as logger
 from goalee.rtmonitor import RTMonitor
@@ -42,6 +44,8 @@ class ComplexGoal(Goal):
             algorithm = ComplexGoalAlgorithm.ALL_ACCOMPLISHED
         self._algorithm = algorithm
         self._x_accomplished = accomplished
+        # Set once the children of a run can no longer change the verdict
+        self._children_closed = False
 
     @property
     def goals(self):
@@ -61,13 +65,52 @@ class ComplexGoal(Goal):
         for goal in self._goals:
             goal.set_tick_freq(freq)
 
+    def set_event_driven(self, enabled: bool):
+        super().set_event_driven(enabled)
+        for goal in self._goals:
+            goal.set_event_driven(enabled)
+
+    def set_track_dependencies(self, enabled: bool):
+        super().set_track_dependencies(enabled)
+        for goal in self._goals:
+            goal.set_track_dependencies(enabled)
+
+    def set_tick_scheduler(self, scheduler):
+        super().set_tick_scheduler(scheduler)
+        for goal in self._goals:
+            goal.set_tick_scheduler(scheduler)
+
+    def set_adaptive_tick_rate(self, min_hz: float, max_hz: float, **kwargs):
+        for goal in self._goals:
+            goal.set_adaptive_tick_rate(min_hz, max_hz, **kwargs)
+
+    def set_update_queue(self, maxsize: Optional[int], overflow: str = 'drop_oldest'):
+        for goal in self._goals:
+            goal.set_update_queue(maxsize, overflow)
+
+    def _children_timeout(self) -> Optional[float]:
+        # With a virtual clock, children are bounded by their own max_duration
+        # (capped to the one of the parent), which is measured in clock time.
+        return self._max_duration if get_clock().realtime else None
+
     def serialize(self):
         return {**super().serialize(), 'algorithm': self._algorithm.name, 'goals': [goal.serialize() for goal in self._goals]}
 
     def enter(self, rtmonitor: RTMonitor = None):
         self.set_state(GoalState.RUNNING)
         self.on_enter()
+        self._check_duration_constraints()
+        self.on_exit()
+        return self
+
+    async def enter_async(self, rtmonitor: RTMonitor = None):
+        self.set_state(GoalState.RUNNING)
+        await self.on_enter_async()
+        self._check_duration_constraints()
+        self.on_exit()
+        return self
 
+    def _check_duration_constraints(self):
         elapsed = self.get_current_elapsed()
         self._duration = elapsed
         if self._state == GoalState.FAILED:
@@ -80,17 +123,8 @@ class ComplexGoal(Goal):
             if self._max_duration not in (None, 0) and elapsed > self._max_duration:
                 self.set_state(GoalState.FAILED)
 
-        self.on_exit()
-        return self
-
     def on_enter(self):
-        self.log_debug(f'Starting ComplexGoal <{self._name}>:\n'
-                       f"Parameters:\n"
-                       f"  Algorithm: {self._algorithm.name}\n"
-                       f"  X-Accomplished: {self._x_accomplished}\n"
-                       f"  Max Duration: {self._max_duration}\n"
-                       f"  Min Duration: {self._min_duration}\n"
-                       f"Internal Goals: {[f'{g.__class__.__name__}:{g.name}' for g in self._goals]}")
+        self._log_start()
         self._ts_start = self.get_current_ts()
 
         if self._algorithm in (ComplexGoalAlgorithm.ALL_ACCOMPLISHED_ORDERED,
@@ -100,7 +134,31 @@ class ComplexGoal(Goal):
             self.run_concurrent()
 
         self.calc_result()
+        self._log_finish()
+
+    async def on_enter_async(self):
+        self._log_start()
+        self._ts_start = self.get_current_ts()
+
+        if self._algorithm in (ComplexGoalAlgorithm.ALL_ACCOMPLISHED_ORDERED,
+                               ComplexGoalAlgorithm.EXACTLY_X_ACCOMPLISHED_ORDERED):
+            await self.run_seq_async()
+        else:
+            await self.run_concurrent_async()
 
+        self.calc_result()
+        self._log_finish()
+
+    def _log_start(self):
+        self.log_debug(f'Starting ComplexGoal <{self._name}>:\n'
+                       f"Parameters:\n"
+                       f"  Algorithm: {self._algorithm.name}\n"
+                       f"  X-Accomplished: {self._x_accomplished}\n"
+                       f"  Max Duration: {self._max_duration}\n"
+                       f"  Min Duration: {self._min_duration}\n"
+                       f"Internal Goals: {[f'{g.__class__.__name__}:{g.name}' for g in self._goals]}")
+
+    def _log_finish(self):
         self.log_debug(
             f'Finished ComplexGoal <{self.__class__.__name__}:{self._name}>\n'
             f'  Mode {self._algorithm.name}\n'
@@ -108,49 +166,165 @@ class ComplexGoal(Goal):
         )
 
     def run_seq(self):
-        for g in self._goals:
+        n_completed = 0
+        for n_finished, g in enumerate(self._goals, start=1):
             g.enter()
             if self._max_duration is not None and self.get_current_elapsed() > self._max_duration:
                 self.set_state(GoalState.FAILED)
                 break
+            n_completed += 1 if g.state == GoalState.COMPLETED else 0
+            if self._verdict_decided(n_completed, n_finished):
+                self.log_debug(f"ComplexGoal <{self._name}> verdict decided after goal <{g.name}>")
+                break
 
     def run_concurrent(self):
         """
-        Executes the 'enter' method of each goal in self._goals concurrently using a thread pool.
+        Executes the 'enter' method of each goal in self._goals concurrently.
 
-        This method creates a thread pool with a number of threads equal to the number of goals.
-        Each goal's 'enter' method is submitted to the thread pool for execution. The results
-        of the 'enter' methods are collected and returned once all threads have completed.
+        The goals are submitted as one batch to the process-wide goal executor
+        (`goalee.executor`), which reuses a bounded pool of worker threads. While
+        waiting, the calling thread runs children that no worker has picked up yet,
+        so nested complex goals cannot deadlock when the thread budget is exhausted.
 
         If a TimeoutError occurs during the execution, it is caught and ignored.
 
-        The thread pool is shut down after all tasks are completed or if an exception occurs.
+        Children that are still running when this method returns are terminated and
+        waited for, so they never outlive their parent.
         """
-        n_threads = len(self._goals)
-        futures = []
-        executor = ThreadPoolExecutor(n_threads)
-        for goal in self._goals:
-            future = executor.submit(goal.enter)
-            futures.append(future)
+        self._children_closed = False
+        batch = get_goal_executor().batch(
+            [functools.partial(self._enter_child, goal) for goal in self._goals])
+        n_completed = n_finished = 0
         try:
-            for f in as_completed(futures, timeout=self._max_duration):
+            for f in batch.as_completed(timeout=self._children_timeout()):
+                n_finished += 1
                 try:
                     goal = f.result()
-                    if goal.state == GoalState.COMPLETED and \
-                        self._algorithm == ComplexGoalAlgorithm.AT_LEAST_ONE_ACCOMPLISHED:
-                        self.log_debug(f"Goal <ComplexGoal:{goal.name}> reached at least one accomplished")
-                        self.terminate_all_goals()
-                        break
+                    n_completed += 1 if goal.state == GoalState.COMPLETED else 0
                 except Exception as e:
                     self.log_error(f"Error in goal execution: {e}")
+                if self._verdict_decided(n_completed, n_finished):
+                    self.log_debug(f"ComplexGoal <{self._name}> verdict decided, terminating remaining goals")
+                    self.terminate_all_goals()
+                    break
         except TimeoutError:
             pass
-        executor.shutdown(wait=False, cancel_futures=True)
+        self._children_closed = True
+        batch.cancel_pending()
+        while True:
+            # A child terminated while a worker was entering it is set back to
+            # RUNNING by enter(), terminate it again until every child exited
+            self.terminate_all_goals()
+            try:
+                batch.wait(timeout=GoalBatch.HELP_INTERVAL)
+                break
+            except TimeoutError:
+                pass
+
+    def _enter_child(self, goal: Goal) -> Goal:
+        # Children not entered yet once the verdict is decided are left as they are
+        if self._children_closed:
+            return goal
+        return goal.enter()
+
+    async def run_seq_async(self):
+        n_completed = 0
+        for n_finished, g in enumerate(self._goals, start=1):
+            await g.enter_async()
+            if self._max_duration is not None and self.get_current_elapsed() > self._max_duration:
+                self.set_state(GoalState.FAILED)
+                break
+            n_completed += 1 if g.state == GoalState.COMPLETED else 0
+            if self._verdict_decided(n_completed, n_finished):
+                self.log_debug(f"ComplexGoal <{self._name}> verdict decided after goal <{g.name}>")
+                break
+
+    async def run_concurrent_async(self):
+        """
+        Coroutine counterpart of `run_concurrent`.
+
+        The 'enter_async' coroutine of each goal is scheduled as a task on the running
+        event loop, so nested complex goals do not create any threads.
+        """
+        clock = get_clock()
+        parent = clock.owner()
+        tasks = []
+        self._children_closed = False
+        for goal in self._goals:
+            clock.begin_spawn()
+            tasks.append(asyncio.ensure_future(self._enter_child_async(goal, parent)))
+        timeout = self._children_timeout()
+        ts_end = None if timeout is None else clock.monotonic() + timeout
+        pending = set(tasks)
+        n_completed = n_finished = 0
+        while len(pending) > 0:
+            done = {t for t in pending if t.done()}
+            if len(done) == 0:
+                remaining = None if ts_end is None else ts_end - clock.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                # Children wake us up when they exit (see _enter_child_async)
+                clock.idle()
+                done, _ = await asyncio.wait(pending, timeout=remaining,
+                                             return_when=asyncio.FIRST_COMPLETED)
+            decided = False
+            for t in done:
+                pending.discard(t)
+                n_finished += 1
+                try:
+                    goal = t.result()
+                    n_completed += 1 if goal.state == GoalState.COMPLETED else 0
+                except Exception as e:
+                    self.log_error(f"Error in goal execution: {e}")
+                decided = decided or self._verdict_decided(n_completed, n_finished)
+            if decided:
+                self.log_debug(f"ComplexGoal <{self._name}> verdict decided, terminating remaining goals")
+                break
+        self._children_closed = True
+        self.terminate_all_goals()
+        if len(pending) > 0:
+            clock.idle()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _enter_child_async(self, goal: Goal, parent):
+        clock = get_clock()
+        clock.end_spawn()
+        try:
+            # Tasks that have not started yet when the verdict is decided never enter
+            if self._children_closed:
+                return goal
+            return await goal.enter_async()
+        finally:
+            # Wake up the parent waiting for its children
+            clock.handover(parent)
 
     def terminate(self):
         self.terminate_all_goals()
         return super().terminate()
 
+    def _verdict_decided(self, n_completed: int, n_finished: int) -> bool:
+        """
+        Returns True once the result of the complex goal can no longer change,
+        given the number of finished children and how many of them completed.
+        """
+        n_failed = n_finished - n_completed
+        n_pending = len(self._goals) - n_finished
+        if self._algorithm in (ComplexGoalAlgorithm.ALL_ACCOMPLISHED,
+                               ComplexGoalAlgorithm.ALL_ACCOMPLISHED_ORDERED):
+            return n_failed > 0
+        elif self._algorithm == ComplexGoalAlgorithm.NONE_ACCOMPLISHED:
+            return n_completed > 0
+        elif self._algorithm == ComplexGoalAlgorithm.AT_LEAST_ONE_ACCOMPLISHED:
+            return n_completed > 0
+        elif self._algorithm in (ComplexGoalAlgorithm.EXACTLY_X_ACCOMPLISHED,
+                                 ComplexGoalAlgorithm.EXACTLY_X_ACCOMPLISHED_ORDERED):
+            if self._x_accomplished is None:
+                # No target given, decided by calc_result() once all goals finish
+                return False
+            return n_completed > self._x_accomplished or \
+                n_completed + n_pending < self._x_accomplished
+        return False
+
     def terminate_all_goals(self):
         for goal in self._goals:
             if goal.state not in (GoalState.COMPLETED, GoalState.FAILED, GoalState.TERMINATED):
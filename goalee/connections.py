@@ -0,0 +1,317 @@
+import asyncio
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from commlib.node import Node, NodeState
+
+from goalee.brokers import Broker
+from goalee.definitions import GOAL_FAST_INGEST, GOAL_SHARED_CONNECTIONS
+from goalee.router import TopicRouter
+
+
+def broker_key(broker: Broker) -> str:
+    """Returns a key that identifies the connection configuration of a broker."""
+    return f"{broker.__class__.__name__}:{broker.model_dump_json()}"
+
+
+def connection_params(broker: Broker, **kwargs):
+    """Returns the commlib connection parameters of a broker."""
+    if broker.__class__.__name__ == 'RedisBroker':
+        from commlib.transports.redis import ConnectionParameters
+        return ConnectionParameters(
+            host=broker.host,
+            port=broker.port,
+            db=broker.db,
+            username=broker.username,
+            password=broker.password,
+            **kwargs
+        )
+    elif broker.__class__.__name__ == 'AMQPBroker':
+        from commlib.transports.amqp import ConnectionParameters
+        return ConnectionParameters(
+            host=broker.host,
+            port=broker.port,
+            vhost=broker.vhost,
+            username=broker.username,
+            password=broker.password,
+            **kwargs
+        )
+    elif broker.__class__.__name__ == 'MQTTBroker':
+        from commlib.transports.mqtt import ConnectionParameters
+        return ConnectionParameters(
+            host=broker.host,
+            port=broker.port,
+            username=broker.username,
+            password=broker.password,
+            **kwargs
+        )
+    raise ValueError('Invalid broker type')
+
+
+def run_endpoint(endpoint: Any) -> None:
+    """
+    Runs a commlib node or endpoint without blocking until it is connected.
+    Readiness is checked separately (see `node_connected`, `subscription_active`).
+    """
+    try:
+        endpoint.run(wait=False)
+    except TypeError:
+        # commlib versions without the wait argument
+        endpoint.run()
+
+
+class BrokerConnection:
+    """
+    Communication node shared by everything that talks to one broker: the
+    entities, the scenarios and their RTMonitor.
+
+    Subscriptions go through a `TopicRouter`: each topic, or topic pattern added
+    with `add_pattern`, has a single subscriber, and its messages are dispatched
+    to every entity listening to it. The number of subscribers therefore depends
+    on the topics, not on the entities.
+
+    With raw set (GOAL_FAST_INGEST by default), messages are received as raw
+    bytes and decoded once, with the fastest JSON library installed (see
+    `goalee.ingest`).
+    """
+
+    def __init__(self, broker: Broker, name: Optional[str] = None,
+                 raw: Optional[bool] = None):
+        self._broker = broker
+        name = name or f'goalee_{broker.__class__.__name__.lower()}_{uuid.uuid4().hex[:8]}'
+        self._node = Node(node_name=name,
+                          connection_params=connection_params(broker),
+                          debug=False, heartbeats=False)
+        self._router = TopicRouter(self._node, run_endpoint, lambda: self.running,
+                                   raw=GOAL_FAST_INGEST if raw is None else raw)
+        self._lock = threading.Lock()
+
+    @property
+    def broker(self) -> Broker:
+        return self._broker
+
+    @property
+    def node(self) -> Node:
+        return self._node
+
+    @property
+    def router(self) -> TopicRouter:
+        return self._router
+
+    @property
+    def running(self) -> bool:
+        return self._node.state == NodeState.RUNNING
+
+    @property
+    def topics(self) -> List[str]:
+        """Topics and patterns with a subscriber."""
+        return self._router.topics
+
+    def run(self) -> None:
+        """Starts the node, and with it the subscribers created so far."""
+        with self._lock:
+            if not self.running:
+                run_endpoint(self._node)
+
+    def subscribe(self, topic: str, callback: Callable[[Dict[str, Any]], None]) -> Any:
+        """
+        Subscribes callback to the messages of a topic, or of a topic pattern.
+        The subscriber is started right away if the node is already running.
+
+        Returns:
+            The commlib subscriber delivering the messages of the topic.
+        """
+        return self._router.subscribe(topic, callback)
+
+    def unsubscribe(self, topic: str, callback: Callable) -> None:
+        """Removes a callback. The subscriber of the topic is stopped with its last callback."""
+        self._router.unsubscribe(topic, callback)
+
+    def add_pattern(self, pattern: str) -> Any:
+        """
+        Subscribes once to every topic matching pattern (e.g. `robots.*.pose`),
+        to feed all the entities listening to these topics.
+        """
+        return self._router.add_pattern(pattern)
+
+    def remove_pattern(self, pattern: str) -> None:
+        self._router.remove_pattern(pattern)
+
+    def stop(self) -> None:
+        self._router.clear()
+        self._node.stop()
+
+
+class NodePool:
+    """
+    Process-wide pool of broker connections, one per broker configuration.
+
+    Entities and scenarios on the same broker share a connection (see
+    `BrokerConnection`). Each of them takes a reference on it with `acquire`
+    and drops it with `release`; the connection is stopped with its last
+    reference. With keep_idle set (see `set_keep_idle`), connections without
+    references are kept open instead, and reused by the scenarios that run one
+    after the other in the same process (e.g. by the batch runner).
+    """
+
+    def __init__(self):
+        self._connections: Dict[str, BrokerConnection] = {}
+        self._refs: Dict[str, int] = {}
+        self._keep_idle = False
+        self._lock = threading.Lock()
+
+    def set_keep_idle(self, keep_idle: bool) -> None:
+        """Keeps the connections released by everyone open until `clear`."""
+        self._keep_idle = keep_idle
+
+    def _get(self, key: str, broker: Broker) -> BrokerConnection:
+        conn = self._connections.get(key)
+        if conn is None:
+            conn = BrokerConnection(broker)
+            self._connections[key] = conn
+        return conn
+
+    def get_connection(self, broker: Broker) -> BrokerConnection:
+        """Returns the connection of a broker, created on first use, without taking a reference."""
+        key = broker_key(broker)
+        with self._lock:
+            return self._get(key, broker)
+
+    def get_node(self, broker: Broker) -> Node:
+        return self.get_connection(broker).node
+
+    def acquire(self, broker: Broker) -> BrokerConnection:
+        """
+        Returns the connection of a broker, created on first use, and takes a
+        reference on it. Every call must be matched by a call to `release`.
+        """
+        key = broker_key(broker)
+        with self._lock:
+            conn = self._get(key, broker)
+            self._refs[key] = self._refs.get(key, 0) + 1
+            return conn
+
+    def release(self, broker: Broker) -> None:
+        """
+        Drops a reference taken by `acquire`. The last one stops the connection
+        and removes it from the pool, unless idle connections are kept.
+        """
+        key = broker_key(broker)
+        with self._lock:
+            if key not in self._refs:
+                return
+            self._refs[key] -= 1
+            if self._refs[key] > 0:
+                return
+            del self._refs[key]
+            if self._keep_idle:
+                return
+            conn = self._connections.pop(key, None)
+        if conn is not None:
+            conn.stop()
+
+    def refcount(self, broker: Broker) -> int:
+        """Number of references taken on the connection of a broker."""
+        return self._refs.get(broker_key(broker), 0)
+
+    def __len__(self):
+        return len(self._connections)
+
+    def clear(self, stop: bool = True) -> None:
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections = {}
+            self._refs = {}
+        if stop:
+            for conn in connections:
+                conn.stop()
+
+
+_node_pool = NodePool()
+_shared_nodes_enabled = GOAL_SHARED_CONNECTIONS
+
+
+def get_node_pool() -> NodePool:
+    return _node_pool
+
+
+def enable_shared_nodes(enabled: bool = True) -> None:
+    """
+    Enables or disables sharing of broker connections (see `BrokerConnection`)
+    by entities and scenarios. A shared node is stopped when the last entity or
+    scenario using it is stopped or closed.
+    Disabled by default, unless GOAL_SHARED_CONNECTIONS=1.
+    """
+    global _shared_nodes_enabled
+    _shared_nodes_enabled = enabled
+
+
+def shared_nodes_enabled() -> bool:
+    return _shared_nodes_enabled
+
+
+# Interval at which readiness conditions are polled, in seconds
+READY_POLL_INTERVAL = 0.005
+
+
+def wait_until(predicate: Callable[[], bool], timeout: Optional[float] = None) -> bool:
+    """
+    Polls predicate until it returns True or timeout seconds have passed.
+    Readiness of broker connections is measured in real time, whatever the clock.
+
+    Returns:
+        bool: The last value of predicate.
+    """
+    ts_end = None if timeout is None else time.monotonic() + timeout
+    while not predicate():
+        if ts_end is not None and time.monotonic() >= ts_end:
+            return predicate()
+        time.sleep(READY_POLL_INTERVAL)
+    return True
+
+
+async def wait_until_async(predicate: Callable[[], bool],
+                           timeout: Optional[float] = None) -> bool:
+    """Coroutine counterpart of `wait_until`."""
+    ts_end = None if timeout is None else time.monotonic() + timeout
+    while not predicate():
+        if ts_end is not None and time.monotonic() >= ts_end:
+            return predicate()
+        await asyncio.sleep(READY_POLL_INTERVAL)
+    return True
+
+
+def node_connected(node: Node) -> bool:
+    """True once every endpoint of a communication node is connected to its broker."""
+    try:
+        if not hasattr(node, 'endpoints'):
+            return node.health
+        return all(e.connected for e in node.endpoints)
+    except Exception:
+        return False
+
+
+def subscription_active(subscriber: Any) -> bool:
+    """
+    True once a commlib subscriber is connected and has subscribed to its topic.
+
+    The Redis and MQTT transports record their subscriptions, the AMQP subscriber
+    has a queue once it is bound to its topic. For other transports, a connected
+    subscriber is considered subscribed.
+    """
+    transport = getattr(subscriber, '_transport', None)
+    if transport is None:
+        return False
+    try:
+        if not transport.is_connected:
+            return False
+    except Exception:
+        return False
+    subscriptions = getattr(transport, '_subscriptions', None)
+    if isinstance(subscriptions, dict):
+        return len(subscriptions) > 0
+    if hasattr(subscriber, '_queue_name'):
+        return subscriber._queue_name not in (None, '')
+    return True
@@ -3,3 +3,17 @@ import os
 ZERO_LOGS = int(os.getenv('GOALDSL_ZERO_LOGS', 0))
 LOG_LEVEL = os.getenv("GOALDSL_LOG_LEVEL", "INFO")
 GOAL_TICK_FREQ_HZ = int(os.getenv("GOAL_TICK_FREQ_HZ", 10))
+GOAL_EVENT_DRIVEN = bool(int(os.getenv("GOAL_EVENT_DRIVEN", 0)))
+GOAL_TRACK_DEPENDENCIES = bool(int(os.getenv("GOAL_TRACK_DEPENDENCIES", 0)))
+GOAL_EXECUTOR_MAX_WORKERS = int(os.getenv("GOAL_EXECUTOR_MAX_WORKERS", 128))
+GOAL_NODE_READY_TIMEOUT = float(os.getenv("GOAL_NODE_READY_TIMEOUT", 5.0))
+GOAL_ENTITY_READY_TIMEOUT = float(os.getenv("GOAL_ENTITY_READY_TIMEOUT", 5.0))
+GOAL_SHUTDOWN_LINGER = float(os.getenv("GOAL_SHUTDOWN_LINGER", 0.1))
+GOAL_SHARED_CONNECTIONS = bool(int(os.getenv("GOAL_SHARED_CONNECTIONS", 0)))
+GOAL_BUFFER_BACKEND = os.getenv("GOAL_BUFFER_BACKEND", "deque")
+GOAL_UPDATE_QUEUE_SIZE = int(os.getenv("GOAL_UPDATE_QUEUE_SIZE", 0))
+GOAL_UPDATE_QUEUE_OVERFLOW = os.getenv("GOAL_UPDATE_QUEUE_OVERFLOW", "drop_oldest")
+GOAL_FAST_INGEST = bool(int(os.getenv("GOAL_FAST_INGEST", 0)))
+GOAL_INGEST_POLICY = os.getenv("GOAL_INGEST_POLICY", "all")
+GOAL_INGEST_RATE_HZ = float(os.getenv("GOAL_INGEST_RATE_HZ", 0)) or None
+GOAL_HISTORY_DIR = os.getenv("GOAL_HISTORY_DIR") or None
@@ -1,8 +1,64 @@
+import os
+import threading
 from collections import deque
-from typing import Any, Dict, List
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
 from commlib.node import Node
+from goalee.buffers import BUFFER_BACKENDS, RingBuffer, TimeWindow
+from goalee.clock import get_clock
+from goalee.connections import (connection_params, get_node_pool, shared_nodes_enabled,
+                                subscription_active, wait_until, wait_until_async)
+from goalee.definitions import (GOAL_BUFFER_BACKEND, GOAL_ENTITY_READY_TIMEOUT, GOAL_FAST_INGEST,
+                                GOAL_HISTORY_DIR, GOAL_INGEST_POLICY, GOAL_INGEST_RATE_HZ)
+from goalee.history import HistoryFile
+from goalee.ingest import IngestPolicy, RawSerializer, decode
 from goalee.logging import default_logger as logger
+from goalee.rolling import RollingStats
+from goalee.schema import PATH_SEPARATOR, Schema, SchemaError, compile_schema, get_path
+
+
+class EntitySnapshot:
+    """
+    Immutable state of an entity after one of its updates.
+
+    Entities publish a new snapshot on every accepted update by swapping a
+    single reference, so a snapshot read once gives a consistent view of all
+    the attributes even while the transport thread updates the entity.
+    `version` only changes when the value of an attribute changes, so readers
+    can compare versions instead of diffing attributes.
+
+    Everything else, e.g. `get_buffer`, is read from the live entity.
+    """
+
+    __slots__ = ('entity', 'name', 'version', 'attributes', 'state', 'ts')
+
+    def __init__(self, entity: 'Entity', version: int,
+                 attributes: Mapping[str, Any],
+                 state: Optional[Mapping[str, Any]] = None,
+                 ts: float = -1.0):
+        self.entity = entity
+        self.name = entity.name
+        self.version = version
+        self.attributes = attributes
+        self.state = state
+        self.ts = ts
+
+    def __getitem__(self, key):
+        return self.attributes[key]
+
+    def get_attr(self, attr_name: str) -> Any:
+        """Returns an attribute, or the value at a dotted path of the attributes."""
+        attributes = self.attributes
+        if attr_name in attributes or PATH_SEPARATOR not in attr_name:
+            return attributes[attr_name]
+        return get_path(attributes, attr_name)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.entity, name)
+
+    def __repr__(self) -> str:
+        return f'EntitySnapshot({self.name}, version={self.version}, attributes={dict(self.attributes)})'
 
 
 # A class representing an entity communicating via an MQTT broker on a specific topic
@@ -13,8 +69,16 @@ class Entity:
                  attributes: List[str],
                  source=None,
                  init_buffers: bool = False,
-                 buffer_length: int = 10,
-                 strict_mode: bool = False) -> None:
+                 buffer_length: Optional[int] = None,
+                 strict_mode: bool = False,
+                 buffer_backend: Optional[str] = None,
+                 schema: Optional[Any] = None,
+                 fast_ingest: Optional[bool] = None,
+                 ingest_policy: Optional[str] = None,
+                 ingest_rate_hz: Optional[float] = None,
+                 buffer_window: Optional[float] = None,
+                 history_dir: Optional[str] = None,
+                 history_attrs: Optional[List[str]] = None) -> None:
         # Entity name
         self.name = name
         self.camel_name = self.to_camel_case(name)
@@ -22,42 +86,465 @@ class Entity:
         # MQTT topic for Entity
         self.topic = topic
         self._strict = strict_mode
-        # Entity state
-        self.state = None
+        # Attributes extracted from nested message fields (see goalee.schema)
+        self._schema: Optional[Schema] = None
+        # Top-level message keys read by the entity, the only ones accepted in strict mode
+        self._msg_keys = frozenset(attributes)
+        if schema is not None:
+            self._schema = compile_schema(schema)
+            self._msg_keys = self._msg_keys | self._schema.roots
+            attributes = list(attributes) + [n for n in self._schema.names if n not in attributes]
+        # Decode raw messages and keep only the keys read by the entity (see ingest())
+        self.fast_ingest = GOAL_FAST_INGEST if fast_ingest is None else fast_ingest
+        self._msg_keys_seq = tuple(self._msg_keys)
+        # Which incoming messages are processed (see goalee.ingest.IngestPolicy)
+        self._ingest_policy = IngestPolicy(ingest_policy or GOAL_INGEST_POLICY,
+                                           ingest_rate_hz or GOAL_INGEST_RATE_HZ)
+        self._flush_lock = threading.RLock()
+        # Entity state and attributes, published as immutable snapshots
+        self._snapshot = EntitySnapshot(self, 0, MappingProxyType({key: None for key in attributes}))
         # Set Entity's MQTT Broker
         self.source = source
-        # Entity's Attributes
-        self.attributes = {key: None for key in attributes}
-        self.attributes_buff = {attr: None for attr in self.attributes}
+        self.attributes_buff = {attr: None for attr in attributes}
+        # Running aggregates over the window of buffered attributes, created by get_stats()
+        self.attributes_stats: Dict[str, Optional[RollingStats]] = {attr: None for attr in attributes}
+        # Time-based buffers keep the values of the last buffer_window seconds,
+        # and at most the last buffer_length of them if it is given
+        self.buffer_window = buffer_window
+        if buffer_length is None and buffer_window is None:
+            buffer_length = 10
         self.buffer_length = buffer_length
+        # 'deque' for any value, 'array' for numeric attributes (see goalee.buffers.RingBuffer)
+        self.buffer_backend = buffer_backend or GOAL_BUFFER_BACKEND
+        if self.buffer_backend not in BUFFER_BACKENDS:
+            raise ValueError(f'Invalid buffer backend <{self.buffer_backend}>')
         if init_buffers:
-            for attr in self.attributes:
-                self.init_attr_buffer(attr, self.buffer_length)
+            for attr in attributes:
+                self.init_attr_buffer(attr, self.buffer_length, window=self.buffer_window)
         self._initialized = False
         self._started = False
+        self._first_msg = threading.Event()
+        self._connection = None
+        # Callbacks notified after every accepted state update
+        self._listeners = ()
+        # Dependency index: attribute name -> callbacks notified when it changes
+        self._attr_listeners: Dict[str, tuple] = {}
+        # Per-attribute change counters and attributes changed by the last update
+        self._attr_versions = {attr: 0 for attr in attributes}
+        # Full history of numeric attributes, in <history_dir>/<name>.hist (see
+        # goalee.history), recorded while the entity is started
+        self._history: Optional[HistoryFile] = None
+        self._history_path: Optional[str] = None
+        history_dir = history_dir or GOAL_HISTORY_DIR
+        if history_dir is not None:
+            self._history_attrs = tuple(history_attrs or attributes)
+            self._history_path = os.path.join(history_dir, f'{name}.hist')
+        self._changed_attrs: List[str] = []
+        # Message rate statistics
+        self._msg_count = 0
+        self._ts_last_msg = -1.0
+        self._msg_rate = 0.0
 
     @property
     def initialized(self):
         return self._initialized
 
+    @property
+    def snapshot(self) -> EntitySnapshot:
+        """The current state snapshot of the entity."""
+        if self._ingest_policy.has_pending:
+            self.flush()
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Incremented every time the value of an attribute changes."""
+        return self.snapshot.version
+
+    @property
+    def attributes(self) -> Mapping[str, Any]:
+        """
+        Read-only attribute values of the current snapshot.
+
+        Values cannot be assigned in place, e.g. `entity.attributes['x'] = 1`
+        raises a TypeError. Use `update_state`, or assign all the attributes at
+        once (`entity.attributes = {...}`), which publishes a new snapshot.
+        """
+        return self.snapshot.attributes
+
+    @attributes.setter
+    def attributes(self, attributes: Dict[str, Any]):
+        self._publish(dict(attributes), self._snapshot.state, changed=True)
+
+    @property
+    def state(self) -> Optional[Mapping[str, Any]]:
+        """Read-only last accepted message."""
+        return self.snapshot.state
+
+    @state.setter
+    def state(self, state: Optional[Dict[str, Any]]):
+        snapshot = self._snapshot
+        self._snapshot = EntitySnapshot(self, snapshot.version, snapshot.attributes,
+                                        None if state is None else MappingProxyType(dict(state)),
+                                        snapshot.ts)
+
+    def _publish(self, attributes: Dict[str, Any], state: Optional[Mapping[str, Any]],
+                 changed: bool, ts: Optional[float] = None):
+        snapshot = self._snapshot
+        if not isinstance(state, (MappingProxyType, type(None))):
+            # Copied, so that the caller mutating its message does not alter the snapshot
+            state = MappingProxyType(dict(state))
+        self._snapshot = EntitySnapshot(
+            self,
+            snapshot.version + 1 if changed else snapshot.version,
+            MappingProxyType(attributes) if changed else snapshot.attributes,
+            state,
+            snapshot.ts if ts is None else ts)
+
+    @property
+    def ready(self) -> bool:
+        """True once the entity is started and subscribed to its topic."""
+        if self._connection is not None:
+            # The subscriber of a shared topic may be replaced by a pattern subscriber
+            subscriber = self._connection.router.subscriber(self.topic)
+        else:
+            subscriber = getattr(self, 'subscriber', None)
+        return self._started and subscriber is not None and subscription_active(subscriber)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until the subscription of the entity is active.
+
+        Args:
+            timeout: Maximum time to wait in seconds. Defaults to GOAL_ENTITY_READY_TIMEOUT.
+
+        Returns:
+            bool: True if the entity is ready.
+        """
+        timeout = GOAL_ENTITY_READY_TIMEOUT if timeout is None else timeout
+        return wait_until(lambda: self.ready, timeout)
+
+    def wait_first_message(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until the entity receives its first state update.
+
+        Returns:
+            bool: True if a state update has been received.
+        """
+        return self._first_msg.wait(timeout)
+
+    async def wait_ready_async(self, timeout: Optional[float] = None) -> bool:
+        """Coroutine counterpart of `wait_ready`."""
+        timeout = GOAL_ENTITY_READY_TIMEOUT if timeout is None else timeout
+        return await wait_until_async(lambda: self.ready, timeout)
+
+    async def wait_first_message_async(self, timeout: Optional[float] = None) -> bool:
+        """Coroutine counterpart of `wait_first_message`."""
+        return await wait_until_async(self._first_msg.is_set, timeout)
+
+    @property
+    def msg_count(self) -> int:
+        """Number of accepted state updates."""
+        return self._msg_count
+
+    @property
+    def ts_last_msg(self) -> float:
+        """Monotonic timestamp of the last accepted state update, -1 if none."""
+        return self._ts_last_msg
+
+    @property
+    def msg_rate(self) -> float:
+        """
+        Observed message rate in Hz (exponential moving average). The rate decays
+        when no message has been received for longer than the average period.
+        """
+        if self._ts_last_msg < 0:
+            return 0.0
+        silence = get_clock().monotonic() - self._ts_last_msg
+        if silence > 0:
+            return min(self._msg_rate, 1.0 / silence)
+        return self._msg_rate
+
+    def _update_msg_rate(self):
+        now = get_clock().monotonic()
+        if self._ts_last_msg > 0:
+            dt = now - self._ts_last_msg
+            if dt > 0:
+                rate = 1.0 / dt
+                self._msg_rate = rate if self._msg_rate == 0 else \
+                    0.2 * rate + 0.8 * self._msg_rate
+        self._ts_last_msg = now
+        self._msg_count += 1
+        if not self._first_msg.is_set():
+            self._first_msg.set()
+
+    @property
+    def changed_attributes(self) -> List[str]:
+        """Attributes whose value changed with the last accepted state update."""
+        return self._changed_attrs
+
+    def attr_version(self, attr_name: str) -> int:
+        """Number of times the value of an attribute has changed."""
+        return self._attr_versions[attr_name]
+
+    def attr_key(self, attr_name: str) -> str:
+        """
+        Returns the attribute which holds attr_name: attr_name itself, or the
+        top-level attribute of a dotted path. Changes are published, and
+        listeners notified, under this name.
+        """
+        if attr_name in self._attr_versions or PATH_SEPARATOR not in attr_name:
+            return attr_name
+        return attr_name.split(PATH_SEPARATOR, 1)[0]
+
+    def add_listener(self, callback: Callable,
+                     attributes: Optional[Iterable[str]] = None) -> None:
+        """
+        Registers a callback to be notified when the entity state is updated.
+
+        The callback is called from the transport thread with the entity as its
+        only argument, so it should return quickly.
+
+        Args:
+            callback: The callback.
+            attributes: If given, the callback is only notified when the value of
+                one of these attributes changes. Otherwise it is notified on every
+                state update.
+        """
+        if attributes is None:
+            if callback not in self._listeners:
+                self._listeners = self._listeners + (callback,)
+            return
+        for attr in attributes:
+            listeners = self._attr_listeners.get(attr, ())
+            if callback not in listeners:
+                self._attr_listeners[attr] = listeners + (callback,)
+
+    def remove_listener(self, callback: Callable) -> None:
+        self._listeners = tuple(c for c in self._listeners if c != callback)
+        for attr, listeners in list(self._attr_listeners.items()):
+            if callback in listeners:
+                listeners = tuple(c for c in listeners if c != callback)
+                if len(listeners) > 0:
+                    self._attr_listeners[attr] = listeners
+                else:
+                    self._attr_listeners.pop(attr, None)
+
+    def notify_listeners(self, changed: Optional[Iterable[str]] = None) -> None:
+        """
+        Notifies the listeners of a state update. Attribute listeners are only
+        notified if one of their attributes is in changed.
+        """
+        callbacks = list(self._listeners)
+        if changed and self._attr_listeners:
+            for attr in changed:
+                for callback in self._attr_listeners.get(attr, ()):
+                    if callback not in callbacks:
+                        callbacks.append(callback)
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"Entity <{self.name}> listener error: {e}")
+
     def __getitem__(self, key):
         # Allow dictionary-style access to attributes
         # return getattr(self, key)
         return self.attributes[key]
 
     def get_buffer(self, attr_name: str, size: int = None):
-        size = size if size is not None else self.attributes_buff[attr_name].maxlen
-        if len(self.attributes_buff[attr_name]) != \
-            self.attributes_buff[attr_name].maxlen:
+        """
+        Returns the last size values of a buffered attribute, oldest first, or
+        size zeros until the buffer is full.
+
+        With the array backend, the values are a memoryview of the buffer,
+        which is only valid until the next state update. Time-based buffers
+        return the values in their window, up to size, and are never padded.
+        """
+        if self._ingest_policy.has_pending:
+            self.flush()
+        buff = self.attributes_buff[attr_name]
+        if isinstance(buff, TimeWindow):
+            return self.get_window(attr_name, size=size)
+        size = size if size is not None else buff.maxlen
+        if isinstance(buff, RingBuffer):
+            return buff.view(size) if buff.full else buff.zeros(size)
+        if len(buff) != buff.maxlen:
             buffer = [0] * size
         else:
-            buffer = list(self.attributes_buff[attr_name])[-size:]
+            buffer = list(buff)[-size:]
         return buffer
 
+    def get_buffer_timestamps(self, attr_name: str, size: int = None):
+        """
+        Returns the monotonic timestamps of the last size values of an attribute
+        buffered with the array backend or a time window.
+        """
+        if self._ingest_policy.has_pending:
+            self.flush()
+        buff = self.attributes_buff[attr_name]
+        if isinstance(buff, TimeWindow):
+            now = get_clock().monotonic()
+            buff.evict(now)
+            return buff.timestamps(n=size, now=now)
+        if not isinstance(buff, RingBuffer):
+            raise ValueError(f'Attribute <{attr_name}> of entity <{self.name}> '
+                             f'has no timestamped buffer')
+        return buff.timestamps(size)
+
+    def get_stats(self, attr_name: str) -> RollingStats:
+        """
+        Returns the running mean, variance, min and max over the values in the
+        buffer of a numeric attribute, each read in O(1).
+
+        The aggregates are created on the first call, from the values in the
+        buffer, and then updated with every value. Unlike get_buffer, they
+        cover the values received so far while the buffer is not full.
+
+        Raises:
+            ValueError: If the attribute is not buffered or not numeric.
+        """
+        if self._ingest_policy.has_pending:
+            self.flush()
+        buff = self.attributes_buff[attr_name]
+        if isinstance(buff, TimeWindow):
+            buff.evict(get_clock().monotonic())
+            stats = buff.stats
+        elif buff is not None:
+            stats = self.attributes_stats[attr_name]
+            if stats is None:
+                stats = self._init_stats(attr_name, buff)
+        else:
+            stats = None
+        if stats is None:
+            raise ValueError(f'Attribute <{attr_name}> of entity <{self.name}> '
+                             f'has no rolling statistics')
+        return stats
+
+    def _init_stats(self, attr_name: str, buff: Any) -> Optional[RollingStats]:
+        stats = RollingStats(buff.maxlen)
+        try:
+            for value in buff:
+                stats.append(value)
+        except (TypeError, ValueError):
+            # Non-numeric attribute
+            return None
+        self.attributes_stats[attr_name] = stats
+        return stats
+
+    def _time_window(self, attr_name: str) -> TimeWindow:
+        if self._ingest_policy.has_pending:
+            self.flush()
+        buff = self.attributes_buff[attr_name]
+        if not isinstance(buff, TimeWindow):
+            raise ValueError(f'Attribute <{attr_name}> of entity <{self.name}> '
+                             f'has no time-based buffer')
+        return buff
+
+    def get_window(self, attr_name: str, seconds: Optional[float] = None,
+                   size: Optional[int] = None) -> List[Any]:
+        """
+        Returns the values of a time-buffered attribute received in the last
+        seconds (the whole window by default), oldest first, at most the last
+        size of them.
+        """
+        buff = self._time_window(attr_name)
+        now = get_clock().monotonic()
+        buff.evict(now)
+        return buff.values(seconds, size, now)
+
+    def get_range(self, attr_name: str, t_start: float,
+                  t_end: Optional[float] = None) -> Tuple[List[float], List[Any]]:
+        """
+        Returns the timestamps and values of a time-buffered attribute received
+        between the monotonic times t_start and t_end (now by default).
+        """
+        buff = self._time_window(attr_name)
+        now = get_clock().monotonic()
+        buff.evict(now)
+        return buff.range(t_start, now if t_end is None else t_end)
+
+    @property
+    def history(self) -> Optional[HistoryFile]:
+        return self._history
+
+    def _history_file(self) -> HistoryFile:
+        if self._ingest_policy.has_pending:
+            self.flush()
+        if self._history is None:
+            if self._history_path is None:
+                raise ValueError(f'Entity <{self.name}> does not record its history')
+            raise ValueError(f'History of entity <{self.name}> is not open, '
+                             f'start the entity or call open_history()')
+        return self._history
+
+    def get_history(self, attr_name: str, seconds: Optional[float] = None,
+                    size: Optional[int] = None) -> memoryview:
+        """
+        Returns the recorded values of an attribute in the last seconds (the
+        whole history by default), oldest first, at most the last size of them.
+
+        The values are a read-only view of the history file, not a copy.
+        Timestamps of the history are wall-clock times (clock.time()).
+        """
+        return self._history_file().window(attr_name, seconds, size, get_clock().time())
+
+    def get_history_range(self, attr_name: str, t_start: float,
+                          t_end: Optional[float] = None) -> Tuple[memoryview, memoryview]:
+        """
+        Returns the timestamps and values of an attribute recorded between the
+        wall-clock times t_start and t_end (the last record by default).
+        """
+        return self._history_file().range(attr_name, t_start, t_end)
+
+    def open_history(self) -> Optional[HistoryFile]:
+        """
+        Opens the history file of the entity, resuming the history of a
+        previous run. Called by `start`.
+
+        Raises:
+            ValueError: If the file is already open, e.g. by another entity
+                with the same name.
+        """
+        if self._history_path is None:
+            return None
+        if self._history is None or self._history.closed:
+            os.makedirs(os.path.dirname(self._history_path) or '.', exist_ok=True)
+            self._history = HistoryFile(self._history_path, self._history_attrs)
+        return self._history
+
+    def close_history(self) -> None:
+        """
+        Closes the history file, called by `stop`. The history recorded so far
+        can still be read.
+        """
+        if self._history is not None:
+            self._history.close()
+
     def get_attr(self, attr_name: str) -> Any:
-        return self.attributes[attr_name]
+        return self.snapshot.get_attr(attr_name)
+
+    @property
+    def schema(self) -> Optional[Schema]:
+        return self._schema
 
-    def init_attr_buffer(self, attr_name, size):
+    def init_attr_buffer(self, attr_name, size, backend: Optional[str] = None,
+                         window: Optional[float] = None):
+        """
+        Creates the buffer of an attribute: the last size values, or with a
+        window, the values of the last window seconds (at most size of them if
+        size is not None).
+        """
+        if window is not None:
+            # Aggregates are kept by the window itself
+            self.attributes_buff[attr_name] = TimeWindow(window, size)
+            self.attributes_stats[attr_name] = None
+            return
+        backend = backend or self.buffer_backend
+        self.attributes_stats[attr_name] = None
+        if backend == 'array':
+            self.attributes_buff[attr_name] = RingBuffer(size)
+            return
         self.attributes_buff[attr_name] = deque(maxlen=size)
         # self.attributes_buff[attr_name].extend([0] * size)
 
@@ -67,112 +554,292 @@ class Entity:
     def create_node(self):
         if self.source is None:
             raise ValueError(f'Entity {self.name} not assigned a broker')
-        if self.source.__class__.__name__ == 'RedisBroker':
-            from commlib.transports.redis import ConnectionParameters
-            conn_params = ConnectionParameters(
-                host=self.source.host,
-                port=self.source.port,
-                db=self.source.db,
-                username=self.source.username,
-                password=self.source.password
-            )
-        elif self.source.__class__.__name__ == 'AMQPBroker':
-            from commlib.transports.amqp import ConnectionParameters
-            conn_params = ConnectionParameters(
-                host=self.source.host,
-                port=self.source.port,
-                vhost=self.source.vhost,
-                username=self.source.username,
-                password=self.source.password
-            )
-        elif self.source.__class__.__name__ == 'MQTTBroker':
-            from commlib.transports.mqtt import ConnectionParameters
-            conn_params = ConnectionParameters(
-                host=self.source.host,
-                port=self.source.port,
-                username=self.source.username,
-                password=self.source.password,
-            )
-        else:
-            raise ValueError('Invalid broker type')
-        self.conn_params = conn_params
-
+        on_message = self.ingest if self.fast_ingest else self.update_state
+        if shared_nodes_enabled():
+            # One node per broker, one subscriber per topic
+            self._connection = get_node_pool().acquire(self.source)
+            self.node = self._connection.node
+            self.subscriber = self._connection.subscribe(self.topic, on_message)
+            return
+        self.conn_params = connection_params(self.source)
         self.node = Node(node_name=self.camel_name,
                          connection_params=self.conn_params,
                          debug=False, heartbeats=False)
+        if self.fast_ingest:
+            # Raw payloads, decoded by ingest()
+            self.subscriber = self.node.create_subscriber(
+                topic=self.topic,
+                on_message=on_message,
+                serializer=RawSerializer
+            )
+            return
         self.subscriber = self.node.create_subscriber(
             topic=self.topic,
-            on_message=self.update_state
+            on_message=on_message
         )
 
-    def start(self):
+    def start(self, wait: bool = True, timeout: Optional[float] = None) -> bool:
         """
         Starts the entity by creating a node, setting up a subscriber to listen to messages on the entity's topic,
         and running the subscriber. Additionally, it creates a publisher for communications on the same topic.
 
         The subscriber will call the `update_state` method whenever a message is received on the topic.
+
+        Args:
+            wait: Wait until the subscription is active (see `wait_ready`).
+            timeout: Maximum time to wait in seconds. Defaults to GOAL_ENTITY_READY_TIMEOUT.
+
+        Returns:
+            bool: True if the entity is ready, or if it was not waited for.
         """
         if self._started:
-            return
+            return not wait or self.wait_ready(timeout)
+        self.open_history()
         self._started = True
         self.create_node()
-        self.node.run()
+        if self._connection is not None:
+            self._connection.run()
+        else:
+            self.node.run()
+        if wait and not self.wait_ready(timeout):
+            logger.warning(f"Entity <{self.name}> not subscribed to topic <{self.topic}> "
+                           f"after {GOAL_ENTITY_READY_TIMEOUT if timeout is None else timeout} seconds")
+            return False
         logger.info(f"Started Entity <{self.name}> listening on topic <{self.topic}>")
+        return True
+
+    def stop(self) -> None:
+        """Stops the communication node of the entity, or only its subscription if the node is shared."""
+        if not self._started:
+            return
+        self._started = False
+        self.close_history()
+        if self._connection is not None:
+            # The node is shared with other entities
+            self._connection.unsubscribe(self.topic, self.ingest if self.fast_ingest
+                                         else self.update_state)
+            self._connection = None
+            get_node_pool().release(self.source)
+            return
+        node = getattr(self, 'node', None)
+        if node is not None:
+            node.stop()
+
+    def reset(self, clear_state: bool = True) -> None:
+        """
+        Clears the attribute buffers and message statistics of the entity, e.g.
+        between two runs of a scenario. The subscription is kept.
+
+        Args:
+            clear_state: Also clear the state and attribute values.
+        """
+        self._ingest_policy.reset()
+        for attr, buff in self.attributes_buff.items():
+            if buff is not None:
+                buff.clear()
+                if self.attributes_stats[attr] is not None:
+                    self.attributes_stats[attr].clear()
+        if clear_state:
+            self.state = None
+            self.attributes = {key: None for key in self.attributes}
+            self._initialized = False
+            self._first_msg.clear()
+        self._changed_attrs = []
+        self._attr_versions = {attr: 0 for attr in self._attr_versions}
+        self._msg_count = 0
+        self._ts_last_msg = -1.0
+        self._msg_rate = 0.0
+
+    @property
+    def ingest_policy(self) -> IngestPolicy:
+        return self._ingest_policy
+
+    @property
+    def ingest_stats(self) -> Dict[str, Any]:
+        """Counters of received, processed, coalesced and dropped messages."""
+        return self._ingest_policy.serialize()
+
+    def set_ingest_policy(self, policy: str, rate_hz: Optional[float] = None) -> None:
+        """
+        Sets which incoming messages are processed: 'all', 'latest' (coalesced,
+        processed when the entity is read) or 'decimate' (at most rate_hz per
+        second). See `goalee.ingest.IngestPolicy`.
+        """
+        self.flush()
+        self._ingest_policy = IngestPolicy(policy, rate_hz)
+
+    def flush(self) -> None:
+        """Processes the message held by the latest ingest policy, if any."""
+        with self._flush_lock:
+            pending = self._ingest_policy.take()
+            if pending is None:
+                return
+            payload, decoded = pending
+            if decoded:
+                self._update_state(payload, count_msg=False)
+            else:
+                self._ingest(payload, count_msg=False)
+
+    def _receive(self, payload: Any, decoded: bool) -> None:
+        policy = self._ingest_policy
+        policy.received += 1
+        if policy.policy == 'decimate':
+            if not policy.admit(get_clock().monotonic()):
+                self._update_msg_rate()
+            elif decoded:
+                self._update_state(payload)
+            else:
+                self._ingest(payload)
+            return
+        first = policy.hold(payload, decoded)
+        self._update_msg_rate()
+        if first:
+            # Wake up the listeners once, they process the message when they read the entity
+            self.notify_listeners(list(self._attr_listeners))
+
+    def ingest(self, payload: Union[bytes, str, Dict[str, Any]]) -> None:
+        """
+        Fast path for incoming messages, used instead of `update_state` as the
+        subscriber callback when fast_ingest is set.
+
+        Raw payloads are decoded with the fastest JSON library available (see
+        `goalee.ingest`), and only the keys read by the entity (its attributes
+        and the roots of its schema) are kept, so the state of the entity does
+        not hold the other fields of the message. In strict mode, the whole
+        message is validated by `update_state`.
+        """
+        if self._ingest_policy.policy != 'all':
+            self._receive(payload, decoded=False)
+            return
+        self._ingest_policy.received += 1
+        self._ingest(payload)
+
+    def _ingest(self, payload: Union[bytes, str, Dict[str, Any]], count_msg: bool = True):
+        try:
+            msg = decode(payload)
+        except ValueError as e:
+            logger.warning(f"Entity <{self.name}> - Dropping invalid message: {e}")
+            return
+        if not self._strict:
+            msg = {k: msg[k] for k in self._msg_keys_seq if k in msg}
+        self._update_state(msg, count_msg)
 
     def update_state(self, new_state: Dict[str, Any]) -> None:
         """
         Function for updating Entity state. Meant to be used as a callback function by the Entity's subscriber object
         (commlib-py).
+
+        The message goes through the ingest policy of the entity, see `set_ingest_policy`.
         :param new_state: Dictionary containing the Entity's state
         :return:
         """
+        if self._ingest_policy.policy != 'all':
+            self._receive(new_state, decoded=True)
+            return
+        self._ingest_policy.received += 1
+        self._update_state(new_state)
+
+    def _update_state(self, new_state: Dict[str, Any], count_msg: bool = True) -> None:
         # Update state
         # logger.info(f'[Entity {self.name}] State Change')
-        state = new_state.copy()
-        for key in state:
-            if key not in self.attributes:
-                # logger.warning(
-                #     f"Entity <{self.name}> state - Message KeyError <{key}>\n"
-                # )
-                if self._strict:
-                    logger.warning(f"Entity <{self.name}> in strict mode - Dropping invalid message")
-                    return
-                else:
-                    continue
+        state = new_state
+        # Unknown keys are ignored, unless in strict mode
+        if self._strict and not self._msg_keys.issuperset(state):
+            logger.warning(f"Entity <{self.name}> in strict mode - Dropping invalid message")
+            return
+        if self._schema is not None:
+            # Validate and flatten the message into the attributes of the schema
+            try:
+                values = self._schema.extract(state, strict=self._strict)
+            except SchemaError as e:
+                logger.warning(f"Entity <{self.name}> in strict mode - Dropping invalid message: {e}")
+                return
+            values = {**state, **values} if len(values) > 0 else state
+        else:
+            values = state
         self._initialized = True
-        self.state = state
-        # Update attributes based on state
-        self.update_attributes(state)
-        self.update_buffers(state)
+        self._ingest_policy.processed += 1
+        # Buffers first, so that they already hold the values of a published snapshot
+        self.update_buffers(values)
+        # Update attributes based on state and publish the new snapshot
+        self.update_attributes(values, state)
+        history = self._history
+        if history is not None:
+            attributes = self._snapshot.attributes
+            history.append(get_clock().time(),
+                           [attributes.get(attr) for attr in self._history_attrs])
+        if count_msg:
+            self._update_msg_rate()
+        self.notify_listeners(self._changed_attrs)
 
     def update_buffers(self, new_state):
         """
         Recursive function used by update_state() mainly to updated
             dictionaries/objects and normal Attributes.
         """
-        # Update attributes
-        state = new_state.copy()
-        for key in state:
-            if self._strict and key not in self.attributes:
-                logger.warning(f"Entity <{self.name}> in strict mode - Dropping invalid message")
-                return
+        # Messages are validated by update_state()
+        state = new_state
+        attributes = self._snapshot.attributes
+        ts = None
         for attribute, value in state.items():
             # If value is a dictionary, also update the Dict's subattributes/items
-            if attribute in self.attributes and self.attributes_buff[attribute] is not None:
-                self.attributes_buff[attribute].append(value)
+            if attribute in attributes and self.attributes_buff[attribute] is not None:
+                buff = self.attributes_buff[attribute]
+                if isinstance(buff, TimeWindow):
+                    ts = get_clock().monotonic() if ts is None else ts
+                    buff.append(value, ts)
+                    continue
+                stats = self.attributes_stats[attribute]
+                if not isinstance(buff, RingBuffer):
+                    buff.append(value)
+                    if stats is not None:
+                        try:
+                            stats.append(value)
+                        except (TypeError, ValueError):
+                            # Out of sync with the buffer, rebuilt by the next get_stats()
+                            self.attributes_stats[attribute] = None
+                    continue
+                ts = get_clock().monotonic() if ts is None else ts
+                try:
+                    buff.append(value, ts)
+                except (TypeError, ValueError):
+                    logger.warning(f"Entity <{self.name}> - Non-numeric value for "
+                                   f"buffered attribute <{attribute}>: {value}")
+                    continue
+                if stats is not None:
+                    stats.append(value)
 
-    def update_attributes(self, new_state):
+    def update_attributes(self, new_state, msg: Optional[Dict[str, Any]] = None):
         """
         Recursive function used by update_state() mainly to updated
             dictionaries/objects and normal Attributes.
+
+        The updated attributes and the message (new_state, unless msg is given)
+        are published together as a new snapshot. Its version is only
+        incremented if an attribute value changed.
         """
         # Update attributes
+        current = self._snapshot.attributes
+        attributes = None
+        changed = []
         for key, value in new_state.items():
             # If value is a dictionary, also update the Dict's subattributes/items
             # if root[attribute].__class__.__name__ == 'TimeAttribute':
             #     setattr(root[attribute].value, 'hour', value['hour'])
             #     setattr(root[attribute].value, 'minute', value['minute'])
             #     setattr(root[attribute].value, 'second', value['second'])
-            if key in self.attributes:
-                self.attributes[key] = value
+            if key in current:
+                if current[key] != value:
+                    if attributes is None:
+                        attributes = dict(current)
+                    attributes[key] = value
+                # Buffered attributes change on every update, even with a repeated value
+                elif self.attributes_buff[key] is None:
+                    continue
+                changed.append(key)
+                self._attr_versions[key] += 1
+        self._changed_attrs = changed
+        self._publish(attributes, new_state if msg is None else msg,
+                      changed=attributes is not None,
+                      ts=get_clock().monotonic())
 
@@ -1,22 +1,76 @@
 from enum import IntEnum
 from typing import Any, Optional, Callable, List
 
+import re
 import statistics
 import math
 
+from goalee.buffers import TimeWindow
 from goalee.goal import Goal, GoalState
 from goalee.entity import Entity
+from goalee.rolling import RollingStats
+
+
+def _rolling(name: str, fallback: Callable) -> Callable:
+    # Reads the running aggregate of RollingStats (Entity.get_stats()) in O(1),
+    # computes it over the values otherwise
+    def aggregate(values, *args, **kwargs):
+        if isinstance(values, RollingStats):
+            value = getattr(values, name)
+            if value is None:
+                # Same error as the statistics module for too few values
+                raise statistics.StatisticsError(
+                    f'{name} requires more values, {values.count} in window')
+            return value
+        return fallback(values, *args, **kwargs)
+    aggregate.__name__ = name
+    return aggregate
 
 
 CONDITION_FUNCTIONS = {
-    'std': statistics.stdev,
-    'var': statistics.variance,
-    'mean': statistics.mean,
-    'min': min,
-    'max': max,
+    'std': _rolling('std', statistics.stdev),
+    'var': _rolling('variance', statistics.variance),
+    'mean': _rolling('mean', statistics.mean),
+    'min': _rolling('min', min),
+    'max': _rolling('max', max),
     'fabs': math.fabs
 }
 
+# Entity references in string conditions, e.g. entities['sonar'].attributes['range'],
+# entities['sonar'].get_buffer('range', 5), entities['sonar'].get_stats('range'),
+# entities['sonar'].get_window('range', 5.0) or entities['sonar']['range']
+_ENTITY_REF_RE = re.compile(r"""entities\s*\[\s*['"]([^'"]+)['"]\s*\]""")
+_ATTR_ACCESS_RE = re.compile(
+    r"""\s*(?:\.attributes\s*\[|\.get_attr\s*\(|\.get_buffer\s*\(|\.get_stats\s*\(|\.get_window\s*\(|\.get_range\s*\(|\.get_history\s*\(|\[)\s*['"]([^'"]+)['"]""")
+
+
+def condition_dependencies(condition: str):
+    """
+    Infers the entity attributes read by a string condition.
+
+    Returns:
+        dict: Maps entity names to the set of attributes read, or to None if
+            the condition accesses the entity in a way other than by attribute name.
+    """
+    deps = {}
+    for ref in _ENTITY_REF_RE.finditer(condition):
+        name = ref.group(1)
+        access = _ATTR_ACCESS_RE.match(condition, ref.end())
+        if access is None:
+            deps[name] = None
+        elif deps.get(name, set()) is not None:
+            deps.setdefault(name, set()).add(access.group(1))
+    return deps
+
+
+# Reads of values selected by time, which change as time passes, without updates
+_TIME_ACCESS_RE = re.compile(r"""\.(?:get_window|get_range|get_history|get_history_range)\s*\(""")
+
+
+def condition_time_dependent(condition: str) -> bool:
+    """True if a string condition reads attribute values over a time window."""
+    return _TIME_ACCESS_RE.search(condition) is not None
+
 
 class EntityStateChange(Goal):
 
@@ -34,7 +88,7 @@ class EntityStateChange(Goal):
                          min_duration=min_duration,
                          for_duration=for_duration)
         self.entity = entity
-        self._last_state = self.entity.attributes.copy()
+        self._last_version = self.entity.version
 
     def on_enter(self):
         self.log_debug(
@@ -46,15 +100,20 @@ class EntityStateChange(Goal):
         )
 
     def tick(self):
-        if self._last_state != self.entity.attributes:
+        snapshot = self.view(self.entity)
+        if snapshot.version != self._last_version:
             if self._for_duration is not None and self._for_duration > 0:
-                self._ts_hold = self.get_current_ts()
+                # Restart the hold phase on every change
+                self.cancel_hold()
+                self.start_hold()
             else:
                 self.set_state(GoalState.COMPLETED)
-        elif self._ts_hold is not None and self._for_duration is not None:
-            if self.get_current_ts() - self._ts_hold > self._for_duration:
-                self.set_state(GoalState.COMPLETED)
-        self._last_state = self.entity.attributes.copy()
+        elif self.hold_expired:
+            self.set_state(GoalState.COMPLETED)
+        self._last_version = snapshot.version
+
+    def on_reset(self):
+        self._last_version = self.entity.version
 
 
 class EntityStateCondition(Goal):
@@ -76,7 +135,33 @@ class EntityStateCondition(Goal):
         self._condition = condition
 
     def get_entities_map(self):
-        return {e.name: e for e in self._entities}
+        return {e.name: self.view(e) for e in self._entities}
+
+    def infer_dependencies(self):
+        if not isinstance(self._condition, str):
+            return {}
+        deps = condition_dependencies(self._condition)
+        if len(deps) == 0:
+            return {}
+        # Entities not referenced by the condition are not read at all
+        return {e.name: deps.get(e.name, ()) for e in self._entities}
+
+    def time_dependent(self):
+        if not isinstance(self._condition, str):
+            return False
+        if condition_time_dependent(self._condition):
+            return True
+        # Buffers over a time window also lose their oldest values as time passes
+        entities = {e.name: e for e in self._entities}
+        for name, attrs in condition_dependencies(self._condition).items():
+            entity = entities.get(name)
+            if entity is None:
+                continue
+            buffs = entity.attributes_buff
+            for attr in (buffs if attrs is None else attrs):
+                if isinstance(buffs.get(attr), TimeWindow):
+                    return True
+        return False
 
     def on_enter(self):
         self.log_debug(
@@ -87,7 +172,7 @@ class EntityStateCondition(Goal):
             f"  Min Duration: {self._min_duration}\n"
             f"  For Duration: {self._for_duration}"
         )
-        self._ts_hold = -1.0
+        self.cancel_hold()
 
     def tick(self):
         """
@@ -110,14 +195,14 @@ class EntityStateCondition(Goal):
                 cond_state = self.evaluate_condition(self.get_entities_map())
             if cond_state:
                 if self._for_duration is not None and self._for_duration > 0:
-                    if self._ts_hold is None or self._ts_hold < 0:
-                        self._ts_hold = self.get_current_ts()
-                    elif self.get_current_ts() - self._ts_hold > self._for_duration:
+                    if not self.holding:
+                        self.start_hold()
+                    elif self.hold_expired:
                         self.set_state(GoalState.COMPLETED)
                 else:
                     self.set_state(GoalState.COMPLETED)
             else:
-                self._ts_hold = -1.0
+                self.cancel_hold()
         except TypeError as e:
             pass
 
@@ -128,7 +213,10 @@ class EntityStateCondition(Goal):
         This method uses the `eval` function to evaluate a condition stored in the
         instance variable `_condition`. The condition can use statistical functions
         such as standard deviation, variance, mean, min, and max, which are provided
-        in the local scope for the evaluation.
+        in the local scope for the evaluation. Given the running aggregates of a
+        buffered attribute, e.g. `std(entities['X'].get_stats('temp'))`, they
+        are read in O(1) instead of being computed over the buffer. The
+        condition is False while the window holds too few values.
 
         Args:
             entities (list): A list of entities to be used in the condition evaluation.
@@ -148,6 +236,9 @@ class EntityStateCondition(Goal):
                 return True
             else:
                 return False
+        except statistics.StatisticsError:
+            # Not enough values in the window yet
+            return False
         except Exception as e:
             if "NoneType" in str(e):
                 pass
@@ -189,9 +280,13 @@ class EntityAttrStream(Goal):
         self._value = value
         self._strategy = strategy
         self._last_state = None
+        self._last_version = None
 
         self._value_check_list = [False] * len(self._value)
 
+    def infer_dependencies(self):
+        return {self._entity.name: (self._attr,)}
+
     def on_enter(self):
         self.log_debug(
             f"Starting EntityAttrStream Goal <{self.name}>:\n"
@@ -203,7 +298,11 @@ class EntityAttrStream(Goal):
         )
 
     def tick(self):
-        _state = self._entity.attributes.copy()
+        snapshot = self.view(self._entity)
+        if snapshot.version == self._last_version:
+            return
+        self._last_version = snapshot.version
+        _state = snapshot.attributes
         if self._last_state is None:
             self._last_state = _state
         elif _state[self._attr] == self._last_state[self._attr]:
@@ -211,7 +310,7 @@ class EntityAttrStream(Goal):
 
         self._last_state = _state
 
-        if self._attr not in self._entity.attributes:
+        if self._attr not in _state:
             raise ValueError(f"Attribute {self._attr} not found in entity {self._entity.name}")
 
         for i, v in enumerate(self._value):
@@ -257,3 +356,8 @@ class EntityAttrStream(Goal):
 
     def reset_check_list(self):
         self._value_check_list = [False] * len(self._value)
+
+    def on_reset(self):
+        self._last_state = None
+        self._last_version = None
+        self.reset_check_list()
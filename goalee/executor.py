@@ -0,0 +1,197 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures._base import TimeoutError
+from typing import Callable, Iterator, List, Optional
+
+from goalee.clock import get_clock
+from goalee.definitions import GOAL_EXECUTOR_MAX_WORKERS
+
+
+class GoalBatch:
+    """
+    A group of tasks submitted together to a GoalExecutor, e.g. the children
+    of a ComplexGoal.
+
+    While waiting for results, if every worker of the executor is busy, the
+    calling thread runs tasks of the batch that no worker has picked up yet.
+    A parent goal blocked on its children therefore never waits for a task that
+    cannot start, which keeps nested complex goals deadlock-free under a bounded
+    thread budget.
+    """
+
+    # Interval at which a waiting caller re-checks whether it should run a task itself
+    HELP_INTERVAL = 0.05
+
+    def __init__(self, executor: 'GoalExecutor', tasks: List[Callable]):
+        self._executor = executor
+        self._tasks = tasks
+        self._cancelled = False
+        # Set when a task exits, to wake up the caller waiting on the batch
+        self._exited = threading.Event()
+        clock = get_clock()
+        self._futures: List[Future] = []
+        for task in tasks:
+            clock.begin_spawn()
+            future = executor.submit(self._run_spawned, task)
+            future.add_done_callback(self._on_done)
+            self._futures.append(future)
+
+    def _run_spawned(self, task: Callable):
+        clock = get_clock()
+        clock.end_spawn()
+        try:
+            return task()
+        finally:
+            clock.notify(self._exited)
+            clock.idle()
+
+    def _on_done(self, future: Future):
+        # Tasks signal their exit before their future is done: a caller that
+        # missed it, while handling another future, is woken again here
+        get_clock().notify(self._exited)
+
+    @property
+    def futures(self) -> List[Future]:
+        return self._futures
+
+    def as_completed(self, timeout: Optional[float] = None) -> Iterator[Future]:
+        """
+        Yields the futures of the batch as they complete.
+
+        Raises:
+            TimeoutError: If the batch is not complete after timeout seconds.
+        """
+        clock = get_clock()
+        ts_end = None if timeout is None else clock.monotonic() + timeout
+        pending = set(range(len(self._futures)))
+        while len(pending) > 0:
+            self._exited.clear()
+            done = [i for i in pending if self._futures[i].done()]
+            if len(done) > 0:
+                for i in done:
+                    pending.discard(i)
+                    yield self._futures[i]
+                continue
+            if self._executor.saturated and self._run_pending_inline(pending):
+                continue
+            remaining = None if ts_end is None else ts_end - clock.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError()
+            if any(not self._futures[i].running() for i in pending):
+                remaining = self.HELP_INTERVAL if remaining is None else \
+                    min(remaining, self.HELP_INTERVAL)
+            if clock.wait(self._exited, remaining):
+                # A task has exited, its future is completed right after
+                wait([self._futures[i] for i in pending], return_when=FIRST_COMPLETED)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        Waits until every task of the batch has either finished or been cancelled.
+
+        Raises:
+            TimeoutError: If the batch is not complete after timeout seconds.
+        """
+        for _ in self.as_completed(timeout):
+            pass
+
+    def cancel_pending(self) -> None:
+        """Cancels the tasks of the batch that have not started yet."""
+        self._cancelled = True
+        for f in self._futures:
+            if f.cancel():
+                get_clock().end_spawn(adopt=False)
+
+    def _run_pending_inline(self, pending) -> bool:
+        if self._cancelled:
+            return False
+        for i in pending:
+            if self._futures[i].cancel():
+                get_clock().end_spawn()
+                future = Future()
+                try:
+                    future.set_result(self._tasks[i]())
+                except Exception as e:
+                    future.set_exception(e)
+                self._futures[i] = future
+                return True
+        return False
+
+
+class GoalExecutor:
+    """
+    Process-wide, bounded thread pool used to run the children of complex goals.
+
+    Worker threads are created lazily, up to `max_workers`, and reused across
+    goals and repetitions, so thread creation is not on the hot path of
+    entering a complex goal.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, name: str = 'goalee-goals'):
+        self._max_workers = max_workers or GOAL_EXECUTOR_MAX_WORKERS
+        self._name = name
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._n_busy = 0
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @property
+    def saturated(self) -> bool:
+        """True when every worker thread is busy running a task."""
+        return self._n_busy >= self._max_workers
+
+    def set_max_workers(self, max_workers: int) -> None:
+        """
+        Changes the thread budget. Tasks already running on the previous pool
+        are not affected.
+        """
+        with self._lock:
+            self._max_workers = max_workers
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self._max_workers,
+                                                thread_name_prefix=self._name)
+            return self._pool.submit(self._run_task, fn, *args, **kwargs)
+
+    def _run_task(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            self._n_busy += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._n_busy -= 1
+
+    def batch(self, tasks: List[Callable]) -> GoalBatch:
+        return GoalBatch(self, tasks)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+
+
+_goal_executor: Optional[GoalExecutor] = None
+_goal_executor_lock = threading.Lock()
+
+
+def get_goal_executor() -> GoalExecutor:
+    """Returns the process-wide executor used by complex goals."""
+    global _goal_executor
+    with _goal_executor_lock:
+        if _goal_executor is None:
+            _goal_executor = GoalExecutor()
+        return _goal_executor
+
+
+def set_goal_executor_max_workers(max_workers: int) -> None:
+    """Sets the global thread budget of the complex goal executor."""
+    get_goal_executor().set_max_workers(max_workers)
@@ -1,12 +1,19 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from enum import IntEnum
 
-import time
+import threading
 import uuid
 
-from goalee.entity import Entity
+from goalee.adaptive import AdaptiveTickRate
+from goalee.clock import get_clock
+from goalee.definitions import (GOAL_EVENT_DRIVEN, GOAL_TRACK_DEPENDENCIES,
+                                GOAL_UPDATE_QUEUE_SIZE, GOAL_UPDATE_QUEUE_OVERFLOW)
+from goalee.entity import Entity, EntitySnapshot
 from goalee.logging import default_logger as logger
+from goalee.queues import UpdateQueue
 from goalee.rtmonitor import RTMonitor, EventMsg
+from goalee.stats import TickStats
+from goalee.timers import Deadline
 
 
 class GoalState(IntEnum):
@@ -42,11 +49,208 @@ class Goal:
         self._ts_start: float = -1.0
         self._ts_hold: float = -1.0
         self._ts_exit: float = -1.0
+        self._event_driven: bool = GOAL_EVENT_DRIVEN
+        self._wake_event = threading.Event()
+        self._deadline: Optional[Deadline] = None
+        self._deadline_expired: bool = False
+        self._hold_deadline: Optional[Deadline] = None
+        self._hold_expired: bool = False
+        self._tick_scheduler = None
+        self._adaptive_rate: Optional[AdaptiveTickRate] = None
+        self._adaptive_deps: Optional[List[Tuple[Entity, Optional[frozenset]]]] = None
+        self._tick_stats = TickStats()
+        self._ts_due: Optional[float] = None
+        self._track_dependencies: bool = GOAL_TRACK_DEPENDENCIES
+        self._dependencies: Optional[Dict[str, Optional[frozenset]]] = None
+        self._dirty: bool = True
+        # Set from time_dependent() when the goal is entered
+        self._time_dependent: bool = False
+        self._update_queue: Optional[UpdateQueue] = None
+        if GOAL_UPDATE_QUEUE_SIZE > 0:
+            self._update_queue = UpdateQueue(GOAL_UPDATE_QUEUE_SIZE, GOAL_UPDATE_QUEUE_OVERFLOW)
+        # Entity name -> snapshot of the last replayed update of the entity
+        self._views: Dict[str, EntitySnapshot] = {}
         self.set_state(GoalState.IDLE)
 
     def set_tick_freq(self, freq: int):
         self._freq = freq
 
+    def set_adaptive_tick_rate(self, min_hz: float, max_hz: float, **kwargs):
+        """
+        Enables adaptive tick rate (see `goalee.adaptive.AdaptiveTickRate`), bounded
+        within [min_hz, max_hz]. The fixed tick frequency is no longer used.
+        """
+        self._adaptive_rate = AdaptiveTickRate(min_hz, max_hz, **kwargs)
+        self._adaptive_deps = None
+
+    def tick_period(self) -> float:
+        """Returns the time, in seconds, to wait before the next tick."""
+        if self._adaptive_rate is None:
+            return 1.0 / self._freq
+        if self._adaptive_deps is None:
+            # Inputs whose changes keep the rate up
+            self._adaptive_deps = self.dependencies() if self._track_dependencies \
+                else [(e, None) for e in self.watched_entities]
+        return self._adaptive_rate.next_period(self._adaptive_deps,
+                                               [self._deadline, self._hold_deadline])
+
+    @property
+    def tick_stats(self) -> TickStats:
+        return self._tick_stats
+
+    def set_event_driven(self, enabled: bool):
+        """
+        Enables or disables event-driven evaluation.
+
+        In event-driven mode the goal does not poll at its tick frequency.
+        It is re-evaluated whenever one of its entities receives a new state,
+        and when its max_duration or for_duration deadline is reached. Goals
+        that are time dependent (see `time_dependent`) are still polled.
+        """
+        self._event_driven = enabled
+
+    def set_tick_scheduler(self, scheduler):
+        """
+        Sets a shared TickScheduler (`goalee.scheduler`) to tick this goal,
+        instead of running a sleep loop in the thread that entered the goal.
+        Ignored in event-driven mode.
+        """
+        self._tick_scheduler = scheduler
+
+    def set_track_dependencies(self, enabled: bool):
+        """
+        Enables or disables dependency tracking.
+
+        With dependency tracking, the goal listens for changes of the entity
+        attributes it depends on (see `dependencies`) and is only evaluated
+        after one of them has changed, or a for_duration deadline has expired.
+        Ticks in between are skipped.
+        """
+        self._track_dependencies = enabled
+        self._adaptive_deps = None
+
+    def set_update_queue(self, maxsize: Optional[int], overflow: str = 'drop_oldest'):
+        """
+        Enables or disables lossless evaluation.
+
+        Every update of the watched entities (of their dependencies, with
+        dependency tracking) is queued, and on each tick the goal is evaluated
+        once per queued update, in order, against the state of the entities
+        right after that update (see `view`). Values which last less than a
+        tick period are therefore not missed.
+
+        Args:
+            maxsize: Capacity of the queue. None or 0 disables the queue.
+            overflow: 'drop_oldest' or 'drop_newest', the update discarded when
+                the queue is full. Dropped updates are counted in tick_stats.
+        """
+        if maxsize in (None, 0):
+            self._update_queue = None
+        else:
+            self._update_queue = UpdateQueue(maxsize, overflow)
+
+    @property
+    def update_queue(self) -> Optional[UpdateQueue]:
+        return self._update_queue
+
+    def view(self, entity: Entity) -> EntitySnapshot:
+        """
+        Returns the state snapshot of an entity the goal must evaluate in tick():
+        the snapshot of the update being replayed with an update queue, the
+        current snapshot of the entity otherwise.
+        """
+        if self._views:
+            return self._views.get(entity.name, entity.snapshot)
+        return entity.snapshot
+
+    def set_dependencies(self, dependencies: Dict[str, Optional[Iterable[str]]]):
+        """
+        Explicitly declares the entity attributes the goal reads, overriding the
+        inferred dependencies.
+
+        Args:
+            dependencies: Maps entity names to the names of the attributes read.
+                None means all attributes of the entity. Watched entities that are
+                not in the map are not dependencies of the goal.
+        """
+        self._dependencies = {
+            name: None if attrs is None else frozenset(attrs)
+            for name, attrs in dependencies.items()
+        }
+        self._adaptive_deps = None
+
+    def infer_dependencies(self) -> Dict[str, Optional[Iterable[str]]]:
+        """
+        Returns the attributes the goal reads, per entity name. Watched entities
+        missing from the map are assumed to be read entirely. Goals override
+        this when their inputs can be derived from their definition.
+        """
+        return {}
+
+    def time_dependent(self) -> bool:
+        """
+        True if the goal can reach a verdict without any entity update, e.g. a
+        condition over the values of the last seconds. Such goals are polled at
+        their tick frequency, even in event-driven mode, and never skip a tick
+        when tracking dependencies.
+        """
+        return False
+
+    def dependencies(self) -> List[Tuple[Entity, Optional[frozenset]]]:
+        """
+        Returns the (entity, attributes) pairs the goal depends on. None as
+        attributes means any attribute of the entity.
+        """
+        if self._dependencies is not None:
+            deps = self._dependencies
+            return [(e, self._attr_keys(e, deps[e.name]))
+                    for e in self.watched_entities if e.name in deps]
+        inferred = self.infer_dependencies()
+        deps = []
+        for e in self.watched_entities:
+            attrs = inferred.get(e.name, None)
+            if attrs is None:
+                deps.append((e, None))
+            elif len(attrs) > 0:
+                deps.append((e, self._attr_keys(e, attrs)))
+        return deps
+
+    @staticmethod
+    def _attr_keys(entity: Entity, attrs: Optional[Iterable[str]]) -> Optional[frozenset]:
+        # Dotted paths, e.g. pose.x, change with the attribute that holds them
+        if attrs is None:
+            return None
+        return frozenset(entity.attr_key(attr) for attr in attrs)
+
+    @property
+    def track_dependencies(self) -> bool:
+        return self._track_dependencies
+
+    @property
+    def event_driven(self) -> bool:
+        return self._event_driven
+
+    @property
+    def watched_entities(self) -> list:
+        """Entities whose state updates trigger re-evaluation of the goal."""
+        return self._entities
+
+    def on_entity_update(self, entity: Entity):
+        self._dirty = True
+        self._wake()
+
+    def _enqueue_update(self, entity: Entity):
+        if entity.ingest_policy.policy == 'latest':
+            # The held message is processed when the goal reads the entity, on
+            # the goal thread instead of the transport thread
+            self._update_queue.put(entity)
+        else:
+            self._update_queue.put(entity.snapshot)
+        self.on_entity_update(entity)
+
+    def _wake(self):
+        get_clock().notify(self._wake_event)
+
     def serialize(self):
         return {
             'name': self._name,
@@ -58,9 +262,18 @@ class Goal:
             'elapsed': self.duration,
             'ts_start': self._ts_start,
             'ts_exit': self._ts_exit,
-            'entities': [entity.name for entity in self._entities]
+            'entities': [entity.name for entity in self._entities],
+            'tick_stats': self._serialize_tick_stats(),
         }
 
+    def _serialize_tick_stats(self):
+        stats = self._tick_stats.serialize()
+        if self._adaptive_rate is not None:
+            stats['adaptive'] = self._adaptive_rate.serialize()
+        if self._update_queue is not None:
+            stats['update_queue'] = self._update_queue.serialize()
+        return stats
+
     @property
     def duration(self) -> float:
         return self._ts_exit - self._ts_start
@@ -105,7 +318,14 @@ class Goal:
         self._report_state()
 
     def terminate(self):
+        """
+        Terminates the goal. A goal waiting for its next tick or entity update
+        is woken up and exits immediately.
+        """
         self.set_state(GoalState.TERMINATED)
+        self._wake()
+        if self._tick_scheduler is not None:
+            self._tick_scheduler.release(self)
 
     def _send_state_change_event(self):
         event = EventMsg(
@@ -142,8 +362,26 @@ class Goal:
         self.on_exit()
         return self
 
+    async def enter_async(self, rtmonitor: RTMonitor = None):
+        """
+        Coroutine counterpart of `enter`, used by the asyncio execution engine.
+
+        The goal is evaluated on the running event loop instead of a dedicated thread.
+
+        Returns:
+            Goal: The goal itself, in its final state.
+        """
+        self._ts_start = self.get_current_ts()
+        if rtmonitor is not None:
+            self.set_rtmonitor(rtmonitor)
+        self.set_state(GoalState.RUNNING)
+        self.on_enter()
+        await self.run_until_exit_async()
+        self.on_exit()
+        return self
+
     def get_current_ts(self):
-        return time.time()
+        return get_clock().time()
 
     def get_current_elapsed(self):
         return self.get_current_ts() - self._ts_start
@@ -173,29 +411,274 @@ class Goal:
             None
 
         Notes:
-            - The method sleeps for a duration determined by the frequency (`self._freq`) between each tick.
+            - In polling mode ticks are scheduled on absolute monotonic deadlines, spaced by
+              `tick_period()`, which is 1 / `self._freq`, or the adaptive period if an adaptive tick
+              rate is set. The time spent in `tick` is compensated, so the rate does not drift. If a
+              tick runs more than a period late, the missed ticks are skipped and counted in
+              `tick_stats`, along with the tick jitter.
+            - In event-driven mode the method blocks until one of the watched entities is updated or
+              a max_duration / for_duration deadline fires.
+            - With a tick scheduler set, ticks are run by the scheduler thread and this method only
+              waits for the goal to exit.
+            - With dependency tracking enabled, ticks are skipped until one of the entity attributes
+              the goal depends on changes (see `dependencies`).
+            - With an update queue (see `set_update_queue`), each tick replays every entity update
+              received since the previous tick, in order.
+            - Deadlines are tracked by the shared deadline scheduler (`goalee.timers`), so the elapsed
+              time is not recomputed on every tick.
+            - Time, sleeps and deadlines come from the process-wide clock (`goalee.clock`), which
+              may be a virtual clock driven by recorded messages.
             - The goal's state is checked against `GoalState.COMPLETED` and `GoalState.FAILED` to determine if it should exit.
             - If `_max_duration` is None or 0, the goal can run indefinitely until it reaches a terminal state.
             - If `_min_duration` is None or 0, there is no minimum duration constraint for the goal.
         """
-        while self._state not in (GoalState.COMPLETED, GoalState.FAILED, GoalState.TERMINATED):
+        self._dirty = True
+        self._views = {}
+        self._time_dependent = self.time_dependent()
+        if self._listens_for_updates:
+            self._attach_entity_listeners()
+        self._arm_deadline()
+        try:
+            if self._tick_scheduler is not None and self._polled:
+                exited = threading.Event()
+                self._tick_scheduler.register(self, lambda: get_clock().notify(exited))
+                get_clock().wait(exited)
+            else:
+                self._ts_due = get_clock().monotonic()
+                while self._step():
+                    self._wait_next_tick()
+        finally:
+            self._disarm_deadlines()
+            if self._listens_for_updates:
+                self._detach_entity_listeners()
+        self._check_min_duration()
+
+    async def run_until_exit_async(self):
+        """
+        Coroutine counterpart of `run_until_exit`.
+
+        Ticks are awaited on the running event loop. In event-driven mode entity
+        updates, received on transport threads, wake the coroutine thread-safely.
+        """
+        self._dirty = True
+        self._views = {}
+        self._time_dependent = self.time_dependent()
+        if self._listens_for_updates:
+            self._attach_entity_listeners()
+        self._arm_deadline()
+        try:
+            if self._tick_scheduler is not None and self._polled:
+                exited = threading.Event()
+                self._tick_scheduler.register(self, lambda: get_clock().notify(exited))
+                await get_clock().wait_async(exited)
+            else:
+                self._ts_due = get_clock().monotonic()
+                while self._step():
+                    await self._wait_next_tick_async()
+        finally:
+            self._disarm_deadlines()
+            if self._listens_for_updates:
+                self._detach_entity_listeners()
+        self._check_min_duration()
+
+    def _step(self) -> bool:
+        """
+        Runs a single evaluation iteration of the goal.
+
+        Returns:
+            bool: False once the goal has reached a terminal state, True otherwise.
+        """
+        if self._state in (GoalState.COMPLETED, GoalState.FAILED, GoalState.TERMINATED):
+            return False
+        self._wake_event.clear()
+        ts_due = self._ts_due if self._polled else None
+        if self._track_dependencies and not self._dirty and not self._time_dependent:
+            # None of the inputs of the goal changed since the last evaluation
+            self._tick_stats.on_skip(ts_due=ts_due)
+        else:
+            self._dirty = False
+            ts_tick = get_clock().monotonic()
+            if self._update_queue is not None:
+                self._replay_updates()
+            else:
+                self.tick()
+            self._tick_stats.on_tick(ts_tick, ts_due)
+        if self._state in (GoalState.COMPLETED, GoalState.FAILED, GoalState.TERMINATED):
+            self._tick_stats.on_verdict(
+                max((e.ts_last_msg for e in self.watched_entities), default=-1.0))
+            return False
+        if self._deadline_expired:
+            self._duration = self.get_current_elapsed()
+            self.set_state(GoalState.FAILED)
+            self.log_warning(
+                f'Goal <{self.__class__.__name__}:{self._name}> exited due' + \
+                f' to timeout after {self._max_duration} seconds!')
+            return False
+        return True
+
+    def _replay_updates(self):
+        """
+        Evaluates the goal once per queued entity update, oldest first, until it
+        reaches a terminal state. Ticks once on the last seen state if no update
+        is queued, e.g. when a deadline fires.
+        """
+        updates = self._update_queue.drain()
+        if len(updates) == 0:
+            self.tick()
+            return
+        for update in updates:
+            snapshot = update.snapshot if isinstance(update, Entity) else update
+            self._views[snapshot.name] = snapshot
             self.tick()
-            elapsed = self.get_current_elapsed()
-            if self._max_duration in (None, 0):
-                continue
-            elif elapsed > self._max_duration:
-                self._duration = elapsed
-                self.set_state(GoalState.FAILED)
-                self.log_warning(
-                    f'Goal <{self.__class__.__name__}:{self._name}> exited due' + \
-                    f' to timeout after {self._max_duration} seconds!')
-                break
-            time.sleep(1 / self._freq)
+            if self._state in (GoalState.COMPLETED, GoalState.FAILED, GoalState.TERMINATED):
+                return
+
+    def _check_min_duration(self):
         elapsed = self.get_current_elapsed()
         self._duration = elapsed
         if self._min_duration not in (None, 0) and self._duration < self._min_duration:
             self.set_state(GoalState.FAILED)
 
+    def _schedule_next_tick(self, now: float) -> float:
+        """
+        Moves the tick deadline one period forward and returns it. Ticks that can no longer run on time are skipped and counted as
+        missed deadlines.
+        """
+        period = self.tick_period()
+        ts_due = (now if self._ts_due is None else self._ts_due) + period
+        if ts_due < now:
+            missed = int((now - ts_due) // period) + 1
+            self._tick_stats.on_missed(missed)
+            ts_due += missed * period
+        self._ts_due = ts_due
+        return ts_due
+
+    @property
+    def _interrupted(self) -> bool:
+        """True once the goal must stop waiting for its next tick."""
+        return self._deadline_expired or \
+            self._state in (GoalState.COMPLETED, GoalState.FAILED, GoalState.TERMINATED)
+
+    def _wait_next_tick(self):
+        clock = get_clock()
+        if not self._polled:
+            clock.wait(self._wake_event)
+            return
+        ts_due = self._schedule_next_tick(clock.monotonic())
+        # The wait is cut short by terminate() and the max_duration deadline.
+        # Entity updates also wake the goal, but do not move its next tick.
+        while True:
+            self._wake_event.clear()
+            remaining = ts_due - clock.monotonic()
+            if remaining <= 0 or self._interrupted:
+                return
+            clock.wait(self._wake_event, remaining)
+
+    async def _wait_next_tick_async(self):
+        clock = get_clock()
+        if not self._polled:
+            await clock.wait_async(self._wake_event)
+            return
+        ts_due = self._schedule_next_tick(clock.monotonic())
+        while True:
+            self._wake_event.clear()
+            remaining = ts_due - clock.monotonic()
+            if remaining <= 0 or self._interrupted:
+                return
+            await clock.wait_async(self._wake_event, remaining)
+
+    def _arm_deadline(self):
+        """
+        Schedules the max_duration deadline of the goal on the shared deadline scheduler.
+        """
+        self._deadline_expired = False
+        if self._max_duration not in (None, 0):
+            remaining = self._ts_start + self._max_duration - self.get_current_ts()
+            self._deadline = get_clock().call_later(
+                remaining, self._on_deadline_expired)
+
+    def _disarm_deadlines(self):
+        if self._deadline is not None:
+            self._deadline.cancel()
+            self._deadline = None
+        self.cancel_hold()
+
+    def _on_deadline_expired(self):
+        if self._state != GoalState.RUNNING:
+            return
+        self._deadline_expired = True
+        self._wake()
+        if self._tick_scheduler is not None:
+            # Scheduled goals do not wait on the wake event, tick the goal now so
+            # that it fails and is released without waiting for its next round
+            self._tick_scheduler.wake(self)
+
+    @property
+    def holding(self) -> bool:
+        """True while a for_duration hold phase is in progress."""
+        return self._ts_hold is not None and self._ts_hold > 0
+
+    @property
+    def hold_expired(self) -> bool:
+        """True once the current hold phase has lasted for_duration seconds."""
+        return self._hold_expired
+
+    def start_hold(self):
+        """
+        Starts a for_duration hold phase, if one is not already in progress.
+
+        The hold deadline is tracked by the shared deadline scheduler, which wakes
+        the goal when it expires so that `hold_expired` can be checked on the next tick.
+        """
+        if self.holding:
+            return
+        self._ts_hold = self.get_current_ts()
+        self._hold_expired = False
+        self._hold_deadline = get_clock().call_later(
+            self._for_duration, self._on_hold_expired)
+
+    def cancel_hold(self):
+        if self._hold_deadline is not None:
+            self._hold_deadline.cancel()
+            self._hold_deadline = None
+        self._ts_hold = -1.0
+        self._hold_expired = False
+
+    def _on_hold_expired(self):
+        if self._state != GoalState.RUNNING:
+            return
+        self._hold_expired = True
+        self._dirty = True
+        self._wake()
+
+    @property
+    def _polled(self) -> bool:
+        """True if the goal is ticked at its frequency, rather than on entity updates."""
+        return not self._event_driven or self._time_dependent
+
+    @property
+    def _listens_for_updates(self) -> bool:
+        return self._event_driven or self._track_dependencies or \
+            self._update_queue is not None
+
+    def _attach_entity_listeners(self):
+        if self._update_queue is not None:
+            self._update_queue.clear()
+            callback = self._enqueue_update
+        else:
+            callback = self.on_entity_update
+        if self._track_dependencies:
+            for entity, attrs in self.dependencies():
+                entity.add_listener(callback, attrs)
+        else:
+            for entity in self.watched_entities:
+                entity.add_listener(callback)
+
+    def _detach_entity_listeners(self):
+        for entity in self.watched_entities:
+            entity.remove_listener(self.on_entity_update)
+            entity.remove_listener(self._enqueue_update)
+
     def on_exit(self):
         self._ts_exit = self.get_current_ts()
 
@@ -229,10 +712,21 @@ class Goal:
         self.log().debug(f"[{self.log_namespace()}] {msg}")
 
     def get_current_ts_ms(self):
-        return int(time.time() * 1000)
+        return int(get_clock().time() * 1000)
 
     def reset(self):
         self.set_state(GoalState.IDLE)
+        self._disarm_deadlines()
+        self._deadline_expired = False
+        self._tick_stats.reset()
+        self._ts_due = None
+        self._dirty = True
+        self._views = {}
+        if self._update_queue is not None:
+            self._update_queue.reset()
+        if self._adaptive_rate is not None:
+            self._adaptive_rate.reset()
+        self._adaptive_deps = None
         self._ts_start = -1.0
         self._ts_hold = -1.0
         self._ts_exit = -1.0
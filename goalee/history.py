@@ -0,0 +1,250 @@
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where only opens in this process are detected
+    fcntl = None
+
+# Header: magic, format version, number of fields, number of records, size of
+# the header (the names of the fields follow, as JSON, padded to 8 bytes)
+_MAGIC = b'GOALHIST'
+_VERSION = 1
+_HEADER = struct.Struct('<8sIIQQ')
+_COUNT_OFFSET = 16
+
+# Records added to the file every time it is full
+HISTORY_CHUNK_RECORDS = 1 << 14
+
+# Real paths of the history files open in this process
+_open_paths = set()
+_open_paths_lock = threading.Lock()
+
+
+class HistoryFile:
+    """
+    Append-only history of numeric attributes, stored as fixed-width records
+    in a memory-mapped file.
+
+    Each record holds a timestamp and one value per field, as float64 (NaN
+    for missing or non-numeric values). Records are written to the mapped
+    pages, which the OS writes back to the file, so the history survives a
+    crash of the process and does not live on the Python heap. Reopening an
+    existing file resumes appending to it. A file can only be open once at a
+    time, opening it again before it is closed raises a ValueError.
+
+    Reads are zero-copy: `column` and `window` return strided memoryviews of
+    the mapping, which can be passed to min, max, statistics, etc. Views stay
+    valid while referenced, even after the file grows. Timestamps are kept
+    non-decreasing, so windows by time are binary searches.
+
+    Args:
+        path: Path of the history file.
+        fields: Names of the recorded attributes. Read from the file if None.
+        chunk_records: Records added to the file whenever it is full.
+    """
+
+    def __init__(self, path: str, fields: Optional[Iterable[str]] = None,
+                 chunk_records: int = HISTORY_CHUNK_RECORDS):
+        if chunk_records <= 0:
+            raise ValueError('HistoryFile chunk size must be positive')
+        self.path = path
+        self._chunk = chunk_records
+        self._lock = threading.Lock()
+        self._closed = False
+        self._realpath = os.path.realpath(path)
+        with _open_paths_lock:
+            if self._realpath in _open_paths:
+                raise ValueError(f'History file <{path}> is already open')
+            _open_paths.add(self._realpath)
+        try:
+            self._open(path, fields)
+            # Record: timestamp + one value per field
+            self._width = 1 + len(self.fields)
+            self._record = struct.Struct(f'<{self._width}d')
+            self._index = {name: i + 1 for i, name in enumerate(self.fields)}
+            size = os.path.getsize(path)
+            capacity = (size - self._header_size) // self._record.size
+            self._map(max(capacity, self._count + chunk_records))
+        except BaseException:
+            self._release()
+            raise
+        self._last_ts = self._flat[(self._count - 1) * self._width] if self._count else -math.inf
+
+    def _open(self, path: str, fields: Optional[Iterable[str]]) -> None:
+        # Not truncated before the lock is held, the file may be open elsewhere
+        self._file = open(path, 'a+b')
+        if fcntl is not None:
+            try:
+                # Held until the file is closed, also rejects opens by other processes
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._file.close()
+                raise ValueError(f'History file <{path}> is already open') from None
+        self._file.seek(0)
+        if os.path.getsize(path) > 0:
+            self._read_header(fields)
+        else:
+            if fields is None:
+                raise ValueError(f'Fields are required to create history file <{path}>')
+            self._write_header(list(fields))
+
+    def _release(self) -> None:
+        file = getattr(self, '_file', None)
+        if file is not None and not file.closed:
+            if fcntl is not None:
+                # The mapping keeps a duplicate of the descriptor, and with it the lock
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            file.close()
+        with _open_paths_lock:
+            _open_paths.discard(self._realpath)
+
+    def _write_header(self, fields: List[str]) -> None:
+        names = json.dumps(fields).encode()
+        size = _HEADER.size + len(names)
+        size += -size % 8
+        header = _HEADER.pack(_MAGIC, _VERSION, len(fields), 0, size) + names
+        self._file.write(header.ljust(size, b' '))
+        self._file.flush()
+        self.fields = fields
+        self._count = 0
+        self._header_size = size
+
+    def _read_header(self, fields: Optional[Iterable[str]]) -> None:
+        header = self._file.read(_HEADER.size)
+        magic, version, n_fields, count, size = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f'<{self.path}> is not a history file')
+        stored = json.loads(self._file.read(size - _HEADER.size))
+        if fields is not None and list(fields) != stored:
+            raise ValueError(f'History file <{self.path}> records {stored}, '
+                             f'not {list(fields)}')
+        self.fields = stored
+        self._count = count
+        self._header_size = size
+
+    def _map(self, capacity: int) -> None:
+        # Maps the header and capacity records. The previous mapping is freed
+        # once no view of it is referenced.
+        length = self._header_size + capacity * self._record.size
+        if os.path.getsize(self.path) < length:
+            self._file.truncate(length)
+        self._mm = mmap.mmap(self._file.fileno(), length)
+        self._capacity = capacity
+        self._flat = memoryview(self._mm)[self._header_size:].cast('d')
+
+    def append(self, ts: float, values: Sequence[float]) -> None:
+        """
+        Appends a record. Values follow the order of fields; those that are
+        not numbers are stored as NaN. A timestamp older than the previous one
+        is raised to it.
+        """
+        row = []
+        for value in values:
+            try:
+                row.append(float(value))
+            except (TypeError, ValueError):
+                row.append(math.nan)
+        with self._lock:
+            if self._closed:
+                return
+            if self._count == self._capacity:
+                self._map(self._capacity + self._chunk)
+            ts = max(ts, self._last_ts)
+            self._record.pack_into(self._mm, self._header_size + self._count * self._record.size,
+                                   ts, *row)
+            self._last_ts = ts
+            self._count += 1
+            # Published after the record, so a reopened file never reads a partial one
+            struct.pack_into('<Q', self._mm, _COUNT_OFFSET, self._count)
+
+    def _bounds(self, start: int, end: Optional[int]) -> Tuple[memoryview, int, int]:
+        with self._lock:
+            flat = self._flat
+            count = self._count
+        end = count if end is None else max(0, min(end, count))
+        return flat, max(0, min(start, end)), end
+
+    def column(self, name: str, start: int = 0, end: Optional[int] = None) -> memoryview:
+        """Returns the values of a field in records [start, end), without copying."""
+        flat, start, end = self._bounds(start, end)
+        offset = self._index[name]
+        return flat[start * self._width + offset:end * self._width:self._width]
+
+    def timestamps(self, start: int = 0, end: Optional[int] = None) -> memoryview:
+        """Returns the timestamps of records [start, end), without copying."""
+        flat, start, end = self._bounds(start, end)
+        return flat[start * self._width:end * self._width:self._width]
+
+    def records(self, start: int = 0, end: Optional[int] = None) -> memoryview:
+        """Returns records [start, end) as a flat view of width 1 + len(fields)."""
+        flat, start, end = self._bounds(start, end)
+        return flat[start * self._width:end * self._width]
+
+    def find(self, t_start: float, t_end: Optional[float] = None) -> Tuple[int, int]:
+        """Returns the indices [start, end) of the records with t_start <= ts <= t_end."""
+        ts = self.timestamps()
+        start = bisect_left(ts, t_start)
+        end = len(ts) if t_end is None else bisect_right(ts, t_end, start)
+        return start, end
+
+    def window(self, name: str, seconds: Optional[float] = None, n: Optional[int] = None,
+               now: Optional[float] = None) -> memoryview:
+        """
+        Returns the values of a field recorded in the last seconds before now
+        (the last timestamp by default) and, given n, only the last n of them,
+        without copying.
+        """
+        end = len(self)
+        start = 0
+        if seconds is not None and end:
+            now = self._last_ts if now is None else now
+            start = self.find(now - seconds)[0]
+        if n is not None:
+            start = max(start, end - max(n, 0))
+        return self.column(name, start, end)
+
+    def range(self, name: str, t_start: float,
+              t_end: Optional[float] = None) -> Tuple[memoryview, memoryview]:
+        """Returns the timestamps and values of a field with t_start <= ts <= t_end."""
+        start, end = self.find(t_start, t_end)
+        return self.timestamps(start, end), self.column(name, start, end)
+
+    def as_numpy(self, start: int = 0, end: Optional[int] = None):
+        """Returns records [start, end) as a (n, 1 + len(fields)) NumPy array sharing the mapping."""
+        import numpy as np
+        return np.frombuffer(self.records(start, end), dtype=np.float64).reshape(-1, self._width)
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._closed:
+                self._mm.flush()
+
+    def close(self) -> None:
+        """
+        Writes the history to disk and closes the file. The history can still
+        be read, and views read earlier stay valid.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._mm.flush()
+            self._release()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __repr__(self) -> str:
+        return f'HistoryFile({self.path}, fields={self.fields}, records={self._count})'
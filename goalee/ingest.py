@@ -0,0 +1,139 @@
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+from commlib.serializer import ContentType, Serializer
+
+# Fastest JSON library available, stdlib json otherwise
+try:
+    import orjson as _json
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    try:
+        import ujson as _json
+        JSON_BACKEND = 'ujson'
+    except ImportError:
+        import json as _json
+        JSON_BACKEND = 'json'
+
+loads = _json.loads
+
+
+def decode(payload: Union[bytes, bytearray, memoryview, str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Decodes a JSON message with the fastest available backend. Messages that
+    are already decoded are returned as they are.
+
+    Raises:
+        ValueError: If the payload is not valid JSON.
+    """
+    if isinstance(payload, dict):
+        return payload
+    if isinstance(payload, memoryview):
+        payload = payload.tobytes()
+    return loads(payload)
+
+
+class RawSerializer(Serializer):
+    """
+    commlib serializer passing payloads through untouched, so that subscribers
+    deliver the raw bytes of each message, to be decoded by `decode`.
+    """
+
+    CONTENT_TYPE: str = ContentType.raw_bytes
+    CONTENT_ENCODING: str = 'None'
+
+    @staticmethod
+    def serialize(data: Any) -> Union[str, bytes]:
+        return data
+
+    @staticmethod
+    def deserialize(data: Union[str, bytes]) -> Union[str, bytes]:
+        return data
+
+
+INGEST_POLICIES = ('all', 'latest', 'decimate')
+
+
+class IngestPolicy:
+    """
+    Decides which incoming messages of an entity go through its update pipeline.
+
+    - `all`: every message is processed on arrival.
+    - `latest`: messages are only stored on arrival, each one replacing the
+      previous (coalesced). The last one is processed when the entity is read,
+      so the transport thread does no decoding or bookkeeping.
+    - `decimate`: messages are processed on arrival, at most rate_hz per second.
+      The others are dropped.
+
+    Args:
+        policy: One of INGEST_POLICIES.
+        rate_hz: Maximum processing rate of the decimate policy.
+    """
+
+    def __init__(self, policy: str = 'all', rate_hz: Optional[float] = None):
+        if policy not in INGEST_POLICIES:
+            raise ValueError(f'Invalid ingest policy <{policy}>')
+        if policy == 'decimate' and (rate_hz is None or rate_hz <= 0):
+            raise ValueError('The decimate ingest policy requires a positive rate_hz')
+        self.policy = policy
+        self.rate_hz = rate_hz
+        self._period = 1.0 / rate_hz if policy == 'decimate' else 0.0
+        self._lock = threading.Lock()
+        # Message waiting to be processed with the latest policy: (payload, decoded)
+        self._pending: Optional[Tuple[Any, bool]] = None
+        self._ts_last = None
+        self.reset_counters()
+
+    @property
+    def has_pending(self) -> bool:
+        return self._pending is not None
+
+    def admit(self, now: float) -> bool:
+        """Decimate policy: True if a message received at now must be processed."""
+        if self._ts_last is not None and now - self._ts_last < self._period:
+            self.dropped += 1
+            return False
+        self._ts_last = now
+        return True
+
+    def hold(self, payload: Any, decoded: bool) -> bool:
+        """
+        Latest policy: stores a message in place of the pending one.
+
+        Returns:
+            bool: True if no message was pending.
+        """
+        with self._lock:
+            first = self._pending is None
+            if not first:
+                self.coalesced += 1
+            self._pending = (payload, decoded)
+        return first
+
+    def take(self) -> Optional[Tuple[Any, bool]]:
+        """Removes and returns the pending message, if any."""
+        with self._lock:
+            pending = self._pending
+            self._pending = None
+        return pending
+
+    def reset_counters(self) -> None:
+        self.received = 0
+        self.processed = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def reset(self) -> None:
+        self.take()
+        self._ts_last = None
+        self.reset_counters()
+
+    def serialize(self) -> Dict[str, Any]:
+        return {
+            'policy': self.policy,
+            'rate_hz': self.rate_hz,
+            'received': self.received,
+            'processed': self.processed,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+        }
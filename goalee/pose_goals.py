@@ -27,6 +27,9 @@ class PoseGoal(Goal):
         self._deviation_pos = deviation_pos
         self._deviation_ori = deviation_ori
 
+    def infer_dependencies(self):
+        return {self._entity.name: ('position', 'orientation')}
+
     def on_enter(self):
         self.log_debug(
             f'Starting PoseGoal <{self._name}> with params:\n'
@@ -56,7 +59,7 @@ class PoseGoal(Goal):
             self.set_state(GoalState.COMPLETED)
 
     def tick(self):
-        self._last_state = self._entity.attributes.copy()
+        self._last_state = self.view(self._entity).attributes
         self.check_pose()
 
 
@@ -76,6 +79,9 @@ class PositionGoal(Goal):
         self._position = position
         self._deviation = deviation
 
+    def infer_dependencies(self):
+        return {self._entity.name: ('position', 'position.x', 'position.y', 'position.z')}
+
     def on_enter(self):
         self.log_debug(
             f'Starting PositionGoal <{self._name}> with params:\n'
@@ -87,24 +93,26 @@ class PositionGoal(Goal):
         )
 
     def check_pos(self):
-        if self._last_state.get('position', None) is None:
-            return
-        pos = self._last_state['position']
-        if pos.get('x', 'None') is None and pos.get('y', 'None') is None \
-            and pos.get('z', 'None') is None:
+        # Nested position values, or attributes extracted by a schema
+        x = self._last_state.get_attr('position.x')
+        y = self._last_state.get_attr('position.y')
+        z = self._last_state.get_attr('position.z')
+        if x is None or y is None or z is None:
+            if x is None and y is None and z is None and \
+                    self._last_state.attributes.get('position') is not None:
                 self.log_warning('Received invalid position values for x,y,z')
-                return
-        reached = (pos['x'] > (self._position.x - self._deviation) and \
-                   pos['x'] < (self._position.x + self._deviation) and \
-                   pos['y'] > (self._position.y - self._deviation) and \
-                   pos['y'] < (self._position.y + self._deviation) and \
-                   pos['z'] > (self._position.z - self._deviation) and \
-                   pos['z'] < (self._position.z + self._deviation))
+            return
+        reached = (x > (self._position.x - self._deviation) and \
+                   x < (self._position.x + self._deviation) and \
+                   y > (self._position.y - self._deviation) and \
+                   y < (self._position.y + self._deviation) and \
+                   z > (self._position.z - self._deviation) and \
+                   z < (self._position.z + self._deviation))
         if reached:
             self.set_state(GoalState.COMPLETED)
 
     def tick(self):
-        self._last_state = self._entity.attributes.copy()
+        self._last_state = self.view(self._entity)
         self.check_pos()
 
 
@@ -124,6 +132,9 @@ class OrientationGoal(Goal):
         self._orientation = orientation
         self._deviation = deviation
 
+    def infer_dependencies(self):
+        return {self._entity.name: ('orientation',)}
+
     def on_enter(self):
         self.log_debug(
             f'Starting OrientationGoal <{self._name}> with params:\n'
@@ -151,5 +162,5 @@ class OrientationGoal(Goal):
             self.set_state(GoalState.COMPLETED)
 
     def tick(self):
-        self._last_state = self._entity.attributes.copy()
+        self._last_state = self.view(self._entity).attributes
         self.check_ori()
@@ -0,0 +1,83 @@
+import threading
+from collections import deque
+from typing import Any, Dict, List
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class UpdateQueue:
+    """
+    Bounded, thread-safe FIFO of entity snapshots (`goalee.entity.EntitySnapshot`),
+    filled by the transport threads and drained by the goal on each tick.
+    Entities with the latest ingest policy are queued themselves, and their
+    snapshot is built when the update is replayed.
+
+    When the queue is full, `drop_oldest` discards the oldest queued update to
+    make room, and `drop_newest` discards the incoming one. Dropped updates are
+    counted.
+
+    Args:
+        maxsize: Capacity of the queue.
+        overflow: Overflow policy, one of OVERFLOW_POLICIES.
+    """
+
+    def __init__(self, maxsize: int, overflow: str = 'drop_oldest'):
+        if maxsize <= 0:
+            raise ValueError('UpdateQueue capacity must be positive')
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Invalid overflow policy <{overflow}>')
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._items = deque()
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, item: Any) -> bool:
+        """
+        Queues an item.
+
+        Returns:
+            bool: False if the item was dropped.
+        """
+        with self._lock:
+            self.enqueued += 1
+            if len(self._items) >= self.maxsize:
+                self.dropped += 1
+                if self.overflow == 'drop_newest':
+                    return False
+                self._items.popleft()
+            self._items.append(item)
+            self.max_depth = max(self.max_depth, len(self._items))
+            return True
+
+    def drain(self) -> List[Any]:
+        """Removes and returns all queued items, oldest first."""
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+            return items
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def reset(self) -> None:
+        self.clear()
+        self.enqueued = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def serialize(self) -> Dict[str, Any]:
+        return {
+            'maxsize': self.maxsize,
+            'overflow': self.overflow,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'max_depth': self.max_depth,
+        }
+
@@ -33,6 +33,33 @@ class GoalRepeater(Goal):
     def set_tick_freq(self, freq: int):
         self._goal.set_tick_freq(freq)
 
+    def set_event_driven(self, enabled: bool):
+        super().set_event_driven(enabled)
+        self._goal.set_event_driven(enabled)
+
+    def set_track_dependencies(self, enabled: bool):
+        super().set_track_dependencies(enabled)
+        self._goal.set_track_dependencies(enabled)
+
+    def set_tick_scheduler(self, scheduler):
+        super().set_tick_scheduler(scheduler)
+        self._goal.set_tick_scheduler(scheduler)
+
+    def set_adaptive_tick_rate(self, min_hz: float, max_hz: float, **kwargs):
+        self._goal.set_adaptive_tick_rate(min_hz, max_hz, **kwargs)
+
+    def set_update_queue(self, maxsize: Optional[int], overflow: str = 'drop_oldest'):
+        self._goal.set_update_queue(maxsize, overflow)
+
+    def terminate(self):
+        super().terminate()
+        if self._goal.state not in (GoalState.COMPLETED, GoalState.FAILED, GoalState.TERMINATED):
+            self._goal.terminate()
+
+    def on_reset(self):
+        self._times = 0
+        self._goal.reset()
+
     def serialize(self):
         return {**super().serialize(), 'times': self._repeat_times, 'goals': [self._goal.serialize()]}
 
@@ -53,13 +80,38 @@ class GoalRepeater(Goal):
         while self._times < self._repeat_times and self._state not in (GoalState.TERMINATED, GoalState.FAILED, GoalState.COMPLETED):
             self._times += 1
             self._goal.enter()
-            if self._state != GoalState.RUNNING:
+            if not self._record_repetition(_states, _durations):
                 break
-            _states.append(self._goal.state)
-            _durations.append(self._goal.duration)
-            if self._max_duration not in (None, 0) and self.get_current_elapsed() > self._max_duration:
+        self._evaluate_repetitions(_states)
+        self.on_exit()
+        return self
+
+    async def enter_async(self, rtmonitor: RTMonitor = None):
+        self._ts_start = self.get_current_ts()
+        self.set_state(GoalState.RUNNING)
+        self.on_enter()
+        _states = []
+        _durations = []
+        while self._times < self._repeat_times and self._state not in (GoalState.TERMINATED, GoalState.FAILED, GoalState.COMPLETED):
+            self._times += 1
+            await self._goal.enter_async()
+            if not self._record_repetition(_states, _durations):
                 break
-            self._goal.reset()
+        self._evaluate_repetitions(_states)
+        self.on_exit()
+        return self
+
+    def _record_repetition(self, _states, _durations) -> bool:
+        if self._state != GoalState.RUNNING:
+            return False
+        _states.append(self._goal.state)
+        _durations.append(self._goal.duration)
+        if self._max_duration not in (None, 0) and self.get_current_elapsed() > self._max_duration:
+            return False
+        self._goal.reset()
+        return True
+
+    def _evaluate_repetitions(self, _states):
         elapsed = self.get_current_elapsed()
         if self._max_duration not in (None, 0) and elapsed > self._max_duration:
             self.set_state(GoalState.FAILED)
@@ -69,5 +121,3 @@ class GoalRepeater(Goal):
             self.set_state(GoalState.COMPLETED if all([s == GoalState.COMPLETED for s in _states]) else GoalState.FAILED)
         else:  # Terminated / Failed
             pass
-        self.on_exit()
-        return self
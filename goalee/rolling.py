@@ -0,0 +1,151 @@
+import math
+from collections import deque
+from typing import Optional
+
+# Appends between two exact recomputations of the running sums, bounding the
+# floating point drift of the incremental updates
+RESYNC_INTERVAL = 1 << 16
+
+
+class RollingStats:
+    """
+    Running aggregates of the last maxlen values of an attribute, updated in
+    O(1) amortized time per value.
+
+    Mean and variance are maintained with Welford's algorithm, adding the
+    incoming value and removing the one leaving the window. Minimum and maximum
+    are the heads of two monotonic deques. Reading any aggregate is O(1),
+    whatever the window length.
+
+    Aggregates are None while the window holds too few values (none for the
+    mean, min and max, less than two for the variance). Variance and standard
+    deviation are the sample ones, as in `statistics.variance` and
+    `statistics.stdev`. The condition functions (`goalee.entity_goals`) raise
+    `statistics.StatisticsError` for them instead.
+
+    With maxlen None, values only leave the window through `popleft`, e.g.
+    when evicted from a time window (`goalee.buffers.TimeWindow`).
+
+    Args:
+        maxlen: Number of values in the window.
+    """
+
+    __slots__ = ('maxlen', '_values', '_min', '_max', '_first', '_index', '_mean', '_m2',
+                 '_resync')
+
+    def __init__(self, maxlen: Optional[int] = None):
+        if maxlen is not None and maxlen <= 0:
+            raise ValueError('RollingStats window must be positive')
+        self.maxlen = maxlen
+        self._values = deque()
+        # (index, value) pairs, values increasing in _min and decreasing in _max
+        self._min = deque()
+        self._max = deque()
+        self.clear()
+
+    def clear(self) -> None:
+        self._values.clear()
+        self._min.clear()
+        self._max.clear()
+        # Indices of the oldest value in the window and of the next value
+        self._first = 0
+        self._index = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._resync = RESYNC_INTERVAL
+
+    def append(self, value: float) -> None:
+        value = float(value)
+        values = self._values
+        if len(values) == self.maxlen:
+            self.popleft()
+        values.append(value)
+        n = len(values)
+        delta = value - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (value - self._mean)
+
+        index = self._index
+        self._index = index + 1
+        lows = self._min
+        while lows and lows[-1][1] >= value:
+            lows.pop()
+        lows.append((index, value))
+        highs = self._max
+        while highs and highs[-1][1] <= value:
+            highs.pop()
+        highs.append((index, value))
+
+        self._resync -= 1
+        if self._resync == 0:
+            self._recompute()
+
+    def popleft(self) -> float:
+        """Removes the oldest value from the window and returns it."""
+        value = self._values.popleft()
+        first = self._first
+        self._first = first + 1
+        if self._min[0][0] == first:
+            self._min.popleft()
+        if self._max[0][0] == first:
+            self._max.popleft()
+        n = len(self._values)
+        if n == 0:
+            self._mean = 0.0
+            self._m2 = 0.0
+            return value
+        delta = value - self._mean
+        self._mean -= delta / n
+        self._m2 = max(self._m2 - delta * (value - self._mean), 0.0)
+        return value
+
+    def _recompute(self) -> None:
+        n = len(self._values)
+        if n == 0:
+            self._resync = RESYNC_INTERVAL
+            return
+        self._mean = math.fsum(self._values) / n
+        self._m2 = math.fsum((v - self._mean) ** 2 for v in self._values)
+        self._resync = RESYNC_INTERVAL
+
+    @property
+    def full(self) -> bool:
+        return len(self._values) == self.maxlen
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+    @property
+    def mean(self) -> Optional[float]:
+        if not self._values:
+            return None
+        # Exact for a constant window, whatever the rounding of the running sums
+        return self._min[0][1] if self._min[0][1] == self._max[0][1] else self._mean
+
+    @property
+    def variance(self) -> Optional[float]:
+        n = len(self._values)
+        if n < 2:
+            return None
+        return 0.0 if self._min[0][1] == self._max[0][1] else self._m2 / (n - 1)
+
+    @property
+    def std(self) -> Optional[float]:
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return (f'RollingStats(maxlen={self.maxlen}, count={self.count}, mean={self.mean}, '
+                f'std={self.std}, min={self.min}, max={self.max})')
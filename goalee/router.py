@@ -0,0 +1,262 @@
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from goalee.ingest import RawSerializer, decode
+from goalee.logging import default_logger as logger
+
+WILDCARD = '*'
+
+
+def is_pattern(topic: str) -> bool:
+    """True if topic contains wildcards."""
+    return WILDCARD in topic.split('.')
+
+
+def compile_pattern(pattern: str) -> 're.Pattern':
+    """
+    Compiles a topic pattern, where each `*` matches exactly one level of the
+    topic, e.g. `robots.*.pose` matches `robots.r1.pose` but not `robots.r1.arm.pose`.
+    """
+    parts = [r'[^.]+' if p == WILDCARD else re.escape(p) for p in pattern.split('.')]
+    return re.compile(r'\.'.join(parts) + r'\Z')
+
+
+class TopicRouter:
+    """
+    Subscribes once per topic, or once per topic pattern, on a communication
+    node and dispatches each decoded message to every callback registered for
+    its topic.
+
+    Callbacks are registered for exact topics or for patterns (see
+    `compile_pattern`). A pattern added with `add_pattern` feeds all the topics
+    it matches through a single subscription: callbacks registered for those
+    topics, before or after the pattern was added, do not get subscriptions of
+    their own. A message is dispatched once, even if several patterns match it.
+
+    Args:
+        node: commlib node used to create the subscribers.
+        start_subscriber: Called with each subscriber created once the node is running.
+        running: Returns True once the node is running.
+        raw: Subscribe to raw payloads and decode them with `goalee.ingest.decode`,
+            once per message, instead of the commlib serializer.
+    """
+
+    def __init__(self, node: Any,
+                 start_subscriber: Callable[[Any], None],
+                 running: Callable[[], bool],
+                 raw: bool = False):
+        self._node = node
+        self._start_subscriber = start_subscriber
+        self._running = running
+        self._raw = raw
+        self._lock = threading.RLock()
+        # Topic or pattern -> callbacks
+        self._callbacks: Dict[str, tuple] = {}
+        # Topic or pattern -> subscriber receiving its messages
+        self._subscribers: Dict[str, Any] = {}
+        # Patterns with a subscription of their own, in the order they were added
+        self._patterns: Dict[str, 're.Pattern'] = {}
+        # Patterns added with add_pattern(), kept without callbacks
+        self._pinned = set()
+        # Patterns with registered callbacks
+        self._pattern_routes: Dict[str, 're.Pattern'] = {}
+        # Topic -> callbacks it is dispatched to, resolved on first use
+        self._routes: Dict[str, tuple] = {}
+        # Topic -> pattern whose subscription delivers it
+        self._owners: Dict[str, Optional[str]] = {}
+
+    @property
+    def topics(self) -> List[str]:
+        """Topics and patterns with a subscription."""
+        return list(self._subscribers.keys())
+
+    @property
+    def patterns(self) -> List[str]:
+        return list(self._patterns.keys())
+
+    def subscribers(self) -> List[Tuple[str, Any]]:
+        return list(self._subscribers.items())
+
+    def subscriber(self, topic: str) -> Optional[Any]:
+        """Returns the subscriber delivering the messages of a topic or pattern."""
+        with self._lock:
+            if topic in self._subscribers:
+                return self._subscribers[topic]
+            owner = self._owner(topic)
+            return self._subscribers.get(owner) if owner is not None else None
+
+    def subscribe(self, topic: str, callback: Callable[[Dict[str, Any]], None]) -> Any:
+        """
+        Registers callback for the messages of a topic, or of all topics matching
+        a pattern. Subscribes to the topic (or pattern) unless a pattern already
+        covers it.
+
+        Returns:
+            The subscriber delivering the messages of the topic.
+        """
+        with self._lock:
+            callbacks = self._callbacks.get(topic, ())
+            if callback not in callbacks:
+                self._callbacks[topic] = callbacks + (callback,)
+            if is_pattern(topic):
+                self._pattern_routes[topic] = compile_pattern(topic)
+                if topic not in self._patterns:
+                    self._add_pattern(topic)
+            elif topic not in self._subscribers and self._owner(topic) is None:
+                self._subscribers[topic] = self._create_subscriber(topic)
+            self._routes = {}
+            return self.subscriber(topic)
+
+    def unsubscribe(self, topic: str, callback: Callable) -> None:
+        """
+        Removes a callback. A topic subscription is stopped with its last callback,
+        a pattern subscription added by `add_pattern` is kept.
+        """
+        with self._lock:
+            callbacks = tuple(c for c in self._callbacks.get(topic, ()) if c != callback)
+            if len(callbacks) > 0:
+                self._callbacks[topic] = callbacks
+                self._routes = {}
+                return
+            self._callbacks.pop(topic, None)
+            self._pattern_routes.pop(topic, None)
+            self._routes = {}
+            if is_pattern(topic):
+                if topic in self._patterns and topic not in self._pinned:
+                    self._remove_pattern(topic)
+            elif topic in self._subscribers:
+                self._stop_subscriber(topic)
+
+    def add_pattern(self, pattern: str) -> Any:
+        """
+        Subscribes once to all topics matching pattern. Existing subscriptions to
+        topics it matches are replaced by the pattern subscription.
+
+        Returns:
+            The pattern subscriber.
+        """
+        with self._lock:
+            self._pinned.add(pattern)
+            if pattern not in self._patterns:
+                self._add_pattern(pattern)
+            return self._subscribers[pattern]
+
+    def remove_pattern(self, pattern: str) -> None:
+        """
+        Removes a pattern subscription. Topics with registered callbacks which it
+        covered get subscriptions of their own.
+        """
+        with self._lock:
+            self._pinned.discard(pattern)
+            if pattern in self._patterns and pattern not in self._callbacks:
+                self._remove_pattern(pattern)
+
+    def dispatch(self, topic: str, msg: Dict[str, Any]) -> None:
+        """Calls every callback registered for topic, or for a pattern matching it."""
+        callbacks = self._routes.get(topic)
+        if callbacks is None:
+            callbacks = self._resolve(topic)
+        for callback in callbacks:
+            try:
+                callback(msg)
+            except Exception as e:
+                logger.error(f'[TopicRouter] Error in callback of topic <{topic}>: {e}')
+
+    def _resolve(self, topic: str) -> tuple:
+        with self._lock:
+            callbacks = self._callbacks.get(topic, ())
+            for pattern, regex in self._pattern_routes.items():
+                if pattern != topic and regex.match(topic):
+                    callbacks = callbacks + tuple(c for c in self._callbacks[pattern]
+                                                  if c not in callbacks)
+            self._routes[topic] = callbacks
+            return callbacks
+
+    def _owner(self, topic: str) -> Optional[str]:
+        """Returns the first pattern subscription matching topic, if any."""
+        if topic not in self._owners:
+            self._owners[topic] = next(
+                (p for p, regex in self._patterns.items() if regex.match(topic)), None)
+        return self._owners[topic]
+
+    def _add_pattern(self, pattern: str):
+        self._patterns[pattern] = compile_pattern(pattern)
+        self._owners = {}
+        self._subscribers[pattern] = self._create_psubscriber(pattern)
+        # Topics covered by the pattern no longer need their own subscription
+        for topic in list(self._subscribers.keys()):
+            if not is_pattern(topic) and self._owner(topic) == pattern:
+                self._stop_subscriber(topic)
+
+    def _remove_pattern(self, pattern: str):
+        self._patterns.pop(pattern, None)
+        self._owners = {}
+        self._stop_subscriber(pattern)
+        for topic in self._callbacks:
+            if not is_pattern(topic) and topic not in self._subscribers and \
+                    self._owner(topic) is None:
+                self._subscribers[topic] = self._create_subscriber(topic)
+
+    def _decode(self, topic: str, payload: Any) -> Optional[Dict[str, Any]]:
+        try:
+            return decode(payload)
+        except ValueError as e:
+            logger.error(f'[TopicRouter] Invalid message on topic <{topic}>: {e}')
+            return None
+
+    def _serializer_kwargs(self) -> Dict[str, Any]:
+        return {'serializer': RawSerializer} if self._raw else {}
+
+    def _create_subscriber(self, topic: str):
+        if self._raw:
+            def _on_message(payload):
+                msg = self._decode(topic, payload)
+                if msg is not None:
+                    self.dispatch(topic, msg)
+        else:
+            def _on_message(msg):
+                self.dispatch(topic, msg)
+        sub = self._node.create_subscriber(topic=topic, on_message=_on_message,
+                                           **self._serializer_kwargs())
+        if self._running():
+            self._start_subscriber(sub)
+        return sub
+
+    def _create_psubscriber(self, pattern: str):
+        def _on_message(msg, topic):
+            # Delivered once, by the first pattern matching the topic
+            if self._owner(topic) != pattern:
+                return
+            if self._raw:
+                msg = self._decode(topic, msg)
+                if msg is None:
+                    return
+            self.dispatch(topic, msg)
+        sub = self._node.create_psubscriber(topic=pattern, on_message=_on_message,
+                                            **self._serializer_kwargs())
+        if self._running():
+            self._start_subscriber(sub)
+        return sub
+
+    def _stop_subscriber(self, topic: str):
+        sub = self._subscribers.pop(topic, None)
+        if sub is None:
+            return
+        subscribers = getattr(self._node, '_subscribers', None)
+        if isinstance(subscribers, list) and sub in subscribers:
+            subscribers.remove(sub)
+        try:
+            sub.stop()
+        except Exception as e:
+            logger.error(f'[TopicRouter] Error while stopping subscriber of <{topic}>: {e}')
+
+    def clear(self) -> None:
+        with self._lock:
+            self._callbacks = {}
+            self._subscribers = {}
+            self._patterns = {}
+            self._pattern_routes = {}
+            self._pinned = set()
+            self._routes = {}
+            self._owners = {}
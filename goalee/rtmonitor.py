@@ -28,6 +28,9 @@ class RemoteLogHandler(logging.Handler):
 
 
 class RTMonitor:
+    # Remote log handler installed for each communication node
+    _handlers = {}
+
     def __init__(self, comm_node, etopic, ltopic):
         self.node = comm_node
         epub = self.node.create_publisher(
@@ -42,7 +45,15 @@ class RTMonitor:
         lpub.run()
         self.epub = epub
         self.lpub = lpub
-        logger.addHandler(RemoteLogHandler(self))
+        # Scenarios sharing a node share one handler, which sends to the last monitor
+        handler = RTMonitor._handlers.get(id(comm_node))
+        if handler is None or handler not in logger.handlers:
+            handler = RemoteLogHandler(self)
+            RTMonitor._handlers[id(comm_node)] = handler
+            logger.addHandler(handler)
+        else:
+            handler.rtm = self
+        self._handler = handler
         logger.info(f'[RTMonitor]: Initialized topics: events -> {etopic}, logs -> {ltopic}')
 
     def send_event(self, event):
@@ -53,6 +64,12 @@ class RTMonitor:
         # logger.debug(f'[RTMonitor] Sending Log: {log_msg}')
         self.lpub.publish(log_msg)
 
+    def close(self):
+        """Removes the remote log handler of the node."""
+        if RTMonitor._handlers.get(id(self.node)) is self._handler:
+            del RTMonitor._handlers[id(self.node)]
+        logger.removeHandler(self._handler)
+
     def log(self, msg, level="INFO"):
         log_msg = LogMsg(msg=msg, level=level)
         self.send_log(log_msg)
@@ -1,16 +1,25 @@
+import asyncio
 import os
 import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Any, List, Optional, Tuple
 
-from commlib.node import Node
+from commlib.node import Node, NodeState
 from goalee.entity import Entity
 from goalee.goal import Goal, GoalState
 from goalee.brokers import Broker
+from goalee.clock import get_clock
+from goalee.connections import (connection_params, get_node_pool, shared_nodes_enabled,
+                                node_connected, run_endpoint, wait_until, wait_until_async)
 from goalee.logging import default_logger as logger
+from goalee.router import compile_pattern
 from goalee.rtmonitor import RTMonitor, EventMsg
-from goalee.definitions import GOAL_TICK_FREQ_HZ
+from goalee.definitions import (GOAL_TICK_FREQ_HZ, GOAL_EVENT_DRIVEN, GOAL_TRACK_DEPENDENCIES,
+                                GOAL_NODE_READY_TIMEOUT, GOAL_ENTITY_READY_TIMEOUT,
+                                GOAL_SHUTDOWN_LINGER, GOAL_UPDATE_QUEUE_SIZE,
+                                GOAL_UPDATE_QUEUE_OVERFLOW)
+from goalee.scheduler import TickScheduler
 
 
 class Scenario:
@@ -22,7 +31,17 @@ class Scenario:
                  goals: Optional[List[Goal]] = [],
                  anti_goals: Optional[List[Goal]] = [],
                  fatal_goals: Optional[List[Goal]] = [],
-                 goal_tick_freq_hz: int = None):
+                 goal_tick_freq_hz: int = None,
+                 event_driven: Optional[bool] = None,
+                 use_tick_scheduler: bool = False,
+                 adaptive_tick_rate: Optional[Tuple[float, float]] = None,
+                 track_dependencies: Optional[bool] = None,
+                 wait_first_message: bool = False,
+                 ready_timeout: Optional[float] = None,
+                 topic_patterns: Optional[List[str]] = None,
+                 update_queue_size: Optional[int] = None,
+                 update_queue_overflow: Optional[str] = None,
+                 keep_alive: bool = False):
         self._broker: Broker = broker
         self._rtmonitor: RTMonitor = None
         if name in (None, "") or len(name) == 0:
@@ -30,7 +49,12 @@ class Scenario:
         self._name: str = name
         self._goal_weights: List[float] = goal_weights
         self._antigoal_weights: List[float] = antigoal_weights
-        if self._broker is not None:
+        self._owns_node: bool = True
+        if self._broker is not None and shared_nodes_enabled():
+            # Shared with the entities and RTMonitor of every scenario on the same broker
+            self._node = get_node_pool().acquire(self._broker).node
+            self._owns_node = False
+        elif self._broker is not None:
             self._node = self._create_comm_node(self._broker)
         else:
             self._node: Node = None
@@ -40,23 +64,65 @@ class Scenario:
         self._entities: List[Entity] = []
         self._start_ts = self.get_current_ts()
         self._goal_tick_freq_hz = goal_tick_freq_hz or GOAL_TICK_FREQ_HZ
-
-        n_threads = len(self._fatal_goals + self._goals + self._anti_goals) + 1
-        self._thread_executor = ThreadPoolExecutor(n_threads)
+        self._event_driven = event_driven if event_driven is not None else GOAL_EVENT_DRIVEN
+        self._adaptive_tick_rate = adaptive_tick_rate
+        self._track_dependencies = track_dependencies if track_dependencies is not None \
+            else GOAL_TRACK_DEPENDENCIES
+        self._wait_first_message = wait_first_message
+        self._ready_timeout = ready_timeout
+        self._topic_patterns = topic_patterns or []
+        self._update_queue_size = update_queue_size if update_queue_size is not None \
+            else GOAL_UPDATE_QUEUE_SIZE
+        self._update_queue_overflow = update_queue_overflow or GOAL_UPDATE_QUEUE_OVERFLOW
+        # Keep the node, subscriptions and threads after a run, for reset() and the next run
+        self._keep_alive = keep_alive
+        self._closed = False
+        # (connection, pattern) subscriptions added by the scenario
+        self._pattern_subscriptions: List[Tuple[Any, str]] = []
+        self._tick_scheduler: Optional[TickScheduler] = None
+        if use_tick_scheduler:
+            self._tick_scheduler = TickScheduler(self._goal_tick_freq_hz,
+                                                 name=f'{self._name}-ticks')
+
+        self._thread_executor: Optional[ThreadPoolExecutor] = None
+        self._n_executor_threads = 0
 
         self._update_goal_weights()
 
-        for goal in self._goals:
-            goal.set_tick_freq(self._goal_tick_freq_hz)
-        for goal in self._anti_goals:
-            goal.set_tick_freq(self._goal_tick_freq_hz)
-        for goal in self._fatal_goals:
-            goal.set_tick_freq(self._goal_tick_freq_hz)
+        for goal in self._goals + self._anti_goals + self._fatal_goals:
+            self._configure_goal(goal)
+
+    def _configure_goal(self, goal: Goal):
+        goal.set_tick_freq(self._goal_tick_freq_hz)
+        goal.set_event_driven(self._event_driven)
+        goal.set_track_dependencies(self._track_dependencies)
+        if self._tick_scheduler is not None:
+            goal.set_tick_scheduler(self._tick_scheduler)
+        if self._adaptive_tick_rate is not None:
+            goal.set_adaptive_tick_rate(*self._adaptive_tick_rate)
+        if self._update_queue_size > 0:
+            goal.set_update_queue(self._update_queue_size, self._update_queue_overflow)
+
+    @property
+    def tick_scheduler(self) -> Optional[TickScheduler]:
+        return self._tick_scheduler
 
     @property
     def name(self):
         return self._name
 
+    @property
+    def goals(self) -> List[Goal]:
+        return self._goals
+
+    @property
+    def anti_goals(self) -> List[Goal]:
+        return self._anti_goals
+
+    @property
+    def fatal_goals(self) -> List[Goal]:
+        return self._fatal_goals
+
     def build_entity_list(self):
         self._entities = []  # Clear previous entities
         for goal in self._goals:
@@ -76,9 +142,17 @@ class Scenario:
                   f"    Goal Weights: {self._goal_weights}\n"
                   f"    Anti-Goal Weights: {self._antigoal_weights}\n"
                   f"    Goal Tick Frequency (hz): {self._goal_tick_freq_hz}\n"
+                  f"    Event-Driven: {self._event_driven}\n"
+                  f"    Tick Scheduler: {self._tick_scheduler is not None}\n"
+                  f"    Adaptive Tick Rate (hz): {self._adaptive_tick_rate}\n"
+                  f"    Dependency Tracking: {self._track_dependencies}\n"
+                  f"    Topic Patterns: {self._topic_patterns}\n"
+                  f"    Update Queue: {self._update_queue_size or None} ({self._update_queue_overflow})\n"
+                  f"    Keep Alive: {self._keep_alive}\n"
                   f"{'=' * 80}")
 
     def init_rtmonitor(self, etopic, ltopic):
+        self._rtmonitor_topics = (etopic, ltopic)
         if self._node is not None:
             self._rtmonitor = RTMonitor(self._node, etopic, ltopic)
             for goal in self._goals:
@@ -98,43 +172,45 @@ class Scenario:
         return str(uuid.uuid4()).replace('-', '')
 
     def _create_comm_node(self, broker, heartbeats=False):
-        if broker.__class__.__name__ == 'RedisBroker':
-            from commlib.transports.redis import ConnectionParameters
-            conn_params = ConnectionParameters(
-                host=broker.host,
-                port=broker.port,
-                db=broker.db,
-                username=broker.username,
-                password=broker.password,
-                reconnect_attempts=0,
-            )
-        elif broker.__class__.__name__ == 'AMQPBroker':
-            from commlib.transports.amqp import ConnectionParameters
-            conn_params = ConnectionParameters(
-                host=broker.host,
-                port=broker.port,
-                vhost=broker.vhost,
-                username=broker.username,
-                password=broker.password,
-                reconnect_attempts=0,
-            )
-        elif broker.__class__.__name__ == 'MQTTBroker':
-            from commlib.transports.mqtt import ConnectionParameters
-            conn_params = ConnectionParameters(
-                host=broker.host,
-                port=broker.port,
-                username=broker.username,
-                password=broker.password,
-                reconnect_attempts=0,
-            )
         node = Node(
             node_name=self._name,
-            connection_params=conn_params,
+            connection_params=connection_params(broker, reconnect_attempts=0),
             heartbeats=heartbeats,
             debug=False,
         )
         return node
 
+    def _run_comm_node(self):
+        if self._node and self._node.state != NodeState.RUNNING:
+            run_endpoint(self._node)
+            self._check_node_ready(
+                wait_until(lambda: node_connected(self._node), self._node_ready_timeout))
+
+    async def _run_comm_node_async(self):
+        if self._node and self._node.state != NodeState.RUNNING:
+            run_endpoint(self._node)
+            self._check_node_ready(
+                await wait_until_async(lambda: node_connected(self._node),
+                                       self._node_ready_timeout))
+
+    @property
+    def _node_ready_timeout(self) -> float:
+        return GOAL_NODE_READY_TIMEOUT if self._ready_timeout is None else self._ready_timeout
+
+    def _check_node_ready(self, ready: bool):
+        if not ready:
+            self.log_warning(f"Communication node not connected to broker after "
+                             f"{self._node_ready_timeout} seconds")
+
+    def _linger(self):
+        """Gives the transport time to deliver the last RTMonitor events."""
+        if self._rtmonitor is not None:
+            time.sleep(GOAL_SHUTDOWN_LINGER)
+
+    async def _linger_async(self):
+        if self._rtmonitor is not None:
+            await asyncio.sleep(GOAL_SHUTDOWN_LINGER)
+
     def add_goal(self, goal: Goal, weight=None):
         """
         Adds a goal to the list of goals.
@@ -143,6 +219,7 @@ class Scenario:
             goal (Goal): The goal to be added to the list.
         """
         self._goals.append(goal)
+        self._configure_goal(goal)
         if weight is not None:
             if self._goal_weights is None:
                 self._goal_weights = []
@@ -168,21 +245,102 @@ class Scenario:
         Starts all entities associated with the goals in the scenario.
 
         This method iterates over each goal in the scenario and calls the
-        `start` method on each entity associated with that goal.
+        `start` method on each entity associated with that goal. Entities are
+        started without waiting, then `wait_entities_ready` waits for all of them.
+        """
+        entities = self._collect_entities(goals)
+        self._start_entities_nowait(entities)
+        self.wait_entities_ready(entities)
+
+    async def start_entities_async(self, goals: List[Goal] = None) -> None:
+        """
+        Coroutine counterpart of `start_entities`.
+
+        Creating the nodes of the entities may connect to their brokers, so the
+        entities are started in a worker thread, then waited for on the event loop.
         """
+        entities = self._collect_entities(goals)
+        await asyncio.get_running_loop().run_in_executor(
+            None, self._start_entities_nowait, entities)
+        await self.wait_entities_ready_async(entities)
+
+    def _start_entities_nowait(self, entities: List[Entity]):
+        self._subscribe_topic_patterns(entities)
+        for entity in entities:
+            entity.start(wait=False)
+
+    def _subscribe_topic_patterns(self, entities: List[Entity]):
+        """
+        Subscribes once to each topic pattern of the scenario (e.g. `robots.*.pose`),
+        on the broker of every entity whose topic it matches, instead of once per entity.
+        """
+        if len(self._topic_patterns) == 0 or not shared_nodes_enabled():
+            return
+        for pattern in self._topic_patterns:
+            regex = compile_pattern(pattern)
+            for entity in entities:
+                if entity.source is not None and regex.match(entity.topic):
+                    connection = get_node_pool().get_connection(entity.source)
+                    if (connection, pattern) in self._pattern_subscriptions:
+                        continue
+                    get_node_pool().acquire(entity.source).add_pattern(pattern)
+                    self._pattern_subscriptions.append((connection, pattern))
+
+    def _collect_entities(self, goals: List[Goal], entities: List[Entity] = None) -> List[Entity]:
+        entities = [] if entities is None else entities
         for goal in goals:
             if goal.__class__.__name__ == 'ComplexGoal':
-                self.start_entities(goal.goals)
-            elif goal.__class__.__name__ == 'MovingAreaGoal':
-                if goal.motion_entity is not None:
-                    goal.motion_entity.start()
-                for entity in goal.entities:
-                    entity.start()
+                self._collect_entities(goal.goals, entities)
+                continue
             elif goal.__class__.__name__ == 'GoalRepeater':
-                self.start_entities([goal._goal])
-            else:
-                for entity in goal.entities:
-                    entity.start()
+                self._collect_entities([goal._goal], entities)
+                continue
+            goal_entities = list(goal.entities)
+            if goal.__class__.__name__ == 'MovingAreaGoal' and goal.motion_entity is not None:
+                goal_entities.insert(0, goal.motion_entity)
+            for entity in goal_entities:
+                if entity not in entities:
+                    entities.append(entity)
+        return entities
+
+    def wait_entities_ready(self, entities: List[Entity]) -> bool:
+        """
+        Waits until every entity is subscribed to its topic and, if the scenario
+        was created with wait_first_message=True, has received its first message.
+        All entities share a single timeout (ready_timeout, or GOAL_ENTITY_READY_TIMEOUT).
+
+        Returns:
+            bool: True if all entities are ready.
+        """
+        timeout = GOAL_ENTITY_READY_TIMEOUT if self._ready_timeout is None else self._ready_timeout
+        ts_end = time.monotonic() + timeout
+        not_ready = []
+        for entity in entities:
+            remaining = max(ts_end - time.monotonic(), 0.0)
+            if not entity.wait_ready(remaining):
+                not_ready.append(entity.name)
+            elif self._wait_first_message and not entity.wait_first_message(remaining):
+                not_ready.append(entity.name)
+        return self._check_entities_ready(not_ready, timeout)
+
+    async def wait_entities_ready_async(self, entities: List[Entity]) -> bool:
+        """Coroutine counterpart of `wait_entities_ready`."""
+        timeout = GOAL_ENTITY_READY_TIMEOUT if self._ready_timeout is None else self._ready_timeout
+        ts_end = time.monotonic() + timeout
+        not_ready = []
+        for entity in entities:
+            remaining = max(ts_end - time.monotonic(), 0.0)
+            if not await entity.wait_ready_async(remaining):
+                not_ready.append(entity.name)
+            elif self._wait_first_message and \
+                    not await entity.wait_first_message_async(remaining):
+                not_ready.append(entity.name)
+        return self._check_entities_ready(not_ready, timeout)
+
+    def _check_entities_ready(self, not_ready: List[str], timeout: float) -> bool:
+        if len(not_ready) > 0:
+            self.log_warning(f"Entities not ready after {timeout} seconds: {not_ready}")
+        return len(not_ready) == 0
 
     def run_seq(self) -> None:
         """
@@ -198,18 +356,16 @@ class Scenario:
         Returns:
             None
         """
+        self._reopen()
         self.build_entity_list()
         self.print_stats()
-        if self._node:
-            self._node.run()
-            time.sleep(1)
+        self._run_comm_node()
         if self._rtmonitor:
             self.send_scenario_started("sequential")
 
         self.start_entities(self._goals + self._anti_goals + self._fatal_goals)
 
-        self.start_fatal_goals()
-        self.start_antigoals()
+        background = self.start_fatal_goals() + self.start_antigoals()
 
         for g in self._goals:
             g.enter()
@@ -221,17 +377,19 @@ class Scenario:
                     break
             if _break:
                 break
+        get_clock().idle()
         self.print_results()
 
         if self._rtmonitor:
             self.send_scenario_finished("sequential")
 
         self.terminate_all_goals()
-        self.stop_thread_executor()
+        # Goals must have exited before the scenario is reset or closed
+        wait(background)
 
         if self._node:
-            time.sleep(2)
-            self._node.stop()
+            self._linger()
+        self._end_run()
 
     def run_concurrent(self) -> None:
         """
@@ -243,38 +401,150 @@ class Scenario:
         score, and logs the results and score.
 
         """
+        self._reopen()
         self.build_entity_list()
         self.print_stats()
-        if self._node:
-            self._node.run()
-            time.sleep(1)
+        self._run_comm_node()
 
         if self._rtmonitor:
             self.send_scenario_started("concurrent")
 
         self.start_entities(self._goals + self._anti_goals + self._fatal_goals)
 
-        self.start_fatal_goals()
-        self.start_antigoals()
+        background = self.start_fatal_goals() + self.start_antigoals()
 
         self.start_goals_and_wait()
         self.terminate_all_goals()
+        # Goals must have exited before the scenario is reset or closed
+        wait(background)
 
         self.print_results()
 
         if self._rtmonitor:
             self.send_scenario_finished("concurrent")
 
-        self.stop_thread_executor()
+        if self._node:
+            self._linger()
+        self._end_run()
+
+    async def run_async(self) -> None:
+        """
+        Executes the scenario concurrently on a single asyncio event loop.
+
+        Goals, anti-goals, fatal goals and nested complex goals run as coroutines
+        instead of one thread each, so the number of OS threads does not grow with
+        the number of goals. Results and events are the same as in `run_concurrent`.
+        If the run is cancelled, its goals are terminated and awaited before the
+        cancellation is propagated.
+
+        Usage:
+            asyncio.run(scenario.run_async())
+        """
+        self._reopen()
+        self.build_entity_list()
+        self.print_stats()
+        await self._run_comm_node_async()
+
+        if self._rtmonitor:
+            self.send_scenario_started("async")
+
+        await self.start_entities_async(self._goals + self._anti_goals + self._fatal_goals)
+
+        background_tasks = self.start_fatal_goals_async() + self.start_antigoals_async()
+
+        tasks = self.start_goals_async()
+        try:
+            await self.wait_goals_async(tasks)
+        except asyncio.CancelledError:
+            # Goal tasks are not cancelled with the run. They are terminated and
+            # awaited instead, so that they exit with a final state.
+            self.terminate_all_goals()
+            await asyncio.gather(*tasks, *background_tasks, return_exceptions=True)
+            self._end_run()
+            raise
+        self.terminate_all_goals()
+
+        self.print_results()
+
+        if self._rtmonitor:
+            self.send_scenario_finished("async")
+
+        await asyncio.gather(*background_tasks, return_exceptions=True)
 
         if self._node:
-            time.sleep(2)
-            # self._node.stop()
+            await self._linger_async()
+        self._end_run()
+
+    async def start_goals_and_wait_async(self):
+        return await self.wait_goals_async(self.start_goals_async())
+
+    def start_goals_async(self):
+        tasks = []
+        for goal in self._goals:
+            task = self._spawn_goal_async(goal)
+            task.add_done_callback(self.on_goal)
+            tasks.append(task)
+        return tasks
+
+    async def wait_goals_async(self, tasks):
+        for f in asyncio.as_completed(tasks):
+            try:
+                await f
+                self.send_scenario_update("async")
+            except Exception as e:
+                self.log_error(f"Error in goal execution: {e}")
+        return tasks
+
+    def _spawn_goal_async(self, goal: Goal) -> asyncio.Task:
+        get_clock().begin_spawn()
+        return asyncio.ensure_future(self._run_goal_async(goal))
+
+    async def _run_goal_async(self, goal: Goal) -> Goal:
+        clock = get_clock()
+        clock.end_spawn()
+        try:
+            return await goal.enter_async()
+        finally:
+            if goal in self._fatal_goals and goal.state == GoalState.COMPLETED:
+                # Stop the other goals before the clock moves on
+                self.terminate_all_goals()
+            clock.idle()
+
+    def start_fatal_goals_async(self):
+        tasks = []
+        for goal in self._fatal_goals:
+            task = self._spawn_goal_async(goal)
+            task.add_done_callback(self.on_fatal)
+            tasks.append(task)
+        return tasks
+
+    def start_antigoals_async(self):
+        tasks = []
+        for goal in self._anti_goals:
+            task = self._spawn_goal_async(goal)
+            task.add_done_callback(self.on_antigoal)
+            tasks.append(task)
+        return tasks
+
+    def _submit_goal(self, goal: Goal):
+        get_clock().begin_spawn()
+        return self._get_thread_executor().submit(self._run_goal, goal)
+
+    def _run_goal(self, goal: Goal) -> Goal:
+        clock = get_clock()
+        clock.end_spawn()
+        try:
+            return goal.enter()
+        finally:
+            if goal in self._fatal_goals and goal.state == GoalState.COMPLETED:
+                # Stop the other goals before the clock moves on
+                self.terminate_all_goals()
+            clock.idle()
 
     def start_goals(self):
         futures = []
         for goal in self._goals:
-            future = self._thread_executor.submit(goal.enter, )
+            future = self._submit_goal(goal)
             futures.append(future)
         for future in futures:
             future.add_done_callback(self.on_goal)
@@ -293,18 +563,20 @@ class Scenario:
     def start_fatal_goals(self):
         futures = []
         for goal in self._fatal_goals:
-            future = self._thread_executor.submit(goal.enter, )
+            future = self._submit_goal(goal)
             futures.append(future)
         for future in futures:
             future.add_done_callback(self.on_fatal)
+        return futures
 
     def start_antigoals(self):
         futures = []
         for goal in self._anti_goals:
-            future = self._thread_executor.submit(goal.enter, )
+            future = self._submit_goal(goal)
             futures.append(future)
         for future in futures:
             future.add_done_callback(self.on_antigoal)
+        return futures
 
     def terminate_fatal_goals(self):
         for goal in self._fatal_goals:
@@ -338,11 +610,98 @@ class Scenario:
     def on_antigoal(self, f):
         self.log_info(f"AntiGoal <{f.result().name}> exited with state: {f.result().state.name}")
 
+    def _get_thread_executor(self) -> ThreadPoolExecutor:
+        # Created on the first run and reused by the next ones, unless goals were added since
+        n_threads = len(self._fatal_goals + self._goals + self._anti_goals) + 1
+        if self._thread_executor is not None and self._n_executor_threads < n_threads:
+            self.stop_thread_executor()
+        if self._thread_executor is None:
+            self._thread_executor = ThreadPoolExecutor(n_threads)
+            self._n_executor_threads = n_threads
+        return self._thread_executor
+
     def stop_thread_executor(self, wait: bool = False, force: bool = True):
+        if self._thread_executor is None:
+            return
         try:
             self._thread_executor.shutdown(wait=wait, cancel_futures=force)
         except Exception:
             pass
+        self._thread_executor = None
+
+    def reset(self, clear_entity_state: bool = True) -> None:
+        """
+        Prepares the scenario to be run again, e.g. once per simulated episode.
+
+        Entity buffers are cleared, then goals are reset with `Goal.reset()`. With
+        keep_alive=True, the communication node, the entity subscriptions and
+        the worker threads of the previous run are kept, so starting the next
+        run is cheap. Call `close()` after the last run.
+
+        Args:
+            clear_entity_state: Also clear the last received state of the entities.
+                Set to False if the entities only publish on change.
+        """
+        goals = self._goals + self._anti_goals + self._fatal_goals
+        self.terminate_all_goals()
+        # Entities first: clearing their state is an update, which goals must
+        # not see as the first message of the next run
+        for entity in self._collect_entities(goals):
+            entity.reset(clear_state=clear_entity_state)
+        for goal in goals:
+            goal.reset()
+        self._start_ts = self.get_current_ts()
+
+    def _reopen(self) -> None:
+        # A closed scenario gets a new communication node for its next run
+        if not self._closed:
+            return
+        self._closed = False
+        if self._broker is None:
+            return
+        if self._owns_node:
+            node = self._create_comm_node(self._broker)
+        else:
+            node = get_node_pool().acquire(self._broker).node
+        if node is not self._node:
+            self._node = node
+            if self._rtmonitor is not None:
+                self.init_rtmonitor(*self._rtmonitor_topics)
+
+    def _end_run(self) -> None:
+        # Runs release their resources, unless the scenario is kept alive for the next run
+        if not self._keep_alive:
+            self.close()
+
+    def close(self) -> None:
+        """
+        Releases the resources kept between runs: worker threads, the tick
+        scheduler, the entity and topic pattern subscriptions and the
+        communication node, or the reference of the scenario on a shared node.
+
+        Called at the end of every run, unless the scenario was created with
+        keep_alive=True to be reset and run again.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.terminate_all_goals()
+        self.stop_thread_executor()
+        if self._tick_scheduler is not None:
+            self._tick_scheduler.stop()
+        for entity in self._collect_entities(self._goals + self._anti_goals + self._fatal_goals):
+            entity.stop()
+        for connection, pattern in self._pattern_subscriptions:
+            connection.remove_pattern(pattern)
+            get_node_pool().release(connection.broker)
+        self._pattern_subscriptions = []
+        if self._node and self._owns_node:
+            if self._rtmonitor is not None:
+                self._rtmonitor.close()
+            self._node.stop()
+        elif self._node:
+            # The shared node is stopped with its last user
+            get_node_pool().release(self._broker)
 
     def print_results(self):
         self.log_info(
@@ -362,6 +721,8 @@ class Scenario:
             f"Final Score (goals - antigoals): {self.calc_score():.2f}\n"
             f"{'=' * 80}"
         )
+        if self._tick_scheduler is not None:
+            self.log_info(f"Tick Scheduler Stats: {self._tick_scheduler.stats}")
 
     def send_scenario_started(self, execution: str):
         if self._rtmonitor is None:
@@ -428,12 +789,12 @@ class Scenario:
     @staticmethod
     def get_current_ts():
         """
-        Get the current timestamp with nanosecond accuracy as an integer.
+        Get the current timestamp of the scenario clock (`goalee.clock`) as an integer.
 
         Returns:
-            int: The current timestamp in nanoseconds.
+            int: The current timestamp in milliseconds.
         """
-        return int(time.perf_counter_ns() * 1e-6)
+        return int(get_clock().monotonic() * 1000)
 
     def calc_score(self):
         """
@@ -0,0 +1,175 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from goalee.clock import get_clock
+from goalee.definitions import GOAL_TICK_FREQ_HZ
+from goalee.logging import default_logger as logger
+
+
+class _ScheduledGoal:
+    __slots__ = ('goal', 'on_exit', 'next_due')
+
+    def __init__(self, goal, on_exit: Callable, next_due: float):
+        self.goal = goal
+        self.on_exit = on_exit
+        self.next_due = next_due
+
+
+class TickScheduler:
+    """
+    Ticks all registered goals from a single thread, in rounds.
+
+    Rounds run at `freq_hz`. In each round, every goal whose own tick period
+    (`Goal.tick_period()`) has elapsed is evaluated once, so goals slower than
+    the scheduler keep their own rate, while faster goals are capped to `freq_hz`.
+    When a round takes longer than the round period, the overrun is recorded in
+    `stats` and reported as a warning (at most once per second).
+
+    A goal can be ticked ahead of its next round with `wake`, e.g. when its
+    max_duration deadline fires.
+    """
+
+    def __init__(self, freq_hz: Optional[int] = None, name: str = 'goalee-ticks'):
+        self._freq = freq_hz or GOAL_TICK_FREQ_HZ
+        self._name = name
+        self._goals: Dict[int, _ScheduledGoal] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        # Set by stop() and wake(), to start the next round right away
+        self._round_event = threading.Event()
+        self._ts_last_warning = 0.0
+        self._stats = {
+            'rounds': 0,
+            'ticks': 0,
+            'overruns': 0,
+            'last_round_duration': 0.0,
+            'max_round_duration': 0.0,
+            'last_overrun': 0.0,
+            'max_overrun': 0.0,
+        }
+
+    @property
+    def freq(self) -> int:
+        return self._freq
+
+    @property
+    def period(self) -> float:
+        return 1.0 / self._freq
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, 'goals': len(self._goals), 'freq': self._freq}
+
+    def register(self, goal, on_exit: Callable) -> None:
+        """
+        Registers a running goal. The goal is ticked until it reaches a terminal
+        state, then it is removed and on_exit is called from the scheduler thread.
+        """
+        with self._lock:
+            self._goals[id(goal)] = _ScheduledGoal(goal, on_exit, get_clock().monotonic())
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name=self._name,
+                                                daemon=True)
+                self._thread.start()
+
+    def unregister(self, goal) -> None:
+        with self._lock:
+            self._goals.pop(id(goal), None)
+
+    def release(self, goal) -> None:
+        """
+        Removes a goal that was stopped from outside, e.g. terminated, and calls
+        its on_exit callback right away instead of on the next round.
+        """
+        with self._lock:
+            entry = self._goals.pop(id(goal), None)
+        if entry is not None:
+            entry.on_exit()
+
+    def wake(self, goal) -> None:
+        """
+        Makes a registered goal due now and starts a round without waiting for
+        the round period. Goals reaching a terminal state in that round, e.g.
+        on an expired deadline, are removed and their on_exit is called.
+        """
+        clock = get_clock()
+        with self._lock:
+            entry = self._goals.get(id(goal))
+            if entry is None:
+                return
+            entry.next_due = min(entry.next_due, clock.monotonic())
+        clock.notify(self._round_event)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        get_clock().notify(self._round_event)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        clock = get_clock()
+        while not self._stop_event.is_set():
+            self._round_event.clear()
+            ts_round = clock.monotonic()
+            ts_start = time.monotonic()
+            self.run_round(ts_round)
+            # Overruns are measured in real time, whatever the clock
+            elapsed = time.monotonic() - ts_start
+            self._record_round(elapsed)
+            clock.wait(self._round_event, max(self.period - elapsed, 0) if clock.realtime
+                       else self.period)
+        clock.idle()
+
+    def run_round(self, now: Optional[float] = None) -> int:
+        """
+        Ticks all goals that are due. Returns the number of goals ticked.
+        """
+        now = get_clock().monotonic() if now is None else now
+        with self._lock:
+            entries = list(self._goals.values())
+        n_ticked = 0
+        for entry in entries:
+            if entry.next_due > now:
+                continue
+            n_ticked += 1
+            entry.goal._ts_due = entry.next_due
+            try:
+                alive = entry.goal._step()
+            except Exception as e:
+                logger.error(f'[TickScheduler] Error while ticking goal <{entry.goal.name}>: {e}')
+                alive = True
+            if alive:
+                period = entry.goal.tick_period()
+                entry.next_due += period
+                if entry.next_due <= now:
+                    entry.goal.tick_stats.on_missed(int((now - entry.next_due) // period) + 1)
+                    entry.next_due = now + period
+            else:
+                self.unregister(entry.goal)
+                entry.on_exit()
+        self._stats['ticks'] += n_ticked
+        return n_ticked
+
+    def _record_round(self, elapsed: float):
+        stats = self._stats
+        stats['rounds'] += 1
+        stats['last_round_duration'] = elapsed
+        stats['max_round_duration'] = max(stats['max_round_duration'], elapsed)
+        overrun = elapsed - self.period
+        if overrun <= 0:
+            return
+        stats['overruns'] += 1
+        stats['last_overrun'] = overrun
+        stats['max_overrun'] = max(stats['max_overrun'], overrun)
+        now = time.monotonic()
+        if now - self._ts_last_warning > 1.0:
+            self._ts_last_warning = now
+            logger.warning(
+                f'[TickScheduler] Round overrun by {overrun * 1000:.1f} ms '
+                f'({len(self._goals)} goals, period {self.period * 1000:.1f} ms, '
+                f'{stats["overruns"]}/{stats["rounds"]} rounds overrun)'
+            )
@@ -0,0 +1,156 @@
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+PATH_SEPARATOR = '.'
+
+_MISSING = object()
+
+# Field declarations accepted by compile_schema(): a dotted path, a type, or both
+FieldDecl = Union[str, Callable, Tuple[str, Optional[Callable]], 'Field']
+
+
+def split_path(path: str) -> Tuple[str, ...]:
+    return tuple(path.split(PATH_SEPARATOR))
+
+
+def get_path(data: Optional[Mapping[str, Any]], path: Union[str, Tuple[str, ...]],
+             default: Any = None) -> Any:
+    """
+    Returns the value at a dotted path (e.g. `pose.position.x`) of nested
+    mappings, or default if a level is missing.
+    """
+    keys = split_path(path) if isinstance(path, str) else path
+    for key in keys:
+        try:
+            data = data.get(key, _MISSING)
+        except AttributeError:
+            return default
+        if data is _MISSING:
+            return default
+    return data
+
+
+class Field:
+    """
+    Attribute extracted from a message.
+
+    Args:
+        name: Name of the attribute.
+        path: Dotted path of the value in the message. Defaults to name.
+        type: Callable converting the value, e.g. float. None keeps the value as is.
+    """
+
+    __slots__ = ('name', 'path', 'keys', 'type')
+
+    def __init__(self, name: str, path: Optional[str] = None,
+                 type: Optional[Callable] = None):
+        self.name = name
+        self.path = path or name
+        self.keys = split_path(self.path)
+        self.type = type
+
+    def __repr__(self) -> str:
+        type_name = getattr(self.type, '__name__', self.type)
+        return f'Field({self.name}, path={self.path}, type={type_name})'
+
+
+class SchemaError(ValueError):
+    """A message field does not match the type declared in the schema."""
+
+
+class Schema:
+    """
+    Compiled set of fields extracted from every message of an entity.
+
+    Paths are split once, at compile time, so extracting a field is a fixed
+    sequence of lookups. `extract` flattens a message into the declared
+    attributes in a single pass, converting values to their declared type.
+
+    Args:
+        fields: The fields of the schema.
+    """
+
+    def __init__(self, fields: Iterable[Field]):
+        self._fields: List[Field] = list(fields)
+        names = [f.name for f in self._fields]
+        if len(set(names)) != len(names):
+            raise ValueError(f'Duplicate attribute names in schema: {names}')
+        # Top-level message keys read by the schema
+        self.roots = frozenset(f.keys[0] for f in self._fields)
+
+    @property
+    def fields(self) -> List[Field]:
+        return self._fields
+
+    @property
+    def names(self) -> List[str]:
+        return [f.name for f in self._fields]
+
+    def extract(self, msg: Mapping[str, Any], strict: bool = False) -> Dict[str, Any]:
+        """
+        Returns the values of the fields present in msg, by attribute name.
+
+        Args:
+            msg: The message.
+            strict: Raise SchemaError for values that cannot be converted to
+                their declared type, instead of skipping them.
+        """
+        values = {}
+        for field in self._fields:
+            value = msg
+            for key in field.keys:
+                try:
+                    value = value.get(key, _MISSING)
+                except AttributeError:
+                    # A level of the path is not a mapping
+                    value = _MISSING
+                if value is _MISSING:
+                    break
+            if value is _MISSING:
+                continue
+            if value is not None and field.type is not None and type(value) is not field.type:
+                try:
+                    value = field.type(value)
+                except (TypeError, ValueError):
+                    if strict:
+                        raise SchemaError(f'Invalid value for <{field.path}>: {value!r}')
+                    continue
+            values[field.name] = value
+        return values
+
+    def __repr__(self) -> str:
+        return f'Schema({self._fields})'
+
+
+def compile_schema(spec: Union[Schema, Mapping[str, FieldDecl], Iterable[FieldDecl]]) -> Schema:
+    """
+    Compiles an attribute schema.
+
+    Args:
+        spec: A Schema, returned as is, a list of dotted paths or Fields, or a
+            mapping of attribute names to a dotted path, a type, or a
+            (path, type) tuple.
+
+    Usage:
+        compile_schema({'x': ('pose.position.x', float), 'battery': float})
+        compile_schema(['pose.position.x', 'pose.position.y'])
+    """
+    if isinstance(spec, Schema):
+        return spec
+    fields = []
+    if isinstance(spec, Mapping):
+        for name, decl in spec.items():
+            if isinstance(decl, Field):
+                fields.append(decl)
+            elif isinstance(decl, str):
+                fields.append(Field(name, decl))
+            elif isinstance(decl, tuple):
+                path, ftype = decl
+                fields.append(Field(name, path, ftype))
+            elif decl is None or callable(decl):
+                fields.append(Field(name, type=decl))
+            else:
+                raise ValueError(f'Invalid schema declaration for <{name}>: {decl!r}')
+    else:
+        for decl in spec:
+            fields.append(decl if isinstance(decl, Field) else Field(decl))
+    return Schema(fields)
@@ -0,0 +1,104 @@
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from goalee.clock import get_clock
+
+
+class TickStats:
+    """
+    Tick statistics of a goal: number of evaluations, ticks skipped because no
+    input changed, achieved tick rate, tick jitter and missed tick deadlines,
+    and the latency between the last entity update and the verdict of the goal.
+
+    Jitter is the delay between the time a tick was due and the time it ran.
+    A deadline is missed when a tick runs more than a full period late, in
+    which case the skipped ticks are counted and not run.
+    """
+
+    # Number of recent jitter samples kept to compute percentiles
+    JITTER_SAMPLES = 1024
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ticks: int = 0
+        self.skipped: int = 0
+        self.missed_deadlines: int = 0
+        self.ts_first: Optional[float] = None
+        self.ts_last: Optional[float] = None
+        self.max_jitter: float = 0.0
+        self.verdict_latency: Optional[float] = None
+        self._jitter = deque(maxlen=self.JITTER_SAMPLES)
+
+    def _on_slot(self, ts: float, ts_due: Optional[float]):
+        if self.ts_first is None:
+            self.ts_first = ts
+        self.ts_last = ts
+        if ts_due is not None:
+            jitter = max(ts - ts_due, 0.0)
+            self._jitter.append(jitter)
+            if jitter > self.max_jitter:
+                self.max_jitter = jitter
+
+    def on_tick(self, ts: Optional[float] = None, ts_due: Optional[float] = None):
+        """Records an evaluation, run at ts and due at ts_due (monotonic timestamps)."""
+        ts = get_clock().monotonic() if ts is None else ts
+        self._on_slot(ts, ts_due)
+        self.ticks += 1
+
+    def on_skip(self, ts: Optional[float] = None, ts_due: Optional[float] = None):
+        """Records a tick skipped because none of the inputs of the goal changed."""
+        ts = get_clock().monotonic() if ts is None else ts
+        self._on_slot(ts, ts_due)
+        self.skipped += 1
+
+    def on_missed(self, count: int = 1):
+        self.missed_deadlines += count
+
+    def on_verdict(self, ts_last_input: float, ts: Optional[float] = None):
+        """Records the delay between the last input (monotonic timestamp) and the verdict."""
+        if ts_last_input is None or ts_last_input < 0:
+            return
+        ts = get_clock().monotonic() if ts is None else ts
+        self.verdict_latency = max(ts - ts_last_input, 0.0)
+
+    def _rate(self, count: int) -> float:
+        if self.ts_first is None or self.ts_last == self.ts_first:
+            return 0.0
+        return count / (self.ts_last - self.ts_first)
+
+    @property
+    def achieved_rate(self) -> float:
+        """Achieved tick rate in Hz, counting skipped ticks."""
+        return self._rate(self.ticks + self.skipped - 1)
+
+    @property
+    def effective_rate(self) -> float:
+        """Rate of evaluations in Hz."""
+        return self._rate(self.ticks - 1) if self.ticks >= 2 else 0.0
+
+    def jitter_percentiles(self, *pcts: float) -> List[Optional[float]]:
+        """Returns the given percentiles (0-100) of recent tick jitter, in seconds."""
+        if len(self._jitter) == 0:
+            return [None] * len(pcts)
+        samples = sorted(self._jitter)
+        n = len(samples)
+        return [samples[min(int(round(pct / 100.0 * (n - 1))), n - 1)] for pct in pcts]
+
+    def serialize(self) -> Dict[str, Any]:
+        p50, p95, p99 = self.jitter_percentiles(50, 95, 99)
+        return {
+            'ticks': self.ticks,
+            'skipped': self.skipped,
+            'achieved_rate': self.achieved_rate,
+            'effective_rate': self.effective_rate,
+            'missed_deadlines': self.missed_deadlines,
+            'jitter': {
+                'p50': p50,
+                'p95': p95,
+                'p99': p99,
+                'max': self.max_jitter,
+            },
+            'verdict_latency': self.verdict_latency,
+        }
@@ -0,0 +1,118 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Optional
+
+from goalee.logging import default_logger as logger
+
+
+class Deadline:
+    """Handle of a callback scheduled on a DeadlineScheduler."""
+
+    __slots__ = ('when', 'callback', 'cancelled', 'fired', '_scheduler')
+
+    def __init__(self, when: float, callback: Callable, scheduler: 'DeadlineScheduler'):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+        self.fired = False
+        self._scheduler = scheduler
+
+    def cancel(self) -> None:
+        self._scheduler._cancel(self)
+
+    def remaining(self) -> float:
+        return max(self.when - self._scheduler.monotonic(), 0.0)
+
+
+class DeadlineScheduler:
+    """
+    Heap of deadlines served by a single daemon thread.
+
+    The thread sleeps until the earliest pending deadline and fires its callback,
+    so the cost of tracking timeouts does not depend on how many goals are running.
+    Callbacks run on the scheduler thread and must return quickly.
+    """
+
+    def __init__(self, name: str = 'goalee-deadlines'):
+        self._name = name
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._n_cancelled = 0
+
+    def call_later(self, delay: float, callback: Callable) -> Deadline:
+        """
+        Schedules callback to be called after delay seconds.
+
+        Returns:
+            Deadline: Handle which can be used to cancel the callback.
+        """
+        deadline = Deadline(time.monotonic() + max(delay, 0.0), callback, self)
+        with self._cond:
+            heapq.heappush(self._heap, (deadline.when, next(self._counter), deadline))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name,
+                                                daemon=True)
+                self._thread.start()
+            if self._heap[0][2] is deadline:
+                self._cond.notify()
+        return deadline
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap) - self._n_cancelled
+
+    def _cancel(self, deadline: Deadline):
+        with self._cond:
+            if deadline.cancelled or deadline.fired:
+                return
+            deadline.cancelled = True
+            self._n_cancelled += 1
+            # Lazily drop cancelled entries once they dominate the heap
+            if self._n_cancelled > 64 and self._n_cancelled > len(self._heap) // 2:
+                self._heap = [e for e in self._heap if not e[2].cancelled]
+                heapq.heapify(self._heap)
+                self._n_cancelled = 0
+
+    def _next_expired(self) -> Deadline:
+        with self._cond:
+            while True:
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+                    self._n_cancelled -= 1
+                if len(self._heap) == 0:
+                    self._cond.wait()
+                    continue
+                timeout = self._heap[0][0] - time.monotonic()
+                if timeout <= 0:
+                    deadline = heapq.heappop(self._heap)[2]
+                    deadline.fired = True
+                    return deadline
+                self._cond.wait(timeout)
+
+    def _run(self):
+        while True:
+            deadline = self._next_expired()
+            try:
+                deadline.callback()
+            except Exception as e:
+                logger.error(f'[DeadlineScheduler] Error in deadline callback: {e}')
+
+
+_default_scheduler: Optional[DeadlineScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_deadline_scheduler() -> DeadlineScheduler:
+    """Returns the process-wide deadline scheduler used by goals."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = DeadlineScheduler()
+        return _default_scheduler
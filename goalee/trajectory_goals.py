@@ -22,6 +22,9 @@ class WaypointTrajectoryGoal(Goal):
         self._deviation = deviation
         self._waypoints_reached_map = [False] * len(waypoints)
 
+    def infer_dependencies(self):
+        return {self._entity.name: ('position', 'position.x', 'position.y', 'position.z')}
+
     def on_enter(self):
         self.log_debug(
             f'Starting PositionGoal <{self._name}> with params:\n'
@@ -38,26 +41,31 @@ class WaypointTrajectoryGoal(Goal):
                 return self._waypoints[i], i
 
     def check_reached_waypoint(self):
-        if self._last_state.get('position', None) is None:
-            return
-        pos = self._last_state['position']
-        if pos.get('x', 'None') is None and pos.get('y', 'None') is None \
-            and pos.get('z', 'None') is None:
+        # Nested position values, or attributes extracted by a schema
+        x = self._last_state.get_attr('position.x')
+        y = self._last_state.get_attr('position.y')
+        z = self._last_state.get_attr('position.z')
+        if x is None or y is None or z is None:
+            if x is None and y is None and z is None and \
+                    self._last_state.attributes.get('position') is not None:
                 self.log_warning('Received invalid position values for x,y,z')
-                return
+            return
         current_target, idx = self.current_target_waypoint()
-        reached = (pos['x'] > (current_target.x - self._deviation) and \
-                   pos['x'] < (current_target.x + self._deviation) and \
-                   pos['y'] > (current_target.y - self._deviation) and \
-                   pos['y'] < (current_target.y + self._deviation) and \
-                   pos['z'] > (current_target.z - self._deviation) and \
-                   pos['z'] < (current_target.z + self._deviation))
+        reached = (x > (current_target.x - self._deviation) and \
+                   x < (current_target.x + self._deviation) and \
+                   y > (current_target.y - self._deviation) and \
+                   y < (current_target.y + self._deviation) and \
+                   z > (current_target.z - self._deviation) and \
+                   z < (current_target.z + self._deviation))
         if reached:
             self.log_info(f'Reached waypoint {idx}')
             self._waypoints_reached_map[idx] = True
 
+    def on_reset(self):
+        self._waypoints_reached_map = [False] * len(self._waypoints)
+
     def tick(self):
-        self._last_state = self._entity.attributes.copy()
+        self._last_state = self.view(self._entity)
         self.check_reached_waypoint()
         if all(self._waypoints_reached_map):
             self.set_state(GoalState.COMPLETED)
@@ -0,0 +1,107 @@
+"""Fakes and factories shared by the tests."""
+
+from commlib.node import NodeState
+
+from goalee.entity import Entity
+
+
+class FakeSubscriber:
+    """Subscriber of a `FakeNode`, which never receives from a broker."""
+
+    def __init__(self, topic, on_message, pattern=False):
+        self.topic = topic
+        self.on_message = on_message
+        self.pattern = pattern
+        self.running = False
+        self.stopped = False
+
+    def run(self, wait=True):
+        self.running = True
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakePublisher:
+    """Publisher of a `FakeNode`, which records the published messages."""
+
+    def __init__(self, topic):
+        self.topic = topic
+        self.messages = []
+
+    def run(self, wait=True):
+        pass
+
+    def publish(self, msg):
+        self.messages.append(msg)
+
+
+class FakeNode:
+    """
+    Transport node that never connects to a broker, and records the endpoints
+    it creates. Takes the place of a commlib Node.
+    """
+
+    def __init__(self, **kwargs):
+        self.state = NodeState.IDLE
+        self._subscribers = []
+        self._publishers = []
+
+    def run(self, wait=True):
+        self.state = NodeState.RUNNING
+
+    def stop(self):
+        self.state = NodeState.STOPPED
+
+    def create_subscriber(self, topic, on_message, **kwargs):
+        sub = FakeSubscriber(topic, on_message)
+        self._subscribers.append(sub)
+        return sub
+
+    def create_psubscriber(self, topic, on_message, **kwargs):
+        sub = FakeSubscriber(topic, on_message, pattern=True)
+        self._subscribers.append(sub)
+        return sub
+
+    def create_publisher(self, topic, **kwargs):
+        pub = FakePublisher(topic)
+        self._publishers.append(pub)
+        return pub
+
+
+class OfflineEntity(Entity):
+    """Entity started and stopped without a broker, which counts its starts and stops."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.n_starts = 0
+        self.n_stops = 0
+
+    def start(self, wait: bool = True, timeout=None) -> bool:
+        if not self._started:
+            self._started = True
+            self.n_starts += 1
+        return True
+
+    def stop(self) -> None:
+        if self._started:
+            self._started = False
+            self.n_stops += 1
+
+    @property
+    def ready(self) -> bool:
+        return self._started
+
+
+def make_entity(attributes, name='robot', entity_type=Entity, **kwargs):
+    """
+    Returns an entity that is not connected to a broker, which tests feed
+    with `update_state` or `ingest`.
+
+    Args:
+        attributes: The attributes of the entity.
+        name: Name and type of the entity, and prefix of its topic.
+        entity_type: The entity class.
+        **kwargs: Other arguments of the entity.
+    """
+    return entity_type(name, name, f'{name}.topic', list(attributes), **kwargs)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.adaptive`."""
+
+import unittest
+
+from goalee.adaptive import AdaptiveTickRate
+from goalee.entity_goals import EntityStateCondition
+
+from tests.helpers import make_entity
+
+
+class TestAdaptiveTickRate(unittest.TestCase):
+
+    def setUp(self):
+        self.entity = make_entity(['a', 'b'])
+        self.rate = AdaptiveTickRate(min_hz=1.0, max_hz=100.0, backoff=2.0)
+
+    def test_backs_off_on_repeated_values(self):
+        deps = [(self.entity, None)]
+        self.entity.update_state({'a': 1, 'b': 1})
+        first = self.rate.next_period(deps, [])
+        periods = []
+        for _ in range(4):
+            # Same values, new messages
+            self.entity.update_state({'a': 1, 'b': 1})
+            periods.append(self.rate.next_period(deps, []))
+        self.assertEqual(periods, [first * 2, first * 4, first * 8, first * 16])
+        self.entity.update_state({'a': 2, 'b': 1})
+        self.assertLess(self.rate.next_period(deps, []), periods[-1])
+
+    def test_limited_to_dependencies(self):
+        deps = [(self.entity, frozenset({'a'}))]
+        self.rate.next_period(deps, [])
+        period = self.rate.next_period(deps, [])
+        self.entity.update_state({'a': None, 'b': 5})
+        self.assertEqual(self.rate.next_period(deps, []), period * 2)
+        self.entity.update_state({'a': 3, 'b': 5})
+        self.assertLess(self.rate.next_period(deps, []), period * 4)
+
+    def test_bounds(self):
+        deps = [(self.entity, None)]
+        for _ in range(20):
+            period = self.rate.next_period(deps, [])
+        self.assertEqual(period, 1.0)
+
+    def test_count_changes(self):
+        entity = make_entity(['pose'], schema={'position.x': ('pose.position.x', float)})
+        entity.update_state({'pose': {'position': {'x': 1.0}, 'theta': 0.0}})
+        entity.update_state({'pose': {'position': {'x': 1.0}, 'theta': 0.5}})
+        # Attribute of the schema, only changed by the first message
+        self.assertEqual(AdaptiveTickRate.count_changes([(entity, ['position.x'])]), 1)
+        # Dotted path of the pose attribute, changed by both
+        self.assertEqual(AdaptiveTickRate.count_changes([(entity, ['pose.theta'])]), 2)
+        self.assertEqual(AdaptiveTickRate.count_changes([(entity, ['unknown.x'])]), 0)
+
+    def test_goal_dependencies(self):
+        goal = EntityStateCondition(entities=[self.entity],
+                                    condition="entities['robot'].attributes['a'] > 1")
+        goal.set_track_dependencies(True)
+        goal.set_adaptive_tick_rate(1.0, 100.0)
+        goal.tick_period()
+        period = goal.tick_period()
+        self.entity.update_state({'b': 1})
+        self.assertEqual(goal.tick_period(), period * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.batch`."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from goalee.batch import BatchRunner, main
+from goalee.goal import Goal, GoalState
+from goalee.scenario import Scenario
+
+
+class InstantGoal(Goal):
+    """Goal that is accomplished on its first tick."""
+
+    def on_enter(self):
+        pass
+
+    def tick(self):
+        self.set_state(GoalState.COMPLETED)
+
+    def on_exit(self):
+        pass
+
+
+def create_scenario():
+    return Scenario('trivial', goals=[InstantGoal(name='instant', max_duration=1)])
+
+
+def broken_scenario():
+    raise RuntimeError('broken factory')
+
+
+class TestBatchRunner(unittest.TestCase):
+
+    def test_run(self):
+        factories = ['tests.test_batch:create_scenario', 'tests.test_batch:broken_scenario']
+        reported = []
+        results = BatchRunner(factories, workers=2, on_result=reported.append).run()
+        self.assertEqual(len(reported), 2)
+        ok, failed = results
+        self.assertTrue(ok.ok)
+        self.assertEqual(ok.name, 'trivial')
+        self.assertEqual(ok.score, 1.0)
+        self.assertEqual(ok.goals, [('instant', 'COMPLETED')])
+        self.assertNotEqual(ok.worker_pid, os.getpid())
+        self.assertEqual(failed.error, 'RuntimeError: broken factory')
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            BatchRunner(['tests.test_batch'], mode='parallel')
+
+
+class TestMain(unittest.TestCase):
+
+    def test_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'results.json')
+            factory = f'{os.path.abspath(__file__)}:create_scenario'
+            for mode in ('concurrent', 'seq', 'async'):
+                self.assertEqual(main([factory, '-w', '1', '-m', mode, '-o', output]), 0)
+                with open(output) as f:
+                    report = json.load(f)
+                self.assertEqual(report['summary']['scenarios'], 1)
+                self.assertEqual(report['summary']['errors'], 0)
+                self.assertEqual(report['results'][0]['goals'], [['instant', 'COMPLETED']])
+
+    def test_errors(self):
+        self.assertEqual(main(['tests.test_batch:broken_scenario', '-w', '1']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.buffers`."""
+
+import unittest
+from collections import deque
+
+from goalee.buffers import RingBuffer, TimeWindow
+
+
+class TestRingBuffer(unittest.TestCase):
+
+    def test_wraparound(self):
+        for maxlen in (1, 2, 5):
+            buff = RingBuffer(maxlen)
+            expected = deque(maxlen=maxlen)
+            for i in range(3 * maxlen + 2):
+                buff.append(i, ts=i / 10)
+                expected.append(float(i))
+                self.assertEqual(buff.tolist(), list(expected))
+                self.assertEqual(list(buff.timestamps()), [v / 10 for v in expected])
+                self.assertEqual(buff.last(), float(i))
+                self.assertEqual(len(buff), len(expected))
+                self.assertEqual(buff.full, len(expected) == maxlen)
+                for n in range(maxlen + 2):
+                    last = list(expected)[len(expected) - min(n, len(expected)):]
+                    self.assertEqual(buff.tolist(n), last)
+
+    def test_views(self):
+        buff = RingBuffer(3)
+        for value in (1, 2, 3, 4):
+            buff.append(value)
+        view = buff.view()
+        self.assertTrue(view.contiguous)
+        self.assertEqual(view.tolist(), [2.0, 3.0, 4.0])
+        self.assertEqual(buff.view(-1).tolist(), [])
+        self.assertEqual(buff.zeros(5).tolist(), [0.0, 0.0, 0.0])
+        self.assertEqual(list(buff), [2.0, 3.0, 4.0])
+
+    def test_clear(self):
+        buff = RingBuffer(3)
+        with self.assertRaises(IndexError):
+            buff.last()
+        buff.append(1)
+        buff.clear()
+        self.assertEqual(buff.tolist(), [])
+        buff.append(2)
+        self.assertEqual(buff.tolist(), [2.0])
+
+    def test_non_numeric(self):
+        buff = RingBuffer(3)
+        with self.assertRaises(ValueError):
+            buff.append('n/a')
+        with self.assertRaises(TypeError):
+            buff.append(None)
+        self.assertEqual(len(buff), 0)
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+
+
+class TestTimeWindow(unittest.TestCase):
+
+    def test_eviction_boundary(self):
+        window = TimeWindow(2.0)
+        for ts in (0.0, 1.0, 1.0, 2.0):
+            window.append(ts, ts=ts)
+        # The cutoff now - window is still in the window
+        window.evict(2.0)
+        self.assertEqual(window.timestamps(), [0.0, 1.0, 1.0, 2.0])
+        window.evict(2.5)
+        self.assertEqual(window.timestamps(), [1.0, 1.0, 2.0])
+        # Duplicate timestamps at the cutoff are all kept, then all evicted
+        window.append(3.0, ts=3.0)
+        self.assertEqual(window.timestamps(), [1.0, 1.0, 2.0, 3.0])
+        window.evict(3.5)
+        self.assertEqual(window.values(), [2.0, 3.0])
+        self.assertEqual(window.stats.count, 2)
+        self.assertEqual(window.duration, 1.0)
+        window.evict(10.0)
+        self.assertEqual(len(window), 0)
+        self.assertEqual(window.duration, 0.0)
+        with self.assertRaises(IndexError):
+            window.last()
+
+    def test_queries(self):
+        window = TimeWindow(10.0)
+        for ts in range(6):
+            window.append(ts * 10, ts=float(ts))
+        self.assertEqual(window.range(1.0, 3.0), ([1.0, 2.0, 3.0], [10, 20, 30]))
+        self.assertEqual(window.range(1.5, 2.5), ([2.0], [20]))
+        self.assertEqual(window.range(6.0, 9.0), ([], []))
+        self.assertEqual(window.values(seconds=2.0), [30, 40, 50])
+        self.assertEqual(window.values(seconds=2.0, now=4.0), [20, 30, 40, 50])
+        self.assertEqual(window.values(seconds=2.0, n=2), [40, 50])
+        self.assertEqual(window.timestamps(n=0), [])
+        self.assertEqual(window.last(), 50)
+
+    def test_maxlen(self):
+        window = TimeWindow(100.0, maxlen=3)
+        for ts in range(5):
+            window.append(ts, ts=float(ts))
+        self.assertEqual(window.values(), [2, 3, 4])
+        self.assertEqual((window.stats.min, window.stats.max), (2.0, 4.0))
+        with self.assertRaises(ValueError):
+            TimeWindow(1.0, maxlen=0)
+        with self.assertRaises(ValueError):
+            TimeWindow(0.0)
+
+    def test_compaction(self):
+        window = TimeWindow(10.0)
+        expected = deque()
+        for i in range(500):
+            ts = i / 4
+            window.append(i, ts=ts)
+            expected.append((ts, i))
+            while expected[0][0] < ts - 10.0:
+                expected.popleft()
+            self.assertEqual(window.values(), [v for _, v in expected])
+            self.assertEqual(window.stats.count, len(expected))
+        # Evicted entries do not pile up
+        self.assertLess(len(window._ts), 2 * len(expected) + 64)
+        self.assertEqual(window.stats.mean, sum(v for _, v in expected) / len(expected))
+        self.assertEqual(window.range(120.0, 121.0), ([120.0, 120.25, 120.5, 120.75, 121.0],
+                                                      [480, 481, 482, 483, 484]))
+
+    def test_non_numeric(self):
+        window = TimeWindow(1.0)
+        window.append(1, ts=0.0)
+        window.append('n/a', ts=0.5)
+        self.assertIsNone(window.stats)
+        self.assertEqual(window.values(), [1, 'n/a'])
+        window.evict(1.2)
+        self.assertEqual(window.values(), ['n/a'])
+        window.clear()
+        self.assertEqual(len(window), 0)
+        window.append(2, ts=2.0)
+        self.assertEqual(window.stats.count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.clock`."""
+
+import threading
+import time
+import unittest
+
+from goalee.clock import VirtualClock
+
+
+class TestVirtualClock(unittest.TestCase):
+
+    def start_sleeper(self, clock, work):
+        # Sleeps 1 second of virtual time, then works for `work` real seconds
+        # before sleeping on the clock again
+        done = []
+
+        def run():
+            clock.sleep(1.0)
+            time.sleep(work)
+            done.append(clock.time())
+            clock.idle()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        # Until the thread waits on the clock
+        while not clock._waiters:
+            time.sleep(0.001)
+        return thread, done
+
+    def test_waits_for_woken_goals(self):
+        clock = VirtualClock()
+        thread, done = self.start_sleeper(clock, 0.2)
+        clock.advance_to(5.0)
+        # The clock did not move on before the woken thread was idle
+        self.assertEqual(done, [1.0])
+        self.assertEqual(clock.time(), 5.0)
+        thread.join()
+
+    def test_settle_timeout(self):
+        clock = VirtualClock(settle_timeout=0.05)
+        thread, done = self.start_sleeper(clock, 0.3)
+        with self.assertRaises(TimeoutError):
+            clock.advance_to(5.0)
+        thread.join()
+        self.assertEqual(done, [1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
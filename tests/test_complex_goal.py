@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+"""Tests for the short-circuit of `goalee.complex_goal` and `goalee.executor`."""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from goalee.complex_goal import ComplexGoal, ComplexGoalAlgorithm
+from goalee.executor import GoalExecutor, get_goal_executor
+from goalee.goal import Goal, GoalState
+
+# Duration of the goals a decided complex goal must not wait for
+SLOW = 5.0
+
+
+class FixedGoal(Goal):
+    """Goal reaching a fixed state after a delay."""
+
+    def __init__(self, outcome: GoalState, delay: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.outcome = outcome
+        self.delay = delay
+        self.entered = False
+        self.set_tick_freq(100)
+
+    def on_enter(self):
+        self.entered = True
+
+    def tick(self):
+        if self.get_current_elapsed() >= self.delay:
+            self.set_state(self.outcome)
+
+
+def fast(outcome=GoalState.COMPLETED, delay=0.0):
+    return FixedGoal(outcome, delay)
+
+
+def slow(outcome=GoalState.COMPLETED):
+    return FixedGoal(outcome, SLOW)
+
+
+class TestVerdictDecided(unittest.TestCase):
+
+    def decided(self, algorithm, n_goals, n_completed, n_finished, accomplished=None):
+        goal = ComplexGoal(algorithm=algorithm, accomplished=accomplished)
+        for _ in range(n_goals):
+            goal.add_goal(fast())
+        return goal._verdict_decided(n_completed, n_finished)
+
+    def test_all_accomplished(self):
+        for algorithm in (ComplexGoalAlgorithm.ALL_ACCOMPLISHED,
+                          ComplexGoalAlgorithm.ALL_ACCOMPLISHED_ORDERED):
+            self.assertFalse(self.decided(algorithm, 3, 2, 2))
+            self.assertTrue(self.decided(algorithm, 3, 1, 2))
+
+    def test_none_accomplished(self):
+        self.assertFalse(self.decided(ComplexGoalAlgorithm.NONE_ACCOMPLISHED, 3, 0, 2))
+        self.assertTrue(self.decided(ComplexGoalAlgorithm.NONE_ACCOMPLISHED, 3, 1, 1))
+
+    def test_at_least_one_accomplished(self):
+        self.assertFalse(self.decided(ComplexGoalAlgorithm.AT_LEAST_ONE_ACCOMPLISHED, 3, 0, 2))
+        self.assertTrue(self.decided(ComplexGoalAlgorithm.AT_LEAST_ONE_ACCOMPLISHED, 3, 1, 1))
+
+    def test_exactly_x_accomplished(self):
+        for algorithm in (ComplexGoalAlgorithm.EXACTLY_X_ACCOMPLISHED,
+                          ComplexGoalAlgorithm.EXACTLY_X_ACCOMPLISHED_ORDERED):
+            # Too many completed
+            self.assertTrue(self.decided(algorithm, 4, 2, 2, accomplished=1))
+            # Not enough goals left
+            self.assertTrue(self.decided(algorithm, 4, 0, 3, accomplished=2))
+            self.assertFalse(self.decided(algorithm, 4, 1, 2, accomplished=2))
+            self.assertFalse(self.decided(algorithm, 4, 1, 1, accomplished=1))
+
+    def test_exactly_x_without_target(self):
+        for algorithm in (ComplexGoalAlgorithm.EXACTLY_X_ACCOMPLISHED,
+                          ComplexGoalAlgorithm.EXACTLY_X_ACCOMPLISHED_ORDERED):
+            self.assertFalse(self.decided(algorithm, 3, 2, 2))
+
+
+class TestShortCircuit(unittest.TestCase):
+
+    def run_goal(self, algorithm, children, accomplished=None):
+        goal = ComplexGoal(algorithm=algorithm, accomplished=accomplished)
+        for child in children:
+            goal.add_goal(child)
+        ts_start = time.monotonic()
+        goal.enter()
+        elapsed = time.monotonic() - ts_start
+        self.assertLess(elapsed, SLOW / 2, 'complex goal waited for an undecided child')
+        return goal
+
+    def test_all_accomplished(self):
+        children = [fast(GoalState.FAILED), slow()]
+        goal = self.run_goal(ComplexGoalAlgorithm.ALL_ACCOMPLISHED, children)
+        self.assertEqual(goal.state, GoalState.FAILED)
+        self.assertEqual(children[1].state, GoalState.TERMINATED)
+
+    def test_all_accomplished_ordered(self):
+        children = [fast(GoalState.FAILED), slow()]
+        goal = self.run_goal(ComplexGoalAlgorithm.ALL_ACCOMPLISHED_ORDERED, children)
+        self.assertEqual(goal.state, GoalState.FAILED)
+        self.assertFalse(children[1].entered)
+
+    def test_none_accomplished(self):
+        children = [fast(), slow(GoalState.FAILED)]
+        goal = self.run_goal(ComplexGoalAlgorithm.NONE_ACCOMPLISHED, children)
+        self.assertEqual(goal.state, GoalState.FAILED)
+        self.assertEqual(children[1].state, GoalState.TERMINATED)
+
+    def test_at_least_one_accomplished(self):
+        children = [fast(), slow(GoalState.FAILED)]
+        goal = self.run_goal(ComplexGoalAlgorithm.AT_LEAST_ONE_ACCOMPLISHED, children)
+        self.assertEqual(goal.state, GoalState.COMPLETED)
+        self.assertEqual(children[1].state, GoalState.TERMINATED)
+
+    def test_exactly_x_accomplished(self):
+        children = [fast(), fast(delay=0.05), slow()]
+        goal = self.run_goal(ComplexGoalAlgorithm.EXACTLY_X_ACCOMPLISHED, children,
+                             accomplished=1)
+        self.assertEqual(goal.state, GoalState.FAILED)
+        self.assertEqual(children[2].state, GoalState.TERMINATED)
+
+    def test_exactly_x_accomplished_ordered(self):
+        children = [fast(), fast(), slow()]
+        goal = self.run_goal(ComplexGoalAlgorithm.EXACTLY_X_ACCOMPLISHED_ORDERED, children,
+                             accomplished=1)
+        self.assertEqual(goal.state, GoalState.FAILED)
+        self.assertFalse(children[2].entered)
+
+    def test_exactly_x_without_target(self):
+        for algorithm in (ComplexGoalAlgorithm.EXACTLY_X_ACCOMPLISHED,
+                          ComplexGoalAlgorithm.EXACTLY_X_ACCOMPLISHED_ORDERED):
+            children = [fast(), fast(GoalState.FAILED)]
+            goal = self.run_goal(algorithm, children)
+            self.assertTrue(all(c.state != GoalState.TERMINATED for c in children))
+            self.assertEqual(goal.state, GoalState.FAILED)
+
+    def test_async(self):
+        children = [fast(GoalState.FAILED), slow()]
+        goal = ComplexGoal(algorithm=ComplexGoalAlgorithm.ALL_ACCOMPLISHED)
+        for child in children:
+            goal.add_goal(child)
+        ts_start = time.monotonic()
+        asyncio.run(goal.enter_async())
+        self.assertLess(time.monotonic() - ts_start, SLOW / 2)
+        self.assertEqual(goal.state, GoalState.FAILED)
+        self.assertEqual(children[1].state, GoalState.TERMINATED)
+
+
+class TestGoalBatch(unittest.TestCase):
+
+    def test_runs_pending_inline_when_saturated(self):
+        executor = GoalExecutor(max_workers=2, name='test-goals')
+        threads = set()
+
+        def leaf():
+            time.sleep(0.1)
+            return 1
+
+        def nested():
+            # Both workers wait on their own batch, which could never start
+            # without running its tasks inline
+            threads.add(threading.current_thread().name)
+            batch = executor.batch([leaf, leaf, leaf])
+            return sum(f.result() for f in batch.as_completed(timeout=SLOW))
+
+        try:
+            batch = executor.batch([nested, nested, nested])
+            results = [f.result() for f in batch.as_completed(timeout=SLOW)]
+        finally:
+            executor.shutdown()
+        self.assertEqual(results, [3, 3, 3])
+        self.assertLessEqual(len([t for t in threads if t.startswith('test-goals')]), 2)
+        self.assertIn(threading.current_thread().name, threads)
+
+    def test_nested_complex_goals(self):
+        executor = get_goal_executor()
+        budget = executor.max_workers
+        executor.set_max_workers(2)
+        try:
+            outer = ComplexGoal(algorithm=ComplexGoalAlgorithm.ALL_ACCOMPLISHED)
+            for _ in range(3):
+                inner = ComplexGoal(algorithm=ComplexGoalAlgorithm.ALL_ACCOMPLISHED)
+                for _ in range(3):
+                    inner.add_goal(fast(delay=0.02))
+                outer.add_goal(inner)
+            finished = threading.Event()
+            thread = threading.Thread(target=lambda: (outer.enter(), finished.set()))
+            thread.start()
+            self.assertTrue(finished.wait(SLOW), 'nested complex goals deadlocked')
+            self.assertEqual(outer.state, GoalState.COMPLETED)
+        finally:
+            executor.set_max_workers(budget)
+
+
+if __name__ == '__main__':
+    unittest.main()
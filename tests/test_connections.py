@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.connections` and the RTMonitor of shared nodes."""
+
+import unittest
+from unittest import mock
+
+from commlib.node import NodeState
+
+from goalee.brokers import MQTTBroker
+from goalee.connections import NodePool, enable_shared_nodes, get_node_pool, shared_nodes_enabled
+from goalee.logging import default_logger as logger
+from goalee.rtmonitor import RemoteLogHandler, RTMonitor
+from goalee.scenario import Scenario
+
+from tests.helpers import FakeNode, make_entity
+
+
+class FakeTransportTestCase(unittest.TestCase):
+    """Broker connections are created on fake nodes."""
+
+    def setUp(self):
+        patches = [
+            mock.patch('goalee.connections.Node', FakeNode),
+            mock.patch('goalee.connections.connection_params', lambda broker, **kwargs: None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        shared = shared_nodes_enabled()
+        enable_shared_nodes(True)
+        self.addCleanup(enable_shared_nodes, shared)
+        self.addCleanup(get_node_pool().clear)
+
+
+class TestNodePool(FakeTransportTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.pool = NodePool()
+
+    def test_one_connection_per_broker(self):
+        conn = self.pool.acquire(MQTTBroker())
+        self.assertIs(self.pool.acquire(MQTTBroker()), conn)
+        self.assertIs(self.pool.get_connection(MQTTBroker()), conn)
+        self.assertIsNot(self.pool.acquire(MQTTBroker(port=1884)), conn)
+        self.assertEqual(len(self.pool), 2)
+        self.assertEqual(self.pool.refcount(MQTTBroker()), 2)
+        self.assertEqual(self.pool.refcount(MQTTBroker(port=1884)), 1)
+
+    def test_stop_on_last_release(self):
+        conn = self.pool.acquire(MQTTBroker())
+        self.pool.acquire(MQTTBroker())
+        conn.run()
+        self.pool.release(MQTTBroker())
+        self.assertEqual(conn.node.state, NodeState.RUNNING)
+        self.assertEqual(len(self.pool), 1)
+        self.pool.release(MQTTBroker())
+        self.assertEqual(conn.node.state, NodeState.STOPPED)
+        self.assertEqual(len(self.pool), 0)
+        # Releasing more than acquired is a no-op
+        self.pool.release(MQTTBroker())
+        self.assertIsNot(self.pool.acquire(MQTTBroker()), conn)
+
+    def test_keep_idle(self):
+        self.pool.set_keep_idle(True)
+        conn = self.pool.acquire(MQTTBroker())
+        conn.run()
+        self.pool.release(MQTTBroker())
+        self.assertEqual(conn.node.state, NodeState.RUNNING)
+        self.assertIs(self.pool.acquire(MQTTBroker()), conn)
+        self.pool.clear()
+        self.assertEqual(conn.node.state, NodeState.STOPPED)
+        self.assertEqual(self.pool.refcount(MQTTBroker()), 0)
+
+
+class TestSharedConnection(FakeTransportTestCase):
+
+    def make_entity(self, name):
+        return make_entity(['x'], name=name, source=MQTTBroker())
+
+    def test_entities(self):
+        a, b = self.make_entity('a'), self.make_entity('b')
+        a.start(wait=False)
+        b.start(wait=False)
+        pool = get_node_pool()
+        conn = pool.get_connection(MQTTBroker())
+        self.assertEqual(len(pool), 1)
+        self.assertEqual(pool.refcount(MQTTBroker()), 2)
+        self.assertEqual(conn.topics, ['a.topic', 'b.topic'])
+        self.assertEqual(conn.node.state, NodeState.RUNNING)
+        a.stop()
+        self.assertEqual(conn.topics, ['b.topic'])
+        self.assertEqual(conn.node.state, NodeState.RUNNING)
+        b.stop()
+        self.assertEqual(conn.node.state, NodeState.STOPPED)
+        self.assertEqual(len(pool), 0)
+
+    def test_scenario(self):
+        entity = self.make_entity('a')
+        entity.start(wait=False)
+        scenario = Scenario('S', broker=MQTTBroker(), goals=[])
+        pool = get_node_pool()
+        self.assertIs(scenario._node, pool.get_node(MQTTBroker()))
+        self.assertEqual(pool.refcount(MQTTBroker()), 2)
+        entity.stop()
+        self.assertEqual(scenario._node.state, NodeState.RUNNING)
+        scenario.close()
+        self.assertEqual(scenario._node.state, NodeState.STOPPED)
+        self.assertEqual(len(pool), 0)
+
+
+class TestRTMonitor(unittest.TestCase):
+
+    def handlers(self):
+        return [h for h in logger.handlers if isinstance(h, RemoteLogHandler)]
+
+    def test_one_handler_per_node(self):
+        node = FakeNode()
+        first = RTMonitor(node, 'events', 'logs')
+        second = RTMonitor(node, 'events', 'logs')
+        other = RTMonitor(FakeNode(), 'events', 'logs')
+        try:
+            self.assertEqual(len(self.handlers()), 2)
+            # Logs of the shared node go to the last monitor
+            self.assertIs(first._handler, second._handler)
+            self.assertIs(second._handler.rtm, second)
+        finally:
+            second.close()
+            other.close()
+        self.assertEqual(self.handlers(), [])
+        first.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
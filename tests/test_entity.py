@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.entity`."""
+
+import unittest
+
+from tests.helpers import make_entity
+
+
+
+class TestEntitySnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.entity = make_entity(['a', 'b'])
+
+    def test_snapshot_owns_state(self):
+        msg = {'a': 1, 'b': 2}
+        self.entity.update_state(msg)
+        snapshot = self.entity.snapshot
+        msg['a'] = 10
+        msg['c'] = 3
+        self.assertEqual(dict(snapshot.state), {'a': 1, 'b': 2})
+        self.assertEqual(snapshot.attributes['a'], 1)
+        state = {'a': 5}
+        self.entity.state = state
+        state['a'] = 6
+        self.assertEqual(self.entity.state['a'], 5)
+
+    def test_snapshot_read_only(self):
+        self.entity.update_state({'a': 1})
+        with self.assertRaises(TypeError):
+            self.entity.snapshot.state['a'] = 2
+        with self.assertRaises(TypeError):
+            self.entity.snapshot.attributes['a'] = 2
+        with self.assertRaises(TypeError):
+            self.entity.attributes['a'] = 2
+        self.entity.attributes = {'a': 2, 'b': None}
+        self.assertEqual(self.entity.attributes['a'], 2)
+
+    def test_reset(self):
+        version = self.entity.version
+        self.entity.update_state({'a': 1, 'b': 1})
+        self.entity.update_state({'a': 2})
+        self.assertEqual((self.entity.attr_version('a'), self.entity.attr_version('b')), (2, 1))
+        self.entity.reset()
+        self.assertEqual((self.entity.attr_version('a'), self.entity.attr_version('b')), (0, 0))
+        self.assertEqual(dict(self.entity.attributes), {'a': None, 'b': None})
+        self.assertEqual(self.entity.changed_attributes, [])
+        self.assertEqual(self.entity.msg_count, 0)
+        # The snapshot version keeps increasing, goals compare it across runs
+        self.assertGreater(self.entity.version, version)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.entity_goals`."""
+
+import threading
+import time
+import unittest
+
+from goalee.entity_goals import (EntityStateCondition, condition_dependencies,
+                                 condition_time_dependent)
+from goalee.goal import GoalState
+
+from tests.helpers import make_entity
+
+
+class TestConditionDependencies(unittest.TestCase):
+
+    def test_dependencies(self):
+        deps = condition_dependencies(
+            "entities['a'].attributes['x'] > 1 and mean(entities['b'].get_buffer('y', 5)) < 2 "
+            "and entities['a']['z'] == 0")
+        self.assertEqual(deps, {'a': {'x', 'z'}, 'b': {'y'}})
+        self.assertEqual(condition_dependencies("len(entities['a'].attributes) > 1"), {'a': None})
+
+    def test_time_dependent(self):
+        self.assertTrue(condition_time_dependent("max(entities['a'].get_window('x', 2.0)) > 1"))
+        self.assertTrue(condition_time_dependent("len(entities['a'].get_range('x', 0)[0]) > 1"))
+        self.assertTrue(condition_time_dependent("mean(entities['a'].get_history('x')) > 1"))
+        self.assertFalse(condition_time_dependent("mean(entities['a'].get_buffer('x')) > 1"))
+
+
+class TestTimeDependentCondition(unittest.TestCase):
+
+    def setUp(self):
+        self.entity = make_entity(['x', 'y'], name='sensor')
+        self.entity.init_attr_buffer('x', None, window=0.2)
+
+    def make_goal(self, condition):
+        goal = EntityStateCondition([self.entity], condition=condition, max_duration=2.0)
+        goal.set_tick_freq(50)
+        goal.set_event_driven(True)
+        goal.set_track_dependencies(True)
+        return goal
+
+    def test_time_dependent(self):
+        self.assertTrue(self.make_goal("len(entities['sensor'].get_window('x')) == 0")
+                        .time_dependent())
+        # Window buffer read through get_buffer
+        self.assertTrue(self.make_goal("len(entities['sensor'].get_buffer('x')) == 0")
+                        .time_dependent())
+        self.assertFalse(self.make_goal("entities['sensor'].attributes['y'] == 0")
+                         .time_dependent())
+        self.assertFalse(self.make_goal(lambda entities: True).time_dependent())
+
+    def test_completes_without_updates(self):
+        # Only true once the value leaves the window, with no update after it
+        goal = self.make_goal("len(entities['sensor'].get_window('x')) == 0 and "
+                              "entities['sensor'].attributes['x'] is not None")
+        self.entity.update_state({'x': 1.0})
+        ts_start = time.monotonic()
+        goal.enter()
+        self.assertEqual(goal.state, GoalState.COMPLETED)
+        self.assertLess(time.monotonic() - ts_start, 1.0)
+
+
+class TestDottedDependencies(unittest.TestCase):
+
+    def make_goal(self, entity, attr):
+        goal = EntityStateCondition(
+            [entity], condition=f"entities['robot'].get_attr('{attr}') > 1", max_duration=2.0)
+        goal.set_event_driven(True)
+        goal.set_track_dependencies(True)
+        return goal
+
+    def test_published_key(self):
+        entity = make_entity(['pose', 'battery'])
+        goal = self.make_goal(entity, 'pose.x')
+        self.assertEqual(goal.dependencies(), [(entity, frozenset({'pose'}))])
+        # Attributes extracted by a schema keep their dotted name
+        schema_entity = make_entity([], schema={'pose.x': ('pose.position.x', float)})
+        goal = self.make_goal(schema_entity, 'pose.x')
+        self.assertEqual(goal.dependencies(), [(schema_entity, frozenset({'pose.x'}))])
+
+    def test_wakes_on_nested_update(self):
+        entity = make_entity(['pose', 'battery'])
+        goal = self.make_goal(entity, 'pose.x')
+
+        def feed():
+            time.sleep(0.05)
+            entity.update_state({'battery': 5})
+            time.sleep(0.05)
+            entity.update_state({'pose': {'x': 2}})
+
+        threading.Thread(target=feed).start()
+        ts_start = time.monotonic()
+        goal.enter()
+        self.assertEqual(goal.state, GoalState.COMPLETED)
+        self.assertLess(time.monotonic() - ts_start, 1.0)
+        # The first evaluation and the pose update
+        self.assertEqual(goal.tick_stats.ticks, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
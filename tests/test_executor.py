@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.executor`."""
+
+import threading
+import time
+import unittest
+
+from goalee.executor import GoalExecutor
+
+
+class LateExecutor(GoalExecutor):
+    """Completes the future of a task some time after the task has exited."""
+
+    def _run_task(self, fn, *args, **kwargs):
+        delay = super()._run_task(fn, *args, **kwargs)
+        time.sleep(delay)
+        return delay
+
+
+class TestGoalExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = GoalExecutor(max_workers=2, name='test-goals')
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_reuses_workers(self):
+        threads = set()
+
+        def task():
+            threads.add(threading.current_thread().name)
+
+        for _ in range(5):
+            self.executor.batch([task] * 4).wait()
+        self.assertLessEqual(len(threads), 2)
+        self.assertTrue(all(name.startswith('test-goals') for name in threads))
+
+    def test_saturated(self):
+        release = threading.Event()
+        started = threading.Semaphore(0)
+
+        def task():
+            started.release()
+            release.wait(5)
+
+        batch = self.executor.batch([task, task])
+        started.acquire()
+        started.acquire()
+        self.assertTrue(self.executor.saturated)
+        release.set()
+        batch.wait()
+        self.assertFalse(self.executor.saturated)
+
+    def test_cancel_pending(self):
+        release = threading.Event()
+        ran = []
+
+        def blocking():
+            release.wait(5)
+
+        batch = self.executor.batch([blocking, blocking, lambda: ran.append(1)])
+        batch.cancel_pending()
+        release.set()
+        batch.wait()
+        self.assertEqual(ran, [])
+        self.assertTrue(batch.futures[2].cancelled())
+
+    def test_exceptions(self):
+        def failing():
+            raise RuntimeError('failed')
+
+        futures = list(self.executor.batch([failing, lambda: 1]).as_completed())
+        self.assertEqual(len(futures), 2)
+        self.assertEqual(sorted(f.exception() is None for f in futures), [False, True])
+
+    def test_set_max_workers(self):
+        self.executor.set_max_workers(3)
+        self.assertEqual(self.executor.max_workers, 3)
+        self.assertEqual([f.result() for f in self.executor.batch([lambda: 1] * 3).futures],
+                         [1, 1, 1])
+
+    def test_exit_before_completion(self):
+        executor = LateExecutor(max_workers=2, name='test-goals')
+        barrier = threading.Barrier(2)
+
+        def task(delay):
+            barrier.wait(5)
+            return delay
+
+        try:
+            batch = executor.batch([lambda: task(0.05), lambda: task(0.3)])
+            # Both tasks signal their exit before the first future is done
+            ts_start = time.monotonic()
+            batch.wait(timeout=5.0)
+            elapsed = time.monotonic() - ts_start
+        finally:
+            executor.shutdown()
+        self.assertLess(elapsed, 1.0, 'the exit of the second task was missed')
+        self.assertEqual([f.result() for f in batch.futures], [0.05, 0.3])
+
+
+if __name__ == '__main__':
+    unittest.main()
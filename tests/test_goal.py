@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.goal`."""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from goalee.clock import VirtualClock, get_clock, set_clock
+from goalee.entity_goals import EntityStateChange
+from goalee.goal import Goal, GoalState
+from goalee.stats import TickStats
+
+from tests.helpers import make_entity
+
+
+class IdleGoal(Goal):
+    """Goal that never reaches a verdict on its own."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.n_ticks = 0
+
+    def on_enter(self):
+        pass
+
+    def tick(self):
+        self.n_ticks += 1
+
+
+class CountingStateChange(EntityStateChange):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.n_ticks = 0
+
+    def tick(self):
+        self.n_ticks += 1
+        super().tick()
+
+
+class SlowTickGoal(IdleGoal):
+    """Goal whose ticks take `work` seconds of clock time, by tick number."""
+
+    def __init__(self, work, **kwargs):
+        super().__init__(**kwargs)
+        self.work = work
+
+    def tick(self):
+        super().tick()
+        if self.n_ticks in self.work:
+            get_clock().sleep(self.work[self.n_ticks])
+
+
+class TestTickStats(unittest.TestCase):
+
+    def test_jitter_percentiles(self):
+        stats = TickStats()
+        # Jitter of 0, 1, ..., 99 ms, and one tick run ahead of time (no jitter)
+        for i in range(100):
+            stats.on_tick(ts=i + i / 1000.0, ts_due=i)
+        stats.on_tick(ts=99.5, ts_due=100)
+        p50, p95, p99 = stats.jitter_percentiles(50, 95, 99)
+        self.assertAlmostEqual(p50, 0.049)
+        self.assertAlmostEqual(p95, 0.094)
+        self.assertAlmostEqual(p99, 0.098)
+        self.assertAlmostEqual(stats.max_jitter, 0.099)
+
+    def test_no_samples(self):
+        stats = TickStats()
+        stats.on_tick(ts=1.0)
+        self.assertEqual(stats.jitter_percentiles(50, 99), [None, None])
+        self.assertIsNone(stats.serialize()['jitter']['p50'])
+
+    def test_missed_deadlines(self):
+        clock = get_clock()
+        virtual = VirtualClock()
+        set_clock(virtual)
+        try:
+            # Ticks due every 0.125s. The third tick, due at 0.25, runs until
+            # 0.55, so the ticks due at 0.375 and 0.5 are skipped.
+            goal = SlowTickGoal({3: 0.3}, tick_freq=8, max_duration=0.95)
+
+            def run():
+                virtual.end_spawn()
+                goal.enter()
+                virtual.idle()
+
+            virtual.begin_spawn()
+            thread = threading.Thread(target=run)
+            thread.start()
+            virtual.advance_to(2.0)
+            thread.join()
+        finally:
+            set_clock(clock)
+        self.assertEqual(goal.state, GoalState.FAILED)
+        stats = goal.serialize()['tick_stats']
+        # Run at 0, 0.125, 0.25, 0.625, 0.75, 0.875 and on the deadline, at 0.95
+        self.assertEqual(stats['ticks'], 7)
+        self.assertEqual(stats['missed_deadlines'], 2)
+        # Virtual time does not move while a goal waits to be woken up
+        self.assertEqual(stats['jitter'], {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0})
+        self.assertAlmostEqual(stats['achieved_rate'], 6 / 0.95)
+
+
+class TestTerminate(unittest.TestCase):
+
+    def setUp(self):
+        # One tick every 5 seconds
+        self.goal = IdleGoal(tick_freq=0.2)
+
+    def terminate_later(self, delay: float = 0.1):
+        timer = threading.Timer(delay, self.goal.terminate)
+        timer.start()
+        return timer
+
+    def test_terminate_interrupts_wait(self):
+        self.terminate_later()
+        ts_start = time.monotonic()
+        self.goal.enter()
+        self.assertLess(time.monotonic() - ts_start, 1.0)
+        self.assertEqual(self.goal.state, GoalState.TERMINATED)
+        self.assertEqual(self.goal.n_ticks, 1)
+
+    def test_terminate_interrupts_wait_async(self):
+        self.terminate_later()
+        ts_start = time.monotonic()
+        asyncio.run(self.goal.enter_async())
+        self.assertLess(time.monotonic() - ts_start, 1.0)
+        self.assertEqual(self.goal.state, GoalState.TERMINATED)
+        self.assertEqual(self.goal.n_ticks, 1)
+
+
+class TestEnterAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.entity = make_entity(['a'])
+
+    def test_enter_async(self):
+        goal = CountingStateChange(self.entity, max_duration=1.0)
+        goal.set_tick_freq(50)
+
+        async def main():
+            task = asyncio.ensure_future(goal.enter_async())
+            await asyncio.sleep(0.05)
+            self.assertEqual(goal.state, GoalState.RUNNING)
+            self.entity.update_state({'a': 1})
+            return await task
+
+        self.assertIs(asyncio.run(main()), goal)
+        self.assertEqual(goal.state, GoalState.COMPLETED)
+        self.assertGreater(goal._ts_exit, goal._ts_start)
+
+    def test_deadline_async(self):
+        goal = IdleGoal(max_duration=0.1)
+        asyncio.run(goal.enter_async())
+        self.assertEqual(goal.state, GoalState.FAILED)
+
+    def test_cancel(self):
+        goal = CountingStateChange(self.entity, max_duration=5.0)
+        goal.set_event_driven(True)
+
+        async def main():
+            task = asyncio.ensure_future(goal.enter_async())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        # Deadlines and entity listeners of the goal are released
+        self.assertIsNone(goal._deadline)
+        self.assertEqual(self.entity._listeners, ())
+
+
+class TestEventDriven(unittest.TestCase):
+
+    def setUp(self):
+        self.entity = make_entity(['a'])
+
+    def make_goal(self, **kwargs):
+        goal = CountingStateChange(self.entity, **kwargs)
+        # Would spin at 1 kHz if polled
+        goal.set_tick_freq(1000)
+        goal.set_event_driven(True)
+        return goal
+
+    def run_goal(self, goal, updates, delay=0.05):
+        thread = threading.Thread(target=goal.enter)
+        thread.start()
+        for state in updates:
+            time.sleep(delay)
+            self.entity.update_state(state)
+        return thread
+
+    def test_ticks_on_updates(self):
+        goal = self.make_goal(for_duration=10.0)
+        thread = self.run_goal(goal, [{'a': 1}, {'a': 2}, {'a': 3}])
+        time.sleep(0.2)
+        goal.terminate()
+        thread.join()
+        self.assertEqual(goal.state, GoalState.TERMINATED)
+        # The first evaluation, then one per update
+        self.assertEqual(goal.n_ticks, 4)
+        self.assertEqual(goal.tick_stats.ticks, 4)
+
+    def test_ticks_on_hold_expiry(self):
+        goal = self.make_goal(for_duration=0.2, max_duration=2.0)
+        ts_start = time.monotonic()
+        thread = self.run_goal(goal, [{'a': 1}])
+        thread.join()
+        self.assertLess(time.monotonic() - ts_start, 1.0)
+        self.assertEqual(goal.state, GoalState.COMPLETED)
+        # The first evaluation, the update and the end of the hold phase
+        self.assertEqual(goal.n_ticks, 3)
+
+    def test_ticks_on_deadline(self):
+        goal = self.make_goal(max_duration=0.2)
+        self.run_goal(goal, []).join()
+        self.assertEqual(goal.state, GoalState.FAILED)
+        self.assertEqual(goal.n_ticks, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,7 @@
 
 import unittest
 
-from goalee import goalee
+import goalee
 
 
 class TestGoalee(unittest.TestCase):
@@ -18,4 +18,7 @@ class TestGoalee(unittest.TestCase):
         """Tear down test fixtures, if any."""
 
     def test_000_something(self):
-        """Test something."""
+        """Test the public API of the package."""
+        for name in ('Scenario', 'Entity', 'Broker', 'MQTTBroker', 'RedisBroker', 'AMQPBroker'):
+            self.assertTrue(hasattr(goalee, name), name)
+        self.assertIsInstance(goalee.__version__, str)
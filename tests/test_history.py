@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.history` and the attribute history of entities."""
+
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from goalee.history import HistoryFile
+
+from tests.helpers import make_entity
+
+
+def _open_history(path, result):
+    try:
+        HistoryFile(path).close()
+        result.put('opened')
+    except ValueError:
+        result.put('rejected')
+
+
+class TestHistoryFile(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'robot.hist')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_reopen(self):
+        history = HistoryFile(self.path, ['x', 'y'], chunk_records=4)
+        for i in range(10):
+            history.append(float(i), [i, 'n/a' if i == 3 else i * 2])
+        history.close()
+        # Still readable once closed, appends are ignored
+        self.assertEqual(list(history.column('x')), [float(i) for i in range(10)])
+        history.append(10.0, [10, 20])
+        self.assertEqual(len(history), 10)
+
+        history = HistoryFile(self.path)
+        self.assertEqual(history.fields, ['x', 'y'])
+        self.assertEqual(len(history), 10)
+        self.assertTrue(math.isnan(history.column('y')[3]))
+        # Timestamps stay non-decreasing across runs
+        history.append(5.0, [10, 20])
+        history.append(11.0, [11, 22])
+        self.assertEqual(list(history.timestamps(9)), [9.0, 9.0, 11.0])
+        self.assertEqual(list(history.window('x', n=3)), [9.0, 10.0, 11.0])
+        self.assertEqual(history.find(9.0), (9, 12))
+        history.close()
+
+        with self.assertRaises(ValueError):
+            HistoryFile(self.path, ['x', 'z'])
+        self.assertEqual(len(HistoryFile(self.path, ['x', 'y'])), 12)
+
+    def test_single_open(self):
+        history = HistoryFile(self.path, ['x'])
+        with self.assertRaises(ValueError):
+            HistoryFile(self.path, ['x'])
+        ctx = multiprocessing.get_context('spawn')
+        result = ctx.Queue()
+        process = ctx.Process(target=_open_history, args=(self.path, result))
+        process.start()
+        process.join()
+        self.assertEqual(result.get(timeout=5),
+                         'rejected' if os.name == 'posix' else 'opened')
+        history.close()
+        HistoryFile(self.path).close()
+
+
+class TestEntityHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def make_entity(self):
+        entity = make_entity(['x'], history_dir=self.dir)
+        # Started without a broker
+        entity.create_node = lambda: None
+        entity.node = SimpleNamespace(run=lambda: None, stop=lambda: None)
+        return entity
+
+    def test_open_while_started(self):
+        entity = self.make_entity()
+        self.assertIsNone(entity.history)
+        with self.assertRaises(ValueError):
+            entity.get_history('x')
+        entity.start(wait=False)
+        entity.update_state({'x': 1.0})
+        entity.update_state({'x': 2.0})
+        # A second entity with the same name cannot record into the same file
+        with self.assertRaises(ValueError):
+            self.make_entity().start(wait=False)
+        entity.stop()
+        self.assertTrue(entity.history.closed)
+        self.assertEqual(list(entity.get_history('x')), [1.0, 2.0])
+        entity.update_state({'x': 3.0})
+
+        entity.start(wait=False)
+        entity.update_state({'x': 4.0})
+        self.assertEqual(list(entity.get_history('x')), [1.0, 2.0, 4.0])
+        entity.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.ingest` and the fast ingest path of entities."""
+
+import unittest
+
+from goalee.clock import VirtualClock, get_clock, set_clock
+from goalee.ingest import IngestPolicy, RawSerializer, decode
+
+from tests.helpers import make_entity
+
+
+class TestDecode(unittest.TestCase):
+
+    def test_decode(self):
+        expected = {'x': 1, 'pose': {'y': [1.5, None]}, 'name': 'r1'}
+        payload = '{"x": 1, "pose": {"y": [1.5, null]}, "name": "r1"}'
+        self.assertEqual(decode(payload), expected)
+        self.assertEqual(decode(payload.encode()), expected)
+        self.assertEqual(decode(bytearray(payload.encode())), expected)
+        self.assertEqual(decode(memoryview(payload.encode())), expected)
+        self.assertIs(decode(expected), expected)
+
+    def test_invalid(self):
+        for payload in (b'not json', b'{"x": 1', ''):
+            with self.assertRaises(ValueError):
+                decode(payload)
+
+    def test_raw_serializer(self):
+        payload = b'{"x": 1}'
+        self.assertIs(RawSerializer.serialize(payload), payload)
+        self.assertIs(RawSerializer.deserialize(payload), payload)
+
+
+class TestFastIngest(unittest.TestCase):
+
+    def test_keeps_read_keys(self):
+        entity = make_entity(['battery'], fast_ingest=True,
+                             schema={'x': ('pose.position.x', float)})
+        entity.ingest(b'{"battery": 80, "pose": {"position": {"x": 2}}, "image": [1, 2, 3]}')
+        self.assertEqual(dict(entity.state), {'battery': 80, 'pose': {'position': {'x': 2}}})
+        self.assertEqual(entity.attributes['x'], 2.0)
+        self.assertEqual(entity.attributes['battery'], 80)
+        self.assertEqual(entity.msg_count, 1)
+        self.assertEqual(entity.ingest_stats['received'], 1)
+        self.assertEqual(entity.ingest_stats['processed'], 1)
+
+    def test_invalid_message(self):
+        entity = make_entity(['battery'], fast_ingest=True)
+        entity.ingest(b'{"battery": ')
+        self.assertFalse(entity.initialized)
+        self.assertEqual(entity.msg_count, 0)
+        self.assertEqual(entity.ingest_stats['processed'], 0)
+        entity.ingest({'battery': 70})
+        self.assertEqual(entity.attributes['battery'], 70)
+
+    def test_strict(self):
+        entity = make_entity(['battery'], fast_ingest=True,
+                             strict_mode=True)
+        # Validated as a whole, unknown keys are not dropped before
+        entity.ingest(b'{"battery": 80, "image": []}')
+        self.assertFalse(entity.initialized)
+        entity.ingest(b'{"battery": 80}')
+        self.assertEqual(entity.attributes['battery'], 80)
+
+
+class TestIngestPolicy(unittest.TestCase):
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            IngestPolicy('newest')
+        for rate_hz in (None, 0, -1):
+            with self.assertRaises(ValueError):
+                IngestPolicy('decimate', rate_hz)
+
+    def test_admit(self):
+        policy = IngestPolicy('decimate', rate_hz=10)
+        admitted = [policy.admit(now) for now in (0.0, 0.05, 0.099, 0.1, 0.15, 0.25)]
+        self.assertEqual(admitted, [True, False, False, True, False, True])
+        self.assertEqual(policy.dropped, 3)
+        policy.reset()
+        self.assertTrue(policy.admit(0.26))
+        self.assertEqual(policy.dropped, 0)
+
+    def test_hold(self):
+        policy = IngestPolicy('latest')
+        self.assertTrue(policy.hold({'a': 1}, True))
+        self.assertFalse(policy.hold({'a': 2}, True))
+        self.assertEqual(policy.coalesced, 1)
+        self.assertEqual(policy.take(), ({'a': 2}, True))
+        self.assertIsNone(policy.take())
+        self.assertFalse(policy.has_pending)
+
+
+class TestEntityIngestPolicy(unittest.TestCase):
+
+    def make_entity(self, **kwargs):
+        return make_entity(['a'], buffer_length=4, init_buffers=True, **kwargs)
+
+    def test_latest(self):
+        entity = self.make_entity(ingest_policy='latest')
+        notified = []
+        entity.add_listener(notified.append)
+        for i in range(5):
+            entity.update_state({'a': i})
+        # Listeners are woken once, nothing is processed until the entity is read
+        self.assertEqual(len(notified), 1)
+        self.assertEqual(entity.ingest_stats['processed'], 0)
+        self.assertEqual(entity.snapshot.get_attr('a'), 4)
+        self.assertEqual(entity.ingest_stats, {
+            'policy': 'latest', 'rate_hz': None,
+            'received': 5, 'processed': 1, 'coalesced': 4, 'dropped': 0,
+        })
+        self.assertEqual(entity.msg_count, 5)
+        # The next message wakes the listeners again
+        entity.update_state({'a': 5})
+        self.assertEqual(len(notified), 3)
+
+    def test_latest_raw(self):
+        entity = self.make_entity(ingest_policy='latest', fast_ingest=True)
+        entity.ingest(b'{"a": 1, "b": 2}')
+        entity.ingest(b'{"a": 2, "b": 3}')
+        self.assertEqual(dict(entity.snapshot.state), {'a': 2})
+
+    def test_flush_on_read(self):
+        entity = self.make_entity(ingest_policy='latest')
+        for i in range(6):
+            entity.update_state({'a': i})
+            entity.flush()
+        entity.update_state({'a': 6})
+        self.assertEqual(entity.get_buffer('a'), [3, 4, 5, 6])
+        entity.update_state({'a': 7})
+        self.assertEqual(entity.ingest_stats['processed'], 7)
+        self.assertEqual(entity.snapshot.get_attr('a'), 7)
+        self.assertEqual(entity.get_buffer('a'), [4, 5, 6, 7])
+
+    def test_decimate(self):
+        clock = get_clock()
+        virtual = VirtualClock()
+        set_clock(virtual)
+        try:
+            entity = self.make_entity(ingest_policy='decimate', ingest_rate_hz=10)
+            for i in range(10):
+                entity.update_state({'a': i})
+                virtual.advance(0.04)
+        finally:
+            set_clock(clock)
+        # Received at 0.0, 0.04, ..., 0.36: processed at 0.0, 0.12, 0.24 and 0.36
+        self.assertEqual(entity.get_buffer('a'), [0, 3, 6, 9])
+        self.assertEqual(entity.ingest_stats['processed'], 4)
+        self.assertEqual(entity.ingest_stats['dropped'], 6)
+        self.assertEqual(entity.msg_count, 10)
+
+    def test_set_ingest_policy(self):
+        entity = self.make_entity(ingest_policy='latest')
+        entity.update_state({'a': 1})
+        entity.set_ingest_policy('all')
+        self.assertEqual(entity.attributes['a'], 1)
+        self.assertEqual(entity.ingest_stats['policy'], 'all')
+        entity.update_state({'a': 2})
+        self.assertEqual(entity.attributes['a'], 2)
+        with self.assertRaises(ValueError):
+            entity.set_ingest_policy('decimate')
+
+    def test_reset(self):
+        entity = self.make_entity(ingest_policy='latest')
+        entity.update_state({'a': 1})
+        entity.reset()
+        self.assertFalse(entity.ingest_policy.has_pending)
+        self.assertIsNone(entity.snapshot.get_attr('a'))
+        self.assertEqual(entity.ingest_stats['received'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
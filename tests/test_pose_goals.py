@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.pose_goals` and `goalee.trajectory_goals`."""
+
+import unittest
+from unittest import mock
+
+from goalee.goal import GoalState
+from goalee.pose_goals import PositionGoal
+from goalee.trajectory_goals import WaypointTrajectoryGoal
+from goalee.types import Point
+
+from tests.helpers import make_entity
+
+
+class TestCheckPosition(unittest.TestCase):
+
+    def setUp(self):
+        self.entity = make_entity(['position'])
+        self.goals = [
+            PositionGoal(self.entity, Point(1.0, 2.0, 0.0), deviation=0.5),
+            WaypointTrajectoryGoal(self.entity, [Point(1.0, 2.0, 0.0)], deviation=0.5),
+        ]
+
+    def update(self, position):
+        self.entity.update_state({'position': position})
+
+    def tick(self, goal):
+        with mock.patch.object(goal, 'log_warning') as log_warning:
+            goal.tick()
+        return log_warning.called
+
+    def test_no_position(self):
+        for goal in self.goals:
+            self.assertFalse(self.tick(goal))
+            self.assertEqual(goal.state, GoalState.IDLE)
+
+    def test_invalid_position(self):
+        self.update({'x': None, 'y': None, 'z': None})
+        for goal in self.goals:
+            self.assertTrue(self.tick(goal))
+            self.assertEqual(goal.state, GoalState.IDLE)
+
+    def test_partial_position(self):
+        self.update({'x': 1.0, 'y': None, 'z': 0.0})
+        for goal in self.goals:
+            self.assertFalse(self.tick(goal))
+            self.assertEqual(goal.state, GoalState.IDLE)
+
+    def test_reached(self):
+        self.update({'x': 1.1, 'y': 1.9, 'z': 0.0})
+        for goal in self.goals:
+            self.assertFalse(self.tick(goal))
+            self.assertEqual(goal.state, GoalState.COMPLETED)
+
+
+class TestSchemaPosition(TestCheckPosition):
+    """Coordinates extracted by a schema, stored as flat position.x/y/z attributes."""
+
+    def setUp(self):
+        self.entity = make_entity([], schema={
+            'position.x': ('pose.position.x', float),
+            'position.y': ('pose.position.y', float),
+            'position.z': ('pose.position.z', float),
+        })
+        self.goals = [
+            PositionGoal(self.entity, Point(1.0, 2.0, 0.0), deviation=0.5),
+            WaypointTrajectoryGoal(self.entity, [Point(1.0, 2.0, 0.0)], deviation=0.5),
+        ]
+
+    def update(self, position):
+        self.entity.update_state({'pose': {'position': position}})
+
+    def test_invalid_position(self):
+        self.update({'x': None, 'y': None, 'z': None})
+        for goal in self.goals:
+            self.tick(goal)
+            self.assertEqual(goal.state, GoalState.IDLE)
+
+
+if __name__ == '__main__':
+    unittest.main()
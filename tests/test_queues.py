@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.queues` and the replay of queued entity updates."""
+
+import threading
+import time
+import unittest
+
+from goalee.entity_goals import EntityStateCondition
+from goalee.goal import GoalState
+from goalee.queues import UpdateQueue
+
+from tests.helpers import make_entity
+
+
+class TestUpdateQueue(unittest.TestCase):
+
+    def test_drop_oldest(self):
+        queue = UpdateQueue(3, 'drop_oldest')
+        self.assertEqual([queue.put(i) for i in range(5)], [True] * 5)
+        self.assertEqual(queue.serialize(), {'maxsize': 3, 'overflow': 'drop_oldest',
+                                             'enqueued': 5, 'dropped': 2, 'max_depth': 3})
+        self.assertEqual(queue.drain(), [2, 3, 4])
+        self.assertEqual(queue.drain(), [])
+
+    def test_drop_newest(self):
+        queue = UpdateQueue(3, 'drop_newest')
+        self.assertEqual([queue.put(i) for i in range(5)], [True, True, True, False, False])
+        self.assertEqual((queue.enqueued, queue.dropped, queue.max_depth), (5, 2, 3))
+        self.assertEqual(queue.drain(), [0, 1, 2])
+
+    def test_reset(self):
+        queue = UpdateQueue(2)
+        for i in range(4):
+            queue.put(i)
+        queue.clear()
+        self.assertEqual(len(queue), 0)
+        self.assertEqual(queue.dropped, 2)
+        queue.reset()
+        self.assertEqual((queue.enqueued, queue.dropped, queue.max_depth), (0, 0, 0))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            UpdateQueue(0)
+        with self.assertRaises(ValueError):
+            UpdateQueue(2, 'drop_all')
+
+
+class RecordingCondition(EntityStateCondition):
+    """Records the value of x evaluated by every tick."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen = []
+
+    def tick(self):
+        self.seen.append(self.view(self._entities[0]).attributes['x'])
+        super().tick()
+
+
+class TestSnapshotReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.entity = make_entity(['x'], name='sensor')
+
+    def run_goal(self, goal, values):
+        # Updates arrive between two ticks of the goal
+        goal.set_tick_freq(2)
+        thread = threading.Thread(target=goal.enter)
+        thread.start()
+        time.sleep(0.1)
+        for value in values:
+            self.entity.update_state({'x': value})
+        thread.join()
+
+    def test_replay_order(self):
+        goal = RecordingCondition([self.entity],
+                                  condition="entities['sensor'].attributes['x'] == 3",
+                                  max_duration=2.0)
+        goal.set_update_queue(10)
+        self.run_goal(goal, [1, 2, 3])
+        self.assertEqual(goal.state, GoalState.COMPLETED)
+        self.assertEqual(goal.seen, [None, 1, 2, 3])
+
+    def test_transient_value(self):
+        # Only true for a value overwritten before the next tick
+        condition = "entities['sensor'].attributes['x'] == 2"
+        goal = EntityStateCondition([self.entity], condition=condition, max_duration=1.0)
+        goal.set_update_queue(10)
+        self.run_goal(goal, [1, 2, 3])
+        self.assertEqual(goal.state, GoalState.COMPLETED)
+
+        goal = EntityStateCondition([self.entity], condition=condition, max_duration=1.0)
+        self.run_goal(goal, [1, 2, 3])
+        self.assertEqual(goal.state, GoalState.FAILED)
+
+    def test_overflow(self):
+        goal = RecordingCondition([self.entity],
+                                  condition="entities['sensor'].attributes['x'] == 3",
+                                  max_duration=2.0)
+        goal.set_update_queue(2, 'drop_oldest')
+        self.run_goal(goal, [1, 2, 3])
+        self.assertEqual(goal.seen, [None, 2, 3])
+        self.assertEqual(goal.update_queue.dropped, 1)
+
+    def test_latest_policy(self):
+        entity = make_entity(['x'], name='sensor', ingest_policy='latest')
+        goal = RecordingCondition([entity],
+                                  condition="entities['sensor'].attributes['x'] == 3",
+                                  max_duration=2.0)
+        goal.set_update_queue(10)
+        goal.set_tick_freq(2)
+        thread = threading.Thread(target=goal.enter)
+        thread.start()
+        time.sleep(0.1)
+        for value in (1, 2, 3):
+            entity.update_state({'x': value})
+        # Still held, the message is not processed by the transport thread
+        self.assertTrue(entity.ingest_policy.has_pending)
+        self.assertEqual(entity.ingest_stats['processed'], 0)
+        thread.join()
+        self.assertEqual(goal.state, GoalState.COMPLETED)
+        # Held messages are coalesced into a single update
+        self.assertEqual(goal.seen, [None, 3])
+        self.assertEqual(entity.ingest_stats['processed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
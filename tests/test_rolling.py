@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.rolling` and the rolling statistics of entities."""
+
+import math
+import random
+import statistics
+import unittest
+
+from goalee.entity_goals import CONDITION_FUNCTIONS, EntityStateCondition
+from goalee.rolling import RESYNC_INTERVAL, RollingStats
+
+from tests.helpers import make_entity
+
+
+class TestRollingStats(unittest.TestCase):
+
+    def assert_close(self, value, expected):
+        self.assertTrue(math.isclose(value, expected, rel_tol=1e-9, abs_tol=1e-9),
+                        f'{value} != {expected}')
+
+    def assert_window(self, stats, window):
+        self.assertEqual(stats.count, len(window))
+        self.assert_close(stats.mean, statistics.mean(window))
+        self.assertEqual(stats.min, min(window))
+        self.assertEqual(stats.max, max(window))
+        if len(window) > 1:
+            self.assert_close(stats.variance, statistics.variance(window))
+            self.assert_close(stats.std, statistics.stdev(window))
+
+    def test_sliding_window(self):
+        rng = random.Random(1)
+        for maxlen in (1, 2, 7, 50):
+            stats = RollingStats(maxlen)
+            values = []
+            for i in range(500):
+                value = rng.gauss(100, 5) if i % 3 else rng.randint(-5, 5)
+                stats.append(value)
+                values.append(float(value))
+                self.assert_window(stats, values[-maxlen:])
+
+    def test_monotonic_runs(self):
+        # Increasing then decreasing values exercise both monotonic deques
+        stats = RollingStats(5)
+        values = list(range(20)) + list(range(20, 0, -1)) + [3] * 10
+        for i, value in enumerate(values):
+            stats.append(value)
+            self.assert_window(stats, values[max(0, i - 4):i + 1])
+
+    def test_resync(self):
+        stats = RollingStats(10)
+        values = [1e4 + (i % 13) * 0.1 for i in range(RESYNC_INTERVAL + 5)]
+        for value in values:
+            stats.append(value)
+        self.assert_window(stats, values[-10:])
+
+    def test_popleft(self):
+        stats = RollingStats()
+        values = [5.0, 1.0, 9.0, 3.0, 7.0]
+        for value in values:
+            stats.append(value)
+        while len(values) > 1:
+            self.assertEqual(stats.popleft(), values.pop(0))
+            self.assert_window(stats, values)
+        stats.popleft()
+        self.assertIsNone(stats.mean)
+        self.assertIsNone(stats.min)
+
+    def test_too_few_values(self):
+        stats = RollingStats(5)
+        self.assertIsNone(stats.mean)
+        self.assertIsNone(stats.max)
+        stats.append(1.0)
+        self.assertEqual(stats.mean, 1.0)
+        self.assertIsNone(stats.variance)
+        self.assertIsNone(stats.std)
+        with self.assertRaises(statistics.StatisticsError):
+            CONDITION_FUNCTIONS['std'](stats)
+        with self.assertRaises(statistics.StatisticsError):
+            CONDITION_FUNCTIONS['min'](RollingStats(5))
+
+    def test_clear(self):
+        stats = RollingStats(3)
+        for value in (1, 2, 3, 4):
+            stats.append(value)
+        stats.clear()
+        self.assertEqual(stats.count, 0)
+        stats.append(10)
+        self.assert_window(stats, [10.0])
+
+
+class TestEntityStats(unittest.TestCase):
+
+    def make_entity(self, backend):
+        return make_entity(['temp', 'label'], name='sensor', init_buffers=True,
+                           buffer_length=8, buffer_backend=backend)
+
+    def test_matches_buffer(self):
+        for backend in ('deque', 'array'):
+            entity = self.make_entity(backend)
+            values = []
+            for i in range(30):
+                value = (i * 7) % 11 + 0.5
+                entity.update_state({'temp': value})
+                values.append(value)
+                if i == 3:
+                    # Created from the values already in the buffer
+                    stats = entity.get_stats('temp')
+                if i >= 3:
+                    self.assertAlmostEqual(stats.mean, statistics.mean(values[-8:]))
+                    self.assertAlmostEqual(stats.std, statistics.stdev(values[-8:]))
+                    self.assertEqual(stats.min, min(values[-8:]))
+                    self.assertEqual(stats.max, max(values[-8:]))
+            self.assertIs(entity.get_stats('temp'), stats)
+            entity.reset()
+            self.assertEqual(entity.get_stats('temp').count, 0)
+
+    def test_non_numeric(self):
+        entity = self.make_entity('deque')
+        entity.update_state({'temp': 1.0, 'label': 'a'})
+        with self.assertRaises(ValueError):
+            entity.get_stats('label')
+        self.assertIsNone(entity.attributes_stats['label'])
+        # A non-numeric value drops the aggregates instead of desynchronizing them
+        entity.get_stats('temp')
+        entity.update_state({'temp': 'n/a'})
+        self.assertIsNone(entity.attributes_stats['temp'])
+        with self.assertRaises(ValueError):
+            entity.get_stats('temp')
+
+    def test_condition(self):
+        entity = self.make_entity('deque')
+        goal = EntityStateCondition(
+            entities=[entity], condition="std(entities['sensor'].get_stats('temp')) < 0.5")
+        self.assertFalse(goal.evaluate_condition({'sensor': entity}))
+        entity.update_state({'temp': 20.0})
+        self.assertFalse(goal.evaluate_condition({'sensor': entity}))
+        entity.update_state({'temp': 20.1})
+        self.assertTrue(goal.evaluate_condition({'sensor': entity}))
+        entity.update_state({'temp': 25.0})
+        self.assertFalse(goal.evaluate_condition({'sensor': entity}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.router`."""
+
+import unittest
+
+from goalee.router import TopicRouter, compile_pattern, is_pattern
+
+from tests.helpers import FakeNode
+
+
+class TestPatterns(unittest.TestCase):
+
+    def test_compile_pattern(self):
+        regex = compile_pattern('robots.*.pose')
+        self.assertTrue(regex.match('robots.r1.pose'))
+        self.assertFalse(regex.match('robots.r1.arm.pose'))
+        self.assertFalse(regex.match('robots.r1.pose.x'))
+        self.assertFalse(compile_pattern('a.b').match('aXb'))
+        self.assertTrue(is_pattern('robots.*.pose'))
+        self.assertFalse(is_pattern('robots.r*.pose'))
+
+
+class TestTopicRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.node = FakeNode()
+        self.running = True
+        self.router = TopicRouter(self.node, self.start_subscriber, lambda: self.running)
+        self.received = []
+
+    def start_subscriber(self, sub):
+        sub.running = True
+
+    def callback(self, name):
+        def on_message(msg):
+            self.received.append((name, msg))
+        return on_message
+
+    def deliver(self, topic, msg):
+        # Delivers a message as the broker would, to every matching subscription
+        for sub in list(self.node._subscribers):
+            if sub.pattern and compile_pattern(sub.topic).match(topic):
+                sub.on_message(msg, topic)
+            elif not sub.pattern and sub.topic == topic:
+                sub.on_message(msg)
+
+    def test_one_subscription_per_topic(self):
+        a, b = self.callback('a'), self.callback('b')
+        sub = self.router.subscribe('robots.r1.pose', a)
+        self.assertIs(self.router.subscribe('robots.r1.pose', b), sub)
+        self.assertTrue(sub.running)
+        self.assertEqual(self.router.topics, ['robots.r1.pose'])
+        self.deliver('robots.r1.pose', {'x': 1})
+        self.assertEqual(self.received, [('a', {'x': 1}), ('b', {'x': 1})])
+
+    def test_not_started_before_node_runs(self):
+        self.running = False
+        sub = self.router.subscribe('robots.r1.pose', self.callback('a'))
+        self.assertFalse(sub.running)
+
+    def test_pattern_ownership(self):
+        r1 = self.router.subscribe('robots.r1.pose', self.callback('r1'))
+        psub = self.router.add_pattern('robots.*.pose')
+        # The pattern replaces the subscription of the topic it covers
+        self.assertTrue(r1.stopped)
+        self.assertNotIn(r1, self.node._subscribers)
+        self.assertIs(self.router.subscriber('robots.r1.pose'), psub)
+        # Topics subscribed later do not get subscriptions of their own
+        self.assertIs(self.router.subscribe('robots.r2.pose', self.callback('r2')), psub)
+        self.assertEqual(self.router.topics, ['robots.*.pose'])
+        # Overlapping patterns deliver a message once, through the first one
+        self.router.add_pattern('robots.r1.*')
+        self.deliver('robots.r1.pose', {'x': 1})
+        self.deliver('robots.r2.pose', {'x': 2})
+        self.deliver('robots.r3.pose', {'x': 3})
+        self.assertEqual(self.received, [('r1', {'x': 1}), ('r2', {'x': 2})])
+
+    def test_pattern_callbacks(self):
+        self.router.subscribe('robots.r1.pose', self.callback('r1'))
+        everything = self.callback('all')
+        psub = self.router.subscribe('robots.*.pose', everything)
+        self.deliver('robots.r1.pose', {'x': 1})
+        self.deliver('robots.r2.pose', {'x': 2})
+        self.assertEqual(self.received, [('r1', {'x': 1}), ('all', {'x': 1}),
+                                         ('all', {'x': 2})])
+        # Without add_pattern, the last callback stops the pattern subscription
+        self.router.unsubscribe('robots.*.pose', everything)
+        self.assertTrue(psub.stopped)
+        self.assertEqual(self.router.patterns, [])
+        # The topic covered by the pattern is subscribed again
+        self.assertEqual(self.router.topics, ['robots.r1.pose'])
+
+    def test_unsubscribe(self):
+        a, b = self.callback('a'), self.callback('b')
+        sub = self.router.subscribe('robots.r1.pose', a)
+        self.router.subscribe('robots.r1.pose', b)
+        self.router.unsubscribe('robots.r1.pose', a)
+        self.assertFalse(sub.stopped)
+        self.deliver('robots.r1.pose', {'x': 1})
+        self.assertEqual(self.received, [('b', {'x': 1})])
+        self.router.unsubscribe('robots.r1.pose', b)
+        self.assertTrue(sub.stopped)
+        self.assertEqual(self.router.topics, [])
+        self.assertIsNone(self.router.subscriber('robots.r1.pose'))
+
+    def test_pinned_pattern(self):
+        callback = self.callback('r1')
+        psub = self.router.add_pattern('robots.*.pose')
+        self.router.subscribe('robots.r1.pose', callback)
+        self.router.unsubscribe('robots.r1.pose', callback)
+        # Kept without callbacks, until removed
+        self.assertFalse(psub.stopped)
+        self.router.subscribe('robots.r1.pose', callback)
+        self.router.remove_pattern('robots.*.pose')
+        self.assertTrue(psub.stopped)
+        own = self.router.subscriber('robots.r1.pose')
+        self.assertIsNot(own, psub)
+        self.assertFalse(own.pattern)
+        self.deliver('robots.r1.pose', {'x': 1})
+        self.assertEqual(self.received, [('r1', {'x': 1})])
+
+    def test_raw(self):
+        router = TopicRouter(self.node, self.start_subscriber, lambda: True, raw=True)
+        router.subscribe('robots.r1.pose', self.callback('a'))
+        self.deliver('robots.r1.pose', b'{"x": 1}')
+        self.deliver('robots.r1.pose', b'not json')
+        self.assertEqual(self.received, [('a', {'x': 1})])
+
+
+if __name__ == '__main__':
+    unittest.main()
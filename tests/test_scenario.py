@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.scenario`."""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from goalee.entity_goals import EntityStateChange
+from goalee.goal import Goal, GoalState
+from goalee.scenario import Scenario
+
+from tests.helpers import OfflineEntity, make_entity
+
+
+class SilentEntity(OfflineEntity):
+    """Entity whose subscription never becomes active."""
+
+    @property
+    def ready(self) -> bool:
+        return False
+
+
+class SlowExitGoal(Goal):
+    """Goal that never reaches a verdict on its own, and takes a while to exit."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.exited = False
+
+    def on_enter(self):
+        self.exited = False
+
+    def tick(self):
+        pass
+
+    def on_exit(self):
+        time.sleep(0.1)
+        self.exited = True
+
+
+class TestScenarioAsync(unittest.TestCase):
+
+    def test_wait_entities_ready_does_not_block_loop(self):
+        scenario = Scenario('S', ready_timeout=0.3)
+        entity = make_entity(['a'], entity_type=SilentEntity)
+        ticks = []
+
+        async def ticker():
+            for i in range(10):
+                ticks.append(i)
+                await asyncio.sleep(0.02)
+
+        async def main():
+            ready, _ = await asyncio.gather(scenario.wait_entities_ready_async([entity]),
+                                            ticker())
+            return ready
+
+        self.assertFalse(asyncio.run(main()))
+        self.assertEqual(len(ticks), 10)
+
+    def test_first_message(self):
+        entity = make_entity(['a'])
+
+        async def main():
+            waiter = asyncio.ensure_future(entity.wait_first_message_async(1.0))
+            await asyncio.sleep(0.05)
+            self.assertFalse(waiter.done())
+            entity.update_state({'a': 1})
+            return await waiter
+
+        self.assertTrue(asyncio.run(main()))
+
+    def test_run_async(self):
+        entity = make_entity(['a'], entity_type=OfflineEntity)
+        goal = EntityStateChange(entity, name='change', max_duration=1.0)
+        anti = SlowExitGoal(name='anti')
+        scenario = Scenario('S', goals=[goal], anti_goals=[anti], goal_tick_freq_hz=50)
+        threading.Timer(0.05, entity.update_state, [{'a': 1}]).start()
+        asyncio.run(scenario.run_async())
+        self.assertEqual(goal.state, GoalState.COMPLETED)
+        self.assertEqual(anti.state, GoalState.TERMINATED)
+        self.assertTrue(anti.exited)
+        self.assertEqual(scenario.calc_score(), 1.0)
+        self.assertEqual(scenario.make_result_list(), [('change', True)])
+        self.assertEqual(entity.n_stops, 1)
+
+    def test_cancel_run_async(self):
+        entity = make_entity(['a'], entity_type=OfflineEntity)
+        goal = SlowExitGoal(name='goal', max_duration=5.0)
+        anti = SlowExitGoal(name='anti')
+        scenario = Scenario('S', goals=[goal], anti_goals=[anti])
+
+        async def main():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(scenario.run_async(), 0.1)
+            # No goal is left running on the loop
+            self.assertEqual(asyncio.all_tasks(), {asyncio.current_task()})
+
+        ts_start = time.monotonic()
+        asyncio.run(main())
+        self.assertLess(time.monotonic() - ts_start, 1.0)
+        self.assertEqual(goal.state, GoalState.TERMINATED)
+        self.assertEqual(anti.state, GoalState.TERMINATED)
+        self.assertTrue(goal.exited and anti.exited)
+        self.assertIsNone(scenario._thread_executor)
+
+
+class TestScenarioRuns(unittest.TestCase):
+
+    def setUp(self):
+        self.entity = make_entity(['a'], entity_type=OfflineEntity)
+        self.goal = EntityStateChange(self.entity, max_duration=0.3)
+
+    def make_scenario(self, **kwargs):
+        return Scenario('S', goals=[self.goal], goal_tick_freq_hz=50, **kwargs)
+
+    def run_scenario(self, scenario, message=None):
+        if message is not None:
+            timer = threading.Timer(0.05, self.entity.update_state, [message])
+            timer.start()
+        scenario.run_concurrent()
+        return self.goal.state
+
+    def test_rerun(self):
+        scenario = self.make_scenario(keep_alive=True)
+        self.assertEqual(self.run_scenario(scenario, {'a': 1}), GoalState.COMPLETED)
+        scenario.reset()
+        # Clearing the state of the entity is not a message of the next run
+        self.assertEqual(self.run_scenario(scenario), GoalState.FAILED)
+        scenario.reset()
+        self.assertEqual(self.run_scenario(scenario, {'a': 2}), GoalState.COMPLETED)
+        scenario.close()
+
+    def test_keep_alive(self):
+        scenario = self.make_scenario(keep_alive=True)
+        self.run_scenario(scenario, {'a': 1})
+        executor = scenario._thread_executor
+        self.assertIsNotNone(executor)
+        self.assertEqual(self.entity.n_stops, 0)
+        scenario.reset()
+        self.run_scenario(scenario, {'a': 1})
+        self.assertIs(scenario._thread_executor, executor)
+        self.assertEqual(self.entity.n_starts, 1)
+        scenario.close()
+        scenario.close()
+        self.assertEqual(self.entity.n_stops, 1)
+        self.assertIsNone(scenario._thread_executor)
+
+    def test_close_after_each_run(self):
+        scenario = self.make_scenario()
+        self.run_scenario(scenario, {'a': 1})
+        self.assertEqual(self.entity.n_stops, 1)
+        self.assertIsNone(scenario._thread_executor)
+        # A closed scenario is reopened by its next run
+        scenario.reset()
+        self.assertEqual(self.run_scenario(scenario, {'a': 2}), GoalState.COMPLETED)
+        self.assertEqual((self.entity.n_starts, self.entity.n_stops), (2, 2))
+
+    def test_background_goals_exit(self):
+        for run in ('run_seq', 'run_concurrent'):
+            anti, fatal = SlowExitGoal(name='anti'), SlowExitGoal(name='fatal')
+            scenario = self.make_scenario(anti_goals=[anti], fatal_goals=[fatal])
+            timer = threading.Timer(0.05, self.entity.update_state, [{'a': 1}])
+            timer.start()
+            getattr(scenario, run)()
+            # Stopped by the scenario, before it can be reset
+            self.assertTrue(anti.exited and fatal.exited, run)
+            self.assertEqual(fatal.state, GoalState.TERMINATED)
+            self.goal.reset()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.scheduler`."""
+
+import asyncio
+import time
+import unittest
+
+from goalee.goal import Goal, GoalState
+from goalee.scheduler import TickScheduler
+
+
+class IdleGoal(Goal):
+    """Goal that never reaches a verdict on its own."""
+
+    def on_enter(self):
+        pass
+
+    def tick(self):
+        pass
+
+
+class TestTickScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = TickScheduler(freq_hz=10)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def make_goal(self):
+        goal = IdleGoal(max_duration=0.2)
+        # Far slower than the deadline, which must not wait for the next tick
+        goal.set_tick_freq(0.2)
+        goal.set_tick_scheduler(self.scheduler)
+        return goal
+
+    def test_deadline_releases_goal(self):
+        goal = self.make_goal()
+        ts_start = time.monotonic()
+        goal.enter()
+        self.assertLess(time.monotonic() - ts_start, 1.0)
+        self.assertEqual(goal.state, GoalState.FAILED)
+        self.assertEqual(self.scheduler.stats['goals'], 0)
+
+    def test_deadline_releases_goal_async(self):
+        goal = self.make_goal()
+        ts_start = time.monotonic()
+        asyncio.run(goal.enter_async())
+        self.assertLess(time.monotonic() - ts_start, 1.0)
+        self.assertEqual(goal.state, GoalState.FAILED)
+        self.assertEqual(self.scheduler.stats['goals'], 0)
+
+    def test_wake_unregistered(self):
+        self.scheduler.wake(self.make_goal())
+        self.assertEqual(self.scheduler.run_round(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
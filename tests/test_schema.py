@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.schema` and attribute extraction in entities."""
+
+import unittest
+
+from goalee.schema import Field, Schema, SchemaError, compile_schema, get_path
+
+from tests.helpers import make_entity
+
+MSG = {
+    'header': {'stamp': 12},
+    'pose': {'position': {'x': 1, 'y': '2.5', 'z': None}, 'frame': 'map'},
+    'battery': 87,
+}
+
+
+class TestGetPath(unittest.TestCase):
+
+    def test_get_path(self):
+        self.assertEqual(get_path(MSG, 'pose.position.x'), 1)
+        self.assertEqual(get_path(MSG, ('pose', 'frame')), 'map')
+        self.assertIsNone(get_path(MSG, 'pose.position.z', default=0))
+        self.assertEqual(get_path(MSG, 'pose.orientation.x', default=0), 0)
+        # A level of the path is not a mapping
+        self.assertIsNone(get_path(MSG, 'battery.level'))
+        self.assertIsNone(get_path(None, 'battery'))
+
+
+class TestSchema(unittest.TestCase):
+
+    def test_extract(self):
+        schema = compile_schema({
+            'x': ('pose.position.x', float),
+            'y': ('pose.position.y', float),
+            'z': ('pose.position.z', float),
+            'frame': 'pose.frame',
+            'battery': int,
+        })
+        values = schema.extract(MSG)
+        self.assertEqual(values, {'x': 1.0, 'y': 2.5, 'z': None, 'frame': 'map', 'battery': 87})
+        self.assertIs(type(values['x']), float)
+        self.assertEqual(schema.roots, frozenset({'pose', 'battery'}))
+
+    def test_missing_keys(self):
+        schema = compile_schema(['pose.position.x', 'pose.orientation.w', 'battery.level',
+                                 'temperature'])
+        self.assertEqual(schema.extract(MSG), {'pose.position.x': 1})
+        self.assertEqual(schema.extract({}), {})
+
+    def test_invalid_values(self):
+        schema = compile_schema({'x': ('pose.position.x', float), 'frame': ('pose.frame', float)})
+        self.assertEqual(schema.extract(MSG), {'x': 1.0})
+        with self.assertRaises(SchemaError):
+            schema.extract(MSG, strict=True)
+
+    def test_compile(self):
+        schema = compile_schema({'x': Field('x', 'pose.position.x'), 'battery': None})
+        self.assertIs(compile_schema(schema), schema)
+        self.assertEqual(schema.names, ['x', 'battery'])
+        self.assertEqual(schema.fields[0].keys, ('pose', 'position', 'x'))
+        with self.assertRaises(ValueError):
+            compile_schema({'x': 1})
+        with self.assertRaises(ValueError):
+            Schema([Field('x'), Field('x', 'pose.position.x')])
+
+
+class TestEntitySchema(unittest.TestCase):
+
+    def test_entity_attributes(self):
+        entity = make_entity(['battery', 'pose'],
+                             schema={'x': ('pose.position.x', float), 'w': 'pose.orientation.w'})
+        entity.update_state(MSG)
+        self.assertEqual(entity.attributes['x'], 1.0)
+        self.assertEqual(entity.attributes['battery'], 87)
+        self.assertIsNone(entity.attributes['w'])
+        self.assertEqual(entity.get_attr('pose.position.y'), '2.5')
+
+    def test_strict(self):
+        entity = make_entity(['battery'], strict_mode=True,
+                             schema={'x': ('pose.position.x', float)})
+        entity.update_state({'pose': {'position': {'x': 'n/a'}}})
+        self.assertFalse(entity.initialized)
+        entity.update_state({'pose': {'position': {'x': 3}}, 'battery': 50})
+        self.assertEqual(entity.attributes['x'], 3.0)
+        # Unknown top-level keys are rejected in strict mode
+        entity.update_state({'pose': {'position': {'x': 4}}, 'speed': 1})
+        self.assertEqual(entity.attributes['x'], 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+"""Tests for `goalee.timers`."""
+
+import threading
+import unittest
+
+from goalee.clock import VirtualClock
+from goalee.timers import DeadlineScheduler
+
+
+class TestDeadlineScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = DeadlineScheduler(name='test-deadlines')
+        self.fired = []
+        self.done = threading.Event()
+
+    def schedule(self, delay, name, last=False):
+        def callback():
+            self.fired.append(name)
+            if last:
+                self.done.set()
+        return self.scheduler.call_later(delay, callback)
+
+    def test_order(self):
+        # Registered latest first, each one becomes the head of the heap
+        self.schedule(0.15, 'c', last=True)
+        self.schedule(0.1, 'b')
+        self.schedule(0.05, 'a')
+        self.assertEqual(self.scheduler.pending, 3)
+        self.assertTrue(self.done.wait(2.0))
+        self.assertEqual(self.fired, ['a', 'b', 'c'])
+        self.assertEqual(self.scheduler.pending, 0)
+
+    def test_cancel(self):
+        head = self.schedule(0.05, 'a')
+        self.schedule(0.1, 'b', last=True)
+        head.cancel()
+        head.cancel()
+        self.assertTrue(head.cancelled)
+        self.assertEqual(self.scheduler.pending, 1)
+        self.assertTrue(self.done.wait(2.0))
+        self.assertEqual(self.fired, ['b'])
+        self.assertFalse(head.fired)
+
+    def test_cancel_after_fired(self):
+        deadline = self.schedule(0.0, 'a', last=True)
+        self.assertTrue(self.done.wait(2.0))
+        deadline.cancel()
+        self.assertTrue(deadline.fired)
+        self.assertFalse(deadline.cancelled)
+        self.assertEqual(deadline.remaining(), 0.0)
+
+    def test_compaction(self):
+        deadlines = [self.schedule(10.0 + i, i) for i in range(100)]
+        for deadline in deadlines[:80]:
+            deadline.cancel()
+        self.assertEqual(self.scheduler.pending, 20)
+        # Cancelled entries were dropped from the heap
+        self.assertLess(len(self.scheduler._heap), 100)
+
+    def test_callback_error(self):
+        def fail():
+            raise RuntimeError('failed callback')
+        self.scheduler.call_later(0.0, fail)
+        self.schedule(0.05, 'a', last=True)
+        self.assertTrue(self.done.wait(2.0))
+        self.assertEqual(self.fired, ['a'])
+
+
+class TestVirtualDeadlines(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.fired = []
+
+    def schedule(self, delay, name):
+        return self.clock.call_later(delay, lambda: self.fired.append((name, self.clock.time())))
+
+    def test_order(self):
+        self.schedule(3.0, 'c')
+        self.schedule(1.0, 'a')
+        self.schedule(2.0, 'b')
+        self.clock.advance_to(2.5)
+        self.assertEqual(self.fired, [('a', 1.0), ('b', 2.0)])
+        self.clock.advance_to(10.0)
+        self.assertEqual(self.fired[-1], ('c', 3.0))
+        self.assertEqual(self.clock.time(), 10.0)
+
+    def test_equal_deadlines(self):
+        for name in 'abcde':
+            self.schedule(1.0, name)
+        self.clock.advance(1.0)
+        # Fired in the order they were scheduled
+        self.assertEqual([name for name, _ in self.fired], list('abcde'))
+
+    def test_cancel(self):
+        first = self.schedule(1.0, 'a')
+        second = self.schedule(1.0, 'b')
+        self.schedule(2.0, 'c')
+        second.cancel()
+        self.clock.advance(1.0)
+        first.cancel()
+        self.assertTrue(first.fired)
+        self.assertFalse(first.cancelled)
+        self.clock.advance(1.0)
+        self.assertEqual(self.fired, [('a', 1.0), ('c', 2.0)])
+        self.assertFalse(second.fired)
+
+    def test_remaining(self):
+        deadline = self.schedule(2.0, 'a')
+        self.clock.advance(0.5)
+        self.assertEqual(deadline.remaining(), 1.5)
+        self.clock.advance(5.0)
+        self.assertEqual(deadline.remaining(), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()